@@ -0,0 +1,69 @@
+"""gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is preloaded in the master, so workers fork with the code, mappers
+and configuration already in memory. Per-worker state is set up after the
+fork: the engine is disposed without closing the parent's connections
+(create_db_engine registers that at fork), then post_worker_init warms the
+worker up and starts its service threads. /health/ready answers 503 until
+that is done, and reports the worker's startup and first-request times.
+
+Run ONE worker (the default; scale with WEB_THREADS). The event-driven
+services keep their state per process and nothing fans out between
+processes: the event bus, liveness tracker and arrival stats, alert
+latches, dashboard streams, analytics jobs, data version counters, the
+profiler and the ingestion rate limiter. With several workers behind
+round robin each one sees only part of the readings, so streams miss
+readings, idle workers report controllers OFFLINE, alerts transition
+wrongly, and job or profile polls landing on another worker get 404.
+WEB_WORKERS > 1 is only safe once those services share state across
+processes (e.g. Postgres LISTEN/NOTIFY); until then startup warns.
+"""
+import os
+
+# Read by flask_app when the master imports it: do not start threads there
+os.environ['IOT_PRELOAD'] = '1'
+
+from src.config import get_server_settings  # noqa: E402
+
+_settings = get_server_settings()
+
+bind = _settings['bind']
+workers = _settings['workers']
+threads = _settings['threads']
+worker_class = 'gthread'
+timeout = _settings['timeout']
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+max_requests = _settings['max_requests']
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    if workers > 1:
+        server.log.warning(
+            "WEB_WORKERS=%d: event bus, liveness, alerts, streams, jobs and rate limits are per "
+            "process and will disagree between workers; run one worker and raise WEB_THREADS", workers
+        )
+
+
+def when_ready(server):
+    # Analytics modules are imported lazily; load them once here so the
+    # forked workers share them instead of each importing its own copy
+    from src.lazy_imports import preload
+    server.log.info("Preloaded %s", ", ".join(preload()))
+
+
+def post_fork(server, worker):
+    from src.entrypoints import flask_app
+    # Startup time is counted from the fork
+    flask_app.app.extensions['readiness'].reset()
+
+
+def post_worker_init(worker):
+    from src.entrypoints import flask_app
+    flask_app.start_worker()
+    readiness = flask_app.app.extensions['readiness']
+    worker.log.info("Worker %s %s in %s ms %s", worker.pid,
+                    "ready" if readiness.ready else "NOT ready",
+                    readiness.startup_ms, readiness.steps)
@@ -0,0 +1,90 @@
+"""Requests per second for an authenticated no-op endpoint, before and after the token cache.
+
+Runs in-process through the Flask test client (no database needed):
+
+    python -m scripts.bench_auth --requests 5000
+
+"before" reproduces the old verify_token (full decode + five stdout prints,
+sent to /dev/null here, which understates the cost of a real pipe).
+"""
+import argparse
+import contextlib
+import os
+import time
+from datetime import datetime, timedelta
+import jwt
+from flask import Flask, jsonify
+from src.services.auth_service import AuthService, TokenCache
+from src.entrypoints.middleware import setup_middleware
+
+SECRET = 'bench-secret'
+
+
+class LegacyAuthService(AuthService):
+    def verify_token(self, token):
+        try:
+            print(f"\nAttempting to verify token...")
+            print(f"Token: {token[:20]}...")
+            print(f"Secret used: {self.jwt_secret[:5]}...")
+            payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
+            print(f"Token decoded successfully!")
+            print(f"Payload: {payload}")
+            return payload
+        except jwt.InvalidTokenError:
+            return None
+
+
+def build_app(auth_service: AuthService) -> Flask:
+    app = Flask(__name__)
+    setup_middleware(app, auth_service)
+
+    @app.route('/api/noop')
+    def noop():
+        return jsonify({})
+
+    return app
+
+
+def bench(app: Flask, token: str, requests: int) -> float:
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(100):
+        client.get('/api/noop', headers=headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/noop', headers=headers)
+        assert response.status_code == 200, response.status_code
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    token = jwt.encode({
+        'user_id': 1,
+        'email': 'bench@test.com',
+        'role': 'ADMIN',
+        'permissions': ['view_dashboard', 'view_signals', 'manage_empresa'],
+        'exp': datetime.utcnow() + timedelta(hours=1)
+    }, SECRET, algorithm='HS256')
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        before = bench(build_app(LegacyAuthService(None, SECRET, token_cache=TokenCache(maxsize=0))), token, args.requests)
+    uncached = bench(build_app(AuthService(None, SECRET, token_cache=TokenCache(maxsize=0))), token, args.requests)
+    cached = bench(build_app(AuthService(None, SECRET, token_cache=TokenCache())), token, args.requests)
+    print(f"before (prints + decode): {before:8.0f} req/s")
+    print(f"decode, no prints:        {uncached:8.0f} req/s  ({uncached / before:.2f}x)")
+    print(f"token cache:              {cached:8.0f} req/s  ({cached / before:.2f}x)")
+
+    for label, cache in (("decode", TokenCache(maxsize=0)), ("cached", TokenCache())):
+        service = AuthService(None, SECRET, token_cache=cache)
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            service.verify_token(token)
+        print(f"verify_token {label}: {(time.perf_counter() - start) / args.requests * 1e6:6.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
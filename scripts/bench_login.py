@@ -0,0 +1,84 @@
+"""Login throughput and its effect on concurrent dashboard latency.
+
+Simulates a shift-start burst: `--logins` threads verify passwords in a
+loop while one thread runs small dashboard-sized units of work and records
+their latency. Compares verifying on the request threads (the old
+behaviour) with the bounded PasswordHasher pool. No database needed:
+
+    python -m scripts.bench_login --logins 16 --seconds 5
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from werkzeug.security import check_password_hash, generate_password_hash
+from src.services.password_hasher import HasherBusy, PasswordHasher
+
+
+def dashboard_unit() -> None:
+    payload = [{"id": i, "name": f"controller {i}", "values": {f"sensor{j}": j % 2 == 0 for j in range(1, 7)}}
+               for i in range(200)]
+    json.loads(json.dumps(payload))
+
+
+def run(verify, logins: int, seconds: float, method: str):
+    stop = threading.Event()
+    done = [0]
+    rejected = [0]
+    latencies = []
+    lock = threading.Lock()
+
+    def login_loop(stored):
+        while not stop.is_set():
+            try:
+                ok = verify(stored, 'correct horse')
+            except HasherBusy:
+                rejected[0] += 1
+                time.sleep(0.01)
+                continue
+            assert ok
+            with lock:
+                done[0] += 1
+
+    def dashboard_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            dashboard_unit()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    stored = generate_password_hash('correct horse', method)
+    threads = [threading.Thread(target=login_loop, args=(stored,)) for _ in range(logins)]
+    threads.append(threading.Thread(target=dashboard_loop))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return done[0] / seconds, rejected[0], latencies
+
+
+def report(label, logins_per_second, rejected, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:<22} {logins_per_second:8.1f} logins/s  rejected {rejected:5d}  "
+          f"dashboard p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=16, help='concurrent login threads')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--method', default='scrypt')
+    parser.add_argument('--workers', type=int, default=2, help='PasswordHasher pool size')
+    args = parser.parse_args()
+
+    report("idle", *run(lambda *_: (time.sleep(0.05) or True), args.logins, args.seconds, args.method))
+    report("inline (before)", *run(check_password_hash, args.logins, args.seconds, args.method))
+    hasher = PasswordHasher(args.method, max_workers=args.workers, max_pending=args.workers * 4)
+    report(f"pool of {args.workers} (after)", *run(hasher.verify, args.logins, args.seconds, args.method))
+    print(json.dumps(hasher.stats()))
+    hasher.shutdown()
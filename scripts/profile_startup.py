@@ -0,0 +1,111 @@
+"""Startup profile: per-module import time and mapper configuration time.
+
+Imports the app in a fresh interpreter under `python -X importtime`, as a
+preloading server's master would (no service threads, no database), then
+times start_mappers() and configure_mappers():
+
+    python -m scripts.profile_startup --top 20
+    python -m scripts.profile_startup --module src.services.fleet_analytics_service --json
+
+Exits non-zero when the total exceeds the startup budget (STARTUP_BUDGET_MS,
+default 1500 ms) or a heavy analytics module got imported eagerly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+# Must only be imported on first use (see src/lazy_imports.py)
+LAZY_MODULES = ('numpy', 'pandas')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+from sqlalchemy.orm import configure_mappers
+from src.adapters.orm import start_mappers
+start_mappers()
+mapped = time.perf_counter()
+configure_mappers()
+configured = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "start_mappers_ms": (mapped - imported) * 1000,
+    "configure_mappers_ms": (configured - mapped) * 1000,
+    "eager_heavy_modules": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """`-X importtime` lines as {module, self_ms, cumulative_ms, depth}"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def profile_startup(module: str = 'src.entrypoints.flask_app') -> Dict:
+    env = dict(os.environ, IOT_PRELOAD='1', PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    by_package: Dict[str, float] = {}
+    for entry in modules:
+        package = entry["module"].split('.')[0]
+        by_package[package] = by_package.get(package, 0.0) + entry["self_ms"]
+
+    report["module"] = module
+    report["modules"] = modules
+    report["by_package_ms"] = dict(sorted(by_package.items(), key=lambda item: -item[1]))
+    report["total_ms"] = report["import_ms"] + report["start_mappers_ms"] + report["configure_mappers_ms"]
+    report["budget_ms"] = STARTUP_BUDGET_MS
+    return report
+
+
+def print_report(report: Dict, top: int) -> None:
+    print(f"{report['module']}: {report['total_ms']:.0f} ms (budget {report['budget_ms']:.0f} ms)")
+    print(f"  import             {report['import_ms']:8.1f} ms")
+    print(f"  start_mappers      {report['start_mappers_ms']:8.1f} ms")
+    print(f"  configure_mappers  {report['configure_mappers_ms']:8.1f} ms")
+    if report["eager_heavy_modules"]:
+        print(f"  eagerly imported: {', '.join(report['eager_heavy_modules'])}")
+    print(f"\nSelf time by package (top {top}):")
+    for package, ms in list(report["by_package_ms"].items())[:top]:
+        print(f"  {package:<30} {ms:8.1f} ms")
+    print(f"\nSlowest modules, cumulative (top {top}):")
+    for entry in sorted(report["modules"], key=lambda e: -e["cumulative_ms"])[:top]:
+        print(f"  {entry['module']:<50} {entry['cumulative_ms']:8.1f} ms  (self {entry['self_ms']:.1f})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='src.entrypoints.flask_app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', action='store_true', help='print the full report as JSON')
+    args = parser.parse_args()
+
+    report = profile_startup(args.module)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+    over_budget = report["total_ms"] > report["budget_ms"]
+    sys.exit(1 if over_budget or report["eager_heavy_modules"] else 0)
@@ -10,5 +10,8 @@ setup(
         "psycopg2-binary",
         "python-jose",
         "python-dotenv",
-    ]
+    ],
+    extras_require={
+        "asgi": ["starlette>=0.35", "uvicorn", "asyncpg", "a2wsgi"],
+    }
 ) 
\ No newline at end of file
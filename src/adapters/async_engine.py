@@ -0,0 +1,34 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from src.config import get_postgres_uri, get_db_pool_settings
+
+
+def async_uri(uri: str) -> str:
+    """The asyncpg flavour of a postgresql:// URI"""
+    scheme, rest = uri.split('://', 1)
+    if scheme in ('postgresql', 'postgres', 'postgresql+psycopg2'):
+        scheme = 'postgresql+asyncpg'
+    return f"{scheme}://{rest}"
+
+
+def create_async_db_engine(uri: Optional[str] = None, **overrides) -> AsyncEngine:
+    """Async counterpart of create_db_engine, with the same pool settings.
+
+    Used by the ASGI entry point; needs the optional asyncpg driver.
+    """
+    uri = async_uri(uri or get_postgres_uri())
+    settings = {**get_db_pool_settings(), **overrides}
+    statement_timeout_ms = settings.pop('statement_timeout_ms')
+    settings.pop('executemany_mode')
+
+    kwargs = dict(settings)
+    if uri.startswith('postgresql+asyncpg') and statement_timeout_ms:
+        kwargs['connect_args'] = {"server_settings": {"statement_timeout": str(int(statement_timeout_ms))}}
+    return create_async_engine(uri, **kwargs)
+
+
+def create_async_session_factory(engine: AsyncEngine, read_only: bool = False) -> async_sessionmaker:
+    """Sessions that keep loaded objects usable after commit, as handlers return them"""
+    if read_only:
+        engine = engine.execution_options(isolation_level='AUTOCOMMIT')
+    return async_sessionmaker(engine, expire_on_commit=False, autoflush=not read_only)
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from src.config import get_postgres_uri, get_db_pool_settings
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts that had to wait for a free connection.
+
+    A checkout waits when no connection is checked in and the overflow is
+    used up; those checkouts are timed, and the ones that give up after
+    `pool_timeout` are counted as timeouts. Counters are per process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.timeouts = 0
+            self.peak_checked_out = 0
+            self.peak_overflow = 0
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool: keep the counters visible across it
+        pool = super().recreate()
+        pool.__dict__.update({k: getattr(self, k) for k in (
+            'waits', 'wait_seconds', 'max_wait_seconds', 'timeouts', 'peak_checked_out', 'peak_overflow'
+        )})
+        return pool
+
+    def _do_get(self):
+        must_wait = self.checkedin() == 0 and self._max_overflow > -1 and self.overflow() >= self._max_overflow
+        if not must_wait:
+            conn = super()._do_get()
+            self._record_checkout()
+            return conn
+
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self._record_checkout()
+        return conn
+
+    def _record_checkout(self) -> None:
+        with self._stats_lock:
+            self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+            self.peak_overflow = max(self.peak_overflow, self.overflow())
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "timeout_seconds": self._timeout,
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": max(self.peak_overflow, 0),
+                "waits": self.waits,
+                "wait_time_ms_total": round(self.wait_seconds * 1000, 2),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "timeouts": self.timeouts,
+            }
+
+
+def create_db_engine(uri: Optional[str] = None, **overrides) -> Engine:
+    """Create the application engine with the pool settings from config.
+
+    The engine is disposed in forked children (gunicorn/uwsgi workers) so a
+    worker never reuses a connection inherited from its parent.
+    """
+    uri = uri or get_postgres_uri()
+    settings = {**get_db_pool_settings(), **overrides}
+    statement_timeout_ms = settings.pop('statement_timeout_ms')
+    executemany_mode = settings.pop('executemany_mode')
+
+    kwargs = dict(poolclass=InstrumentedQueuePool, **settings)
+    if uri.startswith('postgresql'):
+        if statement_timeout_ms:
+            kwargs['connect_args'] = {"options": f"-c statement_timeout={int(statement_timeout_ms)}"}
+        if executemany_mode and uri.split('://', 1)[0] in ('postgresql', 'postgresql+psycopg2'):
+            kwargs['executemany_mode'] = executemany_mode
+    engine = create_engine(uri, **kwargs)
+    _dispose_after_fork(engine)
+    return engine
+
+
+def pool_stats(engine: Engine) -> Dict:
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
+
+def _dispose_after_fork(engine: Engine) -> None:
+    if not hasattr(os, 'register_at_fork'):
+        return
+    engine_ref = weakref.ref(engine)
+
+    def dispose_in_child():
+        engine = engine_ref()
+        if engine is not None:
+            # close=False: the parent's connections stay open for the parent
+            engine.dispose(close=False)
+
+    os.register_at_fork(after_in_child=dispose_in_child)
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, MetaData, Column, Integer, String, Date, ForeignKey, Float, DateTime, JSON, Enum as SQLAEnum, ARRAY
+from sqlalchemy import Table, MetaData, Column, Integer, String, Date, ForeignKey, Float, DateTime, JSON, Enum as SQLAEnum, ARRAY, Index, text
 from sqlalchemy.dialects.postgresql import JSONB  # Import JSONB type
 from sqlalchemy.orm import registry, relationship, attribute_keyed_dict
 
@@ -21,7 +21,9 @@ signals = Table(
     Column('values', JSONB, nullable=False),  # Changed from JSON to JSONB
     Column('latitude', Float, nullable=False),
     Column('longitude', Float, nullable=False),
-    Column('metadata', JSONB, nullable=False)  # Changed from JSON to JSONB
+    Column('metadata', JSONB, nullable=False),  # Changed from JSON to JSONB
+    # Latest-signal and time-range lookups per controller
+    Index('ix_signals_controlador_tstamp', 'controlador_id', 'tstamp')
 )
 
 
@@ -58,7 +60,28 @@ empresas = Table(
     Column('email', String(255), nullable=False)
 )
 
+# Alert history, written in batches by the alert log writer (Core table, not mapped).
+# One row per alert episode; cleared_at stays NULL while the alert is open.
+alert_logs = Table(
+    'alert_logs',
+    mapper_registry.metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('controlador_id', Integer, ForeignKey('controladores.id'), nullable=False),
+    Column('empresa_id', Integer, ForeignKey('empresas.id'), nullable=True),
+    Column('rule_id', String(64), nullable=False),
+    Column('fired_at', DateTime, nullable=False),
+    Column('cleared_at', DateTime, nullable=True),
+    Column('details', JSONB, nullable=False),
+    Index('ix_alert_logs_controlador_fired', 'controlador_id', 'fired_at'),
+    Index('ix_alert_logs_empresa_fired', 'empresa_id', 'fired_at'),
+    Index('ix_alert_logs_open', 'controlador_id', 'rule_id', postgresql_where=text('cleared_at IS NULL'))
+)
+
 def start_mappers():
+    # Idempotent: a preloading server, the app factories and scripts may all call it
+    if mapper_registry.mappers:
+        return
+
     # Map Signal
     signals_mapper = mapper_registry.map_imperatively(
         m.Signal,
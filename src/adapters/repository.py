@@ -53,4 +53,11 @@ class EmpresaRepository:
         return (self.session.query(m.Controlador)
                 .join(m.Empresa)
                 .filter(m.Empresa.id == empresa_id)
-                .all())
\ No newline at end of file
+                .all())
+
+    def get_controller_refs(self, empresa_id: Optional[int] = None) -> List:
+        """Get (id, name, empresa_id) rows for the controllers of an empresa, or of all empresas"""
+        query = self.session.query(m.Controlador.id, m.Controlador.name, m.Controlador.empresa_id)
+        if empresa_id is not None:
+            query = query.filter(m.Controlador.empresa_id == empresa_id)
+        return query.order_by(m.Controlador.id).all()
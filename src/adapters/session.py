@@ -0,0 +1,70 @@
+import logging
+from typing import Callable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class ReadOnlySessionError(RuntimeError):
+    pass
+
+
+class LazySession:
+    """Stands in for a request's Session and only creates it on first use.
+
+    Repositories and queries can be built from it freely; the real Session
+    (and with it a pooled connection) only exists once something touches an
+    attribute such as `query` or `execute`. `close()` on a session that was
+    never used is free.
+
+    Before first use the request can be switched to read-only: the session
+    then comes from `read_only_factory` (AUTOCOMMIT, no autoflush) and
+    refuses to flush.
+    """
+
+    def __init__(self, session_factory: Callable[..., Session], read_only_factory: Optional[Callable[..., Session]] = None):
+        self._factory = session_factory
+        self._read_only_factory = read_only_factory
+        self._session: Optional[Session] = None
+        self.read_only = False
+
+    @property
+    def materialized(self) -> bool:
+        return self._session is not None
+
+    def set_read_only(self) -> bool:
+        """Use a read-only session for this request; False if it is already in use"""
+        if self._session is not None:
+            logger.debug("Session already in use, cannot switch it to read-only")
+            return False
+        if self._read_only_factory is not None:
+            self.read_only = True
+        return self.read_only
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _get(self) -> Session:
+        if self._session is None:
+            if self.read_only:
+                self._session = self._read_only_factory()
+                event.listen(self._session, 'before_flush', _refuse_flush)
+            else:
+                self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __contains__(self, instance) -> bool:
+        return instance in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+
+def _refuse_flush(session, flush_context, instances):
+    raise ReadOnlySessionError("Attempted to write through a read-only session")
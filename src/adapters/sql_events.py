@@ -0,0 +1,71 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StatementRecord:
+    statement: str
+    parameters: Any
+    executemany: bool
+    duration: float
+    rowcount: int
+    connection: Any
+
+
+class StatementEvents:
+    """Times every statement an engine runs and hands it to the subscribers.
+
+    One pair of cursor-execute listeners serves all instrumentation
+    (request metrics, N+1 tracking, slow-query log). Subscribers run on the
+    executing thread, so they must be cheap; a failing one is logged.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._subscribers: List[Callable[[StatementRecord], None]] = []
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def subscribe(self, handler: Callable[[StatementRecord], None]) -> bool:
+        """Add `handler` once; False when it was already subscribed"""
+        if handler in self._subscribers:
+            return False
+        self._subscribers.append(handler)
+        return True
+
+    def unsubscribe(self, handler: Callable[[StatementRecord], None]) -> None:
+        if handler in self._subscribers:
+            self._subscribers.remove(handler)
+
+    def remove(self) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._before)
+        event.remove(self.engine, 'after_cursor_execute', self._after)
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._statement_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_statement_start', None)
+        if start is None or not self._subscribers:
+            return
+        record = StatementRecord(
+            statement=statement,
+            parameters=parameters,
+            executemany=executemany,
+            duration=time.perf_counter() - start,
+            rowcount=cursor.rowcount if cursor is not None else -1,
+            connection=conn
+        )
+        for handler in list(self._subscribers):
+            try:
+                handler(record)
+            except Exception:
+                logger.exception("Statement subscriber failed")
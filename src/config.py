@@ -13,6 +13,17 @@ def get_postgres_uri():
     db_name = os.environ.get("DB_NAME", "iot_dev") 
     return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
 
+def get_db_pool_settings():
+    return {
+        "pool_size": int(os.environ.get('DB_POOL_SIZE', 5)),
+        "max_overflow": int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        "pool_timeout": float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        "pool_recycle": int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        "pool_pre_ping": os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        "statement_timeout_ms": int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000)),
+        "executemany_mode": os.environ.get('DB_EXECUTEMANY_MODE', 'values_plus_batch') or None,
+    }
+
 def get_jwt_secret():
     return JWT_SECRET
 
@@ -26,6 +37,144 @@ def get_token_expiry():
     days = int(os.environ.get('TOKEN_EXPIRY_DAYS', 1))
     return timedelta(days=days)
 
+def get_token_cache_settings():
+    return {
+        "maxsize": int(os.environ.get('TOKEN_CACHE_SIZE', 10000)),
+        "ttl_seconds": float(os.environ.get('TOKEN_CACHE_TTL', 300)),
+    }
+
+def get_password_hash_settings():
+    return {
+        "method": os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        "max_workers": int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        "max_pending": int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32)),
+        "timeout": float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10)),
+    }
+
+def get_analytics_job_settings():
+    return {
+        "max_workers": int(os.environ.get('ANALYTICS_JOB_WORKERS', 2)),
+        "cache_ttl_seconds": int(os.environ.get('ANALYTICS_JOB_CACHE_TTL', 600)),
+        "max_jobs": int(os.environ.get('ANALYTICS_JOB_MAX', 256)),
+        "chunk_days": int(os.environ.get('ANALYTICS_JOB_CHUNK_DAYS', 7)),
+    }
+
+def get_fleet_analytics_settings():
+    return {
+        # Upper bound for ?workers= on /fleet/analytics (and never more than the CPUs)
+        "max_workers": int(os.environ.get('FLEET_ANALYTICS_MAX_WORKERS', 4)),
+    }
+
+def get_arrival_stats_settings():
+    return {
+        "alpha": float(os.environ.get('ARRIVAL_EWMA_ALPHA', 0.2)),
+        "k": float(os.environ.get('ARRIVAL_OFFLINE_K', 4.0)),
+        "min_samples": int(os.environ.get('ARRIVAL_MIN_SAMPLES', 3)),
+        "min_timeout": float(os.environ.get('ARRIVAL_MIN_TIMEOUT', 60)),
+        "max_timeout": float(os.environ.get('ARRIVAL_MAX_TIMEOUT', 86400)),
+    }
+
+def get_stream_settings():
+    return {
+        "coalesce_seconds": float(os.environ.get('STREAM_COALESCE_SECONDS', 0.5)),
+        "heartbeat_seconds": float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15)),
+        "max_pending": int(os.environ.get('STREAM_MAX_PENDING', 256)),
+        "max_clients": int(os.environ.get('STREAM_MAX_CLIENTS', 1000)),
+    }
+
+def get_compression_settings():
+    return {
+        "min_size": int(os.environ.get('COMPRESS_MIN_SIZE', 1024)),
+        "gzip_level": int(os.environ.get('COMPRESS_GZIP_LEVEL', 6)),
+        "brotli_quality": int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4)),
+    }
+
+def get_asgi_settings():
+    return {
+        # Threads for blocking analytics called from async handlers
+        "analytics_threads": int(os.environ.get('ASGI_ANALYTICS_THREADS', 8)),
+    }
+
+def get_server_settings():
+    return {
+        # Set by gunicorn.conf.py: the master imports the app, workers start its threads
+        "preload": os.environ.get('IOT_PRELOAD', '').lower() in ('1', 'true', 'yes'),
+        "bind": os.environ.get('BIND', '0.0.0.0:5000'),
+        # One process: the event bus, liveness, alerts, streams, jobs, data versions,
+        # profiler and rate limiter all keep their state in process (see gunicorn.conf.py)
+        "workers": int(os.environ.get('WEB_WORKERS', 1)),
+        "threads": int(os.environ.get('WEB_THREADS', 16)),
+        "timeout": int(os.environ.get('WEB_TIMEOUT', 60)),
+        "max_requests": int(os.environ.get('WEB_MAX_REQUESTS', 0)),
+    }
+
+def get_metrics_settings():
+    return {
+        "enabled": os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        # Bearer token required by /metrics; without one the endpoint is off unless METRICS_PUBLIC is set
+        "token": os.environ.get('METRICS_TOKEN') or None,
+        "public": os.environ.get('METRICS_PUBLIC', 'false').lower() in ('1', 'true', 'yes'),
+        # `worker` label: stable across restarts, unlike the pid
+        "worker_id": os.environ.get('METRICS_WORKER_ID', '0'),
+    }
+
+def get_query_tracking_settings():
+    return {
+        "enabled": os.environ.get('QUERY_TRACKING_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        # Same statement shape this many times in one request is reported
+        "threshold": int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5)),
+    }
+
+def get_slow_query_settings():
+    return {
+        "enabled": os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        "threshold_seconds": float(os.environ.get('SLOW_QUERY_MS', 500)) / 1000,
+        "max_entries": int(os.environ.get('SLOW_QUERY_MAX_ENTRIES', 100)),
+        # Share of slow SELECTs re-run as EXPLAIN (ANALYZE, BUFFERS); 0 disables plans
+        "explain_sample_rate": float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1)),
+        "explain_interval_seconds": float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300)),
+        "explain_timeout_seconds": float(os.environ.get('SLOW_QUERY_EXPLAIN_TIMEOUT', 30)),
+    }
+
+def get_profiler_settings():
+    return {
+        "enabled": os.environ.get('PROFILER_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        # Upper bounds on one run started from /api/admin/profile
+        "max_seconds": float(os.environ.get('PROFILER_MAX_SECONDS', 300)),
+        "max_requests": int(os.environ.get('PROFILER_MAX_REQUESTS', 1000)),
+        "default_interval_ms": float(os.environ.get('PROFILER_INTERVAL_MS', 10)),
+    }
+
+def get_ingest_rate_limit_settings():
+    return {
+        "enabled": os.environ.get('INGEST_RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        # Per controller; Controlador.config['rate_limit'] overrides both
+        "per_minute": float(os.environ.get('INGEST_RATE_PER_MINUTE', 60)),
+        "burst": float(os.environ.get('INGEST_RATE_BURST', 10)),
+        "idle_seconds": float(os.environ.get('INGEST_RATE_IDLE_SECONDS', 3600)),
+        # Buckets kept at most; the least recently seen is evicted beyond that
+        "max_controllers": int(os.environ.get('INGEST_RATE_MAX_CONTROLLERS', 50000)),
+    }
+
+def get_data_version_settings():
+    return {
+        "ttl_seconds": float(os.environ.get('DATA_VERSION_TTL_SECONDS', 2)),
+        "max_entries": int(os.environ.get('DATA_VERSION_MAX_ENTRIES', 10000)),
+    }
+
+def get_alert_settings():
+    return {
+        "default_cooldown": float(os.environ.get('ALERT_DEFAULT_COOLDOWN', 300)),
+        "recompile_seconds": float(os.environ.get('ALERT_RECOMPILE_SECONDS', 60)),
+    }
+
+def get_alert_log_settings():
+    return {
+        "batch_size": int(os.environ.get('ALERT_LOG_BATCH_SIZE', 500)),
+        "flush_seconds": float(os.environ.get('ALERT_LOG_FLUSH_SECONDS', 1.0)),
+        "max_queue": int(os.environ.get('ALERT_LOG_MAX_QUEUE', 10000)),
+    }
+
 class Config:
     SECRET_KEY = get_app_secret()
     JWT_SECRET_KEY = get_jwt_secret()
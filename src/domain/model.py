@@ -1,9 +1,10 @@
 from __future__ import annotations
-from typing import Optional, List, Dict, Any, Set
+from typing import Optional, List, Dict, Any, Set, FrozenSet, Iterable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import uuid
 from enum import Enum
+from functools import lru_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
@@ -23,6 +24,19 @@ class InvalidEmail(Exception):
     pass
 
 
+SENSOR_COUNT = 6
+# A signal keeps its controller connected/up for this long
+CONNECTION_WINDOW_SECONDS = 300
+
+def sensor_mask(values: Dict[str, Any]) -> int:
+    """Pack sensor1..sensor6 values into an int bitmask (bit 0 is sensor1)"""
+    mask = 0
+    for i in range(SENSOR_COUNT):
+        if values.get(f"sensor{i+1}"):
+            mask |= 1 << i
+    return mask
+
+
 @dataclass
 class Signal:
     tstamp: datetime = None
@@ -97,35 +111,31 @@ class Role(Enum):
     EMPRESA_USER = "empresa_user"
 
 class User:
-    def __init__(self, first_name: str, last_name: str, email: str, password: str, role: Role):
+    def __init__(
+        self,
+        first_name: str,
+        last_name: str,
+        email: str,
+        password: Optional[str],
+        role: Role,
+        password_hash: Optional[str] = None
+    ):
         self.first_name = first_name
         self.last_name = last_name
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        # Services pass a hash computed off the request thread (see PasswordHasher)
+        self.password_hash = password_hash or generate_password_hash(password)
         self.role = role
         self._empresa = None
         self._set_permissions()
 
     def _set_permissions(self):
         """Set permissions based on role"""
-        self.permissions = set()
-        if self.role == Role.ADMIN:
-            self.permissions.update([
-                'manage_users',
-                'manage_empresa',
-                'view_empresas',
-                'manage_controller',
-                'view_signals',
-                'create_signals',
-                'view_dashboard'
-            ])
-        elif self.role == Role.EMPRESA_USER:
-            self.permissions.update([
-                'view_empresas',
-                'view_signals',
-                'create_signals',
-                'view_dashboard'
-            ])
+        self.permissions = set(mask_to_permissions(ROLE_MASKS.get(self.role, 0)))
+
+    @property
+    def permission_mask(self) -> int:
+        return permissions_to_mask(self.permissions or ())
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
@@ -198,15 +208,46 @@ class IncomingSignalDTO:
         )
 
 class Permission(Enum):
+    # A permission's bit is its position in this enum and travels in tokens: only append
     VIEW_DASHBOARD = 'view_dashboard'
     VIEW_SIGNALS = 'view_signals'
     MANAGE_EMPRESA = 'manage_empresa'
     MANAGE_USERS = 'manage_users'
+    VIEW_EMPRESAS = 'view_empresas'
+    MANAGE_CONTROLLER = 'manage_controller'
+    CREATE_SIGNALS = 'create_signals'
+
+PERMISSION_BITS: Dict[str, int] = {p.value: 1 << i for i, p in enumerate(Permission)}
+# Required for names outside the registry, and never granted
+UNKNOWN_PERMISSION_BIT = 1 << 62
+
+def permissions_to_mask(names: Iterable[str]) -> int:
+    """Bitmask of granted permission names (unknown or legacy names grant nothing)"""
+    mask = 0
+    for name in names:
+        mask |= PERMISSION_BITS.get(name, 0)
+    return mask
+
+def required_mask(names: Iterable[str]) -> int:
+    """Bitmask a principal must hold; an unknown name requires a bit nobody holds"""
+    mask = 0
+    for name in names:
+        mask |= PERMISSION_BITS.get(name, UNKNOWN_PERMISSION_BIT)
+    return mask
+
+@lru_cache(maxsize=256)
+def mask_to_permissions(mask: int) -> FrozenSet[str]:
+    """Permission names set in a bitmask"""
+    return frozenset(name for name, bit in PERMISSION_BITS.items() if mask & bit)
 
 ROLE_PERMISSIONS = {
     Role.ADMIN: [p.value for p in Permission],
     Role.EMPRESA_USER: [
-        Permission.VIEW_DASHBOARD.value,
-        Permission.VIEW_SIGNALS.value
+        Permission.VIEW_EMPRESAS.value,
+        Permission.VIEW_SIGNALS.value,
+        Permission.CREATE_SIGNALS.value,
+        Permission.VIEW_DASHBOARD.value
     ]
-}
\ No newline at end of file
+}
+
+ROLE_MASKS: Dict[Role, int] = {role: permissions_to_mask(names) for role, names in ROLE_PERMISSIONS.items()}
\ No newline at end of file
@@ -0,0 +1,300 @@
+"""ASGI entry point.
+
+The device ingestion endpoint and the heavy read endpoints run natively on
+asyncio with async SQLAlchemy sessions, so idle devices and open dashboard
+streams cost a coroutine each instead of a worker thread. Every other route
+is served by the Flask app, mounted as WSGI, and both share the same
+background services (event bus, alert engine, stream broker, ...).
+
+    uvicorn src.entrypoints.asgi_app:app --workers 1
+
+Run one worker, as with gunicorn (WEB_WORKERS=1): the event bus, stream
+broker, alert engine, ETag versions and metrics live in the process, so
+with several workers streams miss other workers' events and validators go
+stale. Scale with one single-worker server per host port instead.
+
+The native routes below skip two things the Flask copies do: no
+ETag/Last-Modified (conditional_get) on the dashboard and timeline, and
+gzip only (GZipMiddleware), no brotli. Every route mounted from Flask
+keeps both.
+
+Needs the optional `asgi` extra (starlette, uvicorn, asyncpg, a2wsgi).
+"""
+import asyncio
+import contextlib
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from src.adapters.async_engine import create_async_db_engine, create_async_session_factory
+from src.adapters.orm import start_mappers
+from src.adapters.repository import EmpresaRepository
+from src.config import get_asgi_settings, get_compression_settings, get_cors_origins
+from src.domain.model import required_mask
+from src.entrypoints import flask_app
+from src.entrypoints.formats import COLUMNAR_MIMETYPE, prefers_columnar
+from src.entrypoints.routes.signals import device_signal_data
+from src.queries.queries import SignalQueries
+from src.services.auth import UserPermissions
+from src.services.columnar import signal_rows_to_columns, signal_rows_to_dicts
+from src.services.controller_analytics_service import ControllerAnalyticsService
+from src.services.controller_monitoring_service import ControllerMonitoringService
+from src.services.signal_service import SignalService
+
+extensions = flask_app.app.extensions
+
+async_engine = create_async_db_engine()
+get_async_session = create_async_session_factory(async_engine)
+get_async_read_only_session = create_async_session_factory(async_engine, read_only=True)
+
+# Blocking work (numpy analytics, serializing large bodies) never runs on the event loop
+blocking_executor = ThreadPoolExecutor(
+    max_workers=get_asgi_settings()['analytics_threads'],
+    thread_name_prefix='asgi-blocking'
+)
+
+
+async def run_blocking(fn: Callable, *args) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, fn, *args)
+
+
+def _principal(request: Request, permissions: List[str], stream_empresa: Optional[int] = None) -> UserPermissions:
+    """Same checks as require_permissions, from the token claims alone.
+
+    With `stream_empresa`, a stream ticket for that empresa in ?ticket= is
+    accepted instead of the Authorization header.
+    """
+    header = request.headers.get('Authorization')
+    ticket = request.query_params.get('ticket') if stream_empresa is not None else None
+    if header:
+        payload = flask_app.auth_service.verify_token(header.split(' ')[-1])
+    elif ticket:
+        payload = flask_app.auth_service.verify_stream_ticket(ticket, stream_empresa)
+    else:
+        raise HTTPException(401, "No token provided")
+    if not payload:
+        raise HTTPException(401, "Invalid token")
+    principal = UserPermissions.from_claims(payload)
+    if not principal.has_mask(required_mask(permissions)):
+        raise HTTPException(403, "Insufficient permissions")
+    return principal
+
+
+def _wants_columnar(request: Request) -> bool:
+    accept = parse_accept_header(request.headers.get('Accept'), MIMEAccept)
+    return prefers_columnar(request.query_params.get('format'), accept)
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, separators=(',', ':'), default=str).encode()
+
+
+async def _json(data, columnar: bool = False, status: int = 200) -> Response:
+    # Multi-megabyte bodies would stall every other connection on the loop
+    body = await run_blocking(_dumps, data)
+    response = Response(body, status, media_type=COLUMNAR_MIMETYPE if columnar else 'application/json')
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def _error(message: str, status: int) -> JSONResponse:
+    return JSONResponse({"error": message}, status)
+
+
+def _date_param(request: Request, name: str) -> datetime:
+    try:
+        return datetime.fromisoformat(request.query_params[name])
+    except (KeyError, ValueError):
+        raise HTTPException(400, f"Missing or invalid parameter: {name}")
+
+
+async def receive_signal(request: Request) -> Response:
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data or 'controlador_id' not in data or 'sensor_states' not in data:
+        return _error("Missing required fields", 400)
+
+    limiter = extensions.get('ingest_limiter')
+    retry_after = limiter.acquire(str(data['controlador_id'])) if limiter is not None else 0
+    if retry_after > 0:
+        seconds = max(1, math.ceil(retry_after))
+        return JSONResponse({"error": "Too many readings", "retry_after": seconds}, 429,
+                            headers={'Retry-After': str(seconds)})
+
+    def process(session):
+        service = SignalService(
+            empresa_repo=EmpresaRepository(session),
+            session=session,
+            arrival_stats=extensions['arrival_stats'],
+            event_bus=extensions['event_bus']
+        )
+        return service.process_incoming_signal(device_signal_data(data))
+
+    # run_sync: the sync service code runs unchanged, its I/O awaits on the loop
+    async with get_async_session() as session:
+        try:
+            result = await session.run_sync(process)
+        except ValueError as e:
+            return _error(str(e), 400)
+    return JSONResponse(result, 201)
+
+
+async def get_signals(request: Request) -> Response:
+    principal = _principal(request, ['view_signals'])
+    controlador_id = request.path_params['controlador_id']
+    start_time = _date_param(request, 'start_time')
+    end_time = _date_param(request, 'end_time')
+
+    def load(session):
+        controller = EmpresaRepository(session).get_controlador(controlador_id)
+        if not controller:
+            return None
+        if not principal.can_access_empresa(controller.empresa_id):
+            return False
+        return controller.phone_number, SignalQueries(session).get_signal_rows(controlador_id, start_time, end_time)
+
+    async with get_async_read_only_session() as session:
+        found = await session.run_sync(load)
+    if found is None:
+        return _error(f"Controller not found: {controlador_id}", 404)
+    if found is False:
+        return _error("Unauthorized access to empresa", 403)
+
+    phone_number, rows = found
+    if _wants_columnar(request):
+        return await _json({"phone_number": phone_number, "signals": signal_rows_to_columns(rows)}, True)
+    return await _json(signal_rows_to_dicts(rows, phone_number))
+
+
+async def get_empresa_dashboard(request: Request) -> Response:
+    principal = _principal(request, ['view_dashboard'])
+    empresa_id = request.path_params['empresa_id']
+    columnar = _wants_columnar(request)
+
+    def load(session):
+        service = ControllerMonitoringService(
+            empresa_repo=EmpresaRepository(session),
+            signal_queries=SignalQueries(session)
+        )
+        return service.get_empresa_dashboard(empresa_id, principal.permissions, columnar=columnar)
+
+    async with get_async_read_only_session() as session:
+        data = await session.run_sync(load)
+    return await _json(data, columnar)
+
+
+async def stream_empresa_dashboard(request: Request) -> Response:
+    empresa_id = request.path_params['empresa_id']
+    principal = _principal(request, ['view_dashboard'], stream_empresa=empresa_id)
+    if not principal.can_access_empresa(empresa_id):
+        return _error("Unauthorized access to empresa", 403)
+
+    async with get_async_read_only_session() as session:
+        refs = await session.run_sync(lambda s: EmpresaRepository(s).get_controller_refs(empresa_id))
+    broker = extensions['dashboard_stream']
+    client = broker.register([ref.id for ref in refs], asynchronous=True, empresa_id=empresa_id)
+    if client is None:
+        return _error("Too many open streams", 503)
+
+    return StreamingResponse(
+        broker.astream(client),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        # Also runs when the browser goes away mid-stream; unregister is idempotent
+        background=BackgroundTask(broker.unregister, client)
+    )
+
+
+async def get_controller_timeline(request: Request) -> Response:
+    _principal(request, [])
+    controlador_id = request.path_params['controlador_id']
+    start_date = _date_param(request, 'start_date')
+    end_date = _date_param(request, 'end_date')
+    try:
+        max_points = int(request.query_params['points']) if 'points' in request.query_params else None
+    except ValueError:
+        raise HTTPException(400, "Missing or invalid parameter: points")
+    columnar = _wants_columnar(request)
+
+    def compute():
+        # numpy work: a sync session on an executor thread
+        session = flask_app.get_read_only_session()
+        try:
+            service = ControllerAnalyticsService(
+                empresa_repo=EmpresaRepository(session),
+                signal_queries=SignalQueries(session)
+            )
+            return _dumps(service.get_timeline_data(
+                controlador_id, start_date, end_date, max_points=max_points, columnar=columnar
+            ))
+        finally:
+            session.close()
+
+    body = await run_blocking(compute)
+    response = Response(body, media_type=COLUMNAR_MIMETYPE if columnar else 'application/json')
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+async def http_error(request: Request, exc: HTTPException) -> Response:
+    return _error(exc.detail, exc.status_code)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    start_mappers()
+    await run_blocking(flask_app.start_worker)
+    yield
+    await async_engine.dispose()
+    blocking_executor.shutdown(wait=False)
+
+
+cors_middleware = [
+    Middleware(
+        CORSMiddleware,
+        allow_origins=get_cors_origins(),
+        allow_credentials=True,
+        allow_methods=['GET', 'POST', 'OPTIONS'],
+        allow_headers=['Authorization', 'Content-Type']
+    ),
+]
+api_middleware = cors_middleware + [
+    Middleware(GZipMiddleware, minimum_size=get_compression_settings()['min_size']),
+]
+
+routes = [
+    Route('/api/signals/input', receive_signal, methods=['POST'], middleware=api_middleware),
+    Route('/api/signals/{controlador_id:int}', get_signals, methods=['GET'], middleware=api_middleware),
+    Route('/api/dashboard/empresa/{empresa_id:int}/dashboard', get_empresa_dashboard,
+          methods=['GET'], middleware=api_middleware),
+    # No gzip: it buffers small writes, so events would sit in the compressor
+    Route('/api/dashboard/empresa/{empresa_id:int}/stream', stream_empresa_dashboard,
+          methods=['GET'], middleware=cors_middleware),
+    Route('/api/controladores/{controlador_id:int}/timeline', get_controller_timeline,
+          methods=['GET'], middleware=api_middleware),
+    # Everything else (and other methods on the paths above) stays on Flask
+    Mount('/', WSGIMiddleware(flask_app.app)),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, exception_handlers={HTTPException: http_error})
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5000)
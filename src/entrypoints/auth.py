@@ -3,16 +3,34 @@ from flask import request, jsonify, g, Blueprint, current_app
 from typing import List, Optional, Dict
 from src.config import get_jwt_secret
 from src.services.auth_service import AuthService
+from src.services.auth import UserPermissions
 import jwt
+import logging
 from src.services.empresa_service import EmpresaService
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
-from src.domain.model import Role
+from src.domain.model import Role, User, permissions_to_mask, required_mask
+
+logger = logging.getLogger(__name__)
 
 PUBLIC_ENDPOINTS = [
     '/api/signals/input'  # Allow controller signals without auth
 ]
 
+# EventSource cannot send headers: these endpoints take a stream ticket in ?ticket=
+# (see AuthService.issue_stream_ticket), never the session token
+STREAM_TICKET_ENDPOINTS = {
+    'dashboard.stream_empresa_dashboard'
+}
+
+def get_request_token() -> Optional[str]:
+    """Bearer token from the Authorization header"""
+    auth_header = request.headers.get('Authorization')
+    if auth_header:
+        parts = auth_header.split(' ')
+        return parts[1] if len(parts) > 1 else auth_header
+    return None
+
 def require_token():
     def decorator(f):
         @wraps(f)
@@ -40,42 +58,59 @@ def require_token():
         return decorated_function
     return decorator
 
+def authenticate_token(token: str, auth_service: Optional[AuthService] = None) -> Optional[UserPermissions]:
+    """Verify a token and build the request principal from its claims (no DB query)"""
+    auth_service = auth_service or AuthService(request.environ.get('session'))
+    payload = auth_service.verify_token(token)
+    if not payload:
+        return None
+
+    # The request's session is looked up when (and if) a handler needs the rows
+    return UserPermissions.from_claims(
+        payload,
+        user_loader=lambda: request.environ['session'].get(User, payload['user_id']),
+        empresa_loader=lambda empresa_id: EmpresaRepository(request.environ['session']).get(empresa_id)
+    )
+
+def authenticate_stream_ticket(auth_service: Optional[AuthService] = None) -> Optional[UserPermissions]:
+    """Principal from the ?ticket= of a stream request, if it was issued for this empresa"""
+    ticket = request.args.get('ticket')
+    empresa_id = (request.view_args or {}).get('empresa_id')
+    if not ticket or empresa_id is None:
+        return None
+    auth_service = auth_service or AuthService(request.environ.get('session'))
+    payload = auth_service.verify_stream_ticket(ticket, empresa_id)
+    return UserPermissions.from_claims(payload) if payload else None
+
 def require_permissions(permissions):
+    # Resolved once here; each request then costs a single AND
+    required = required_mask(permissions)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             try:
-                # Get token from header
-                auth_header = request.headers.get('Authorization')
-                if not auth_header:
-                    return jsonify({"error": "No token provided"}), 401
-                
-                # Extract token from "Bearer <token>"
-                token = auth_header.split(' ')[1] if len(auth_header.split(' ')) > 1 else auth_header
-                
-                # Verify token
-                session = request.environ['session']
-                auth_service = AuthService(session)
-                payload = auth_service.verify_token(token)
-                
-                if not payload:
-                    return jsonify({"error": "Invalid token"}), 401
-                
+                # The middleware normally authenticated the request already
+                principal = g.get('current_user')
+                if principal is None:
+                    token = get_request_token()
+                    if not token:
+                        return jsonify({"error": "No token provided"}), 401
+                    principal = authenticate_token(token)
+                    if principal is None:
+                        return jsonify({"error": "Invalid token"}), 401
+                    g.current_user = principal
+
                 # Check if user has required permissions
-                user_permissions = set(payload.get('permissions', []))
-                if not all(p in user_permissions for p in permissions):
+                mask = getattr(principal, 'permission_mask', None)
+                if not isinstance(mask, int):
+                    mask = permissions_to_mask(principal.permissions)
+                if mask & required != required:
                     return jsonify({"error": "Insufficient permissions"}), 403
-                
-                # Store user info in flask.g
-                g.current_user = auth_service.get_user_by_email(payload['email'])
-                
+
                 return f(*args, **kwargs)
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "Token has expired"}), 401
-            except jwt.InvalidTokenError:
-                return jsonify({"error": "Invalid token"}), 401
             except Exception as e:
-                print(f"Auth error: {str(e)}")
+                logger.exception("Auth error")
                 return jsonify({"error": str(e)}), 500
         return decorated_function
     return decorator
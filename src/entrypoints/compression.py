@@ -0,0 +1,154 @@
+import zlib
+from typing import Iterable, Iterator, List, Optional, Sequence
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'application/vnd.iot.columnar+json',
+    'text/csv',
+    'text/plain',
+    'text/html',
+)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class ResponseCompressor:
+    """Compress responses with brotli or gzip, as negotiated by Accept-Encoding.
+
+    Buffered responses under `min_size` bytes are left alone. Streamed
+    responses are compressed chunk by chunk and flushed after every chunk,
+    so the client keeps receiving data as it is produced and the body is
+    never held in memory; only the first `min_size` bytes are read ahead to
+    decide whether compressing is worth it.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        mimetypes: Sequence[str] = DEFAULT_MIMETYPES
+    ):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+
+    def init_app(self, app) -> None:
+        app.after_request(self.after_request)
+        app.extensions['compression'] = self
+
+    def negotiate(self) -> Optional[str]:
+        accept = request.accept_encodings
+        if brotli is not None and accept['br'] and accept['br'] >= accept['gzip']:
+            return 'br'
+        if accept['gzip']:
+            return 'gzip'
+        return None
+
+    def after_request(self, response):
+        if response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers or response.direct_passthrough):
+            return response
+
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            self._compress_stream(response, encoding)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            stream = self._stream(encoding)
+            response.set_data(stream.compress(data) + stream.finish())
+            self._mark(response, encoding)
+        return response
+
+    def _stream(self, encoding: str):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def _compress_stream(self, response, encoding: str) -> None:
+        body = response.response
+        chunks = iter(response.iter_encoded())
+        head: List[bytes] = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= self.min_size:
+                break
+        else:
+            # Short stream: it has been read completely, send it as is
+            response.set_data(b''.join(head))
+            _close(body)
+            return
+
+        response.response = self._compressed(self._stream(encoding), head, chunks, body)
+        response.headers.pop('Content-Length', None)
+        self._mark(response, encoding)
+
+    @staticmethod
+    def _compressed(stream, head: List[bytes], rest: Iterator[bytes], body: Iterable) -> Iterator[bytes]:
+        try:
+            data = stream.compress(b''.join(head))
+            yield data + stream.flush()
+            for chunk in rest:
+                data = stream.compress(chunk) + stream.flush()
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            _close(body)
+
+    @staticmethod
+    def _mark(response, encoding: str) -> None:
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation: keep strong ETags apart
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+
+def _close(body) -> None:
+    close = getattr(body, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,99 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Optional
+from flask import current_app, g, make_response, request
+
+
+def conditional_get(kind: str, arg: str, time_bucket_seconds: Optional[int] = None):
+    """Answer GETs with ETag/Last-Modified from DataVersions, and 304 when unchanged.
+
+    `kind` is 'controller' or 'empresa' and `arg` the view argument holding
+    its id. The ETag also covers the URL (query string included), the
+    caller (user, empresa and permission mask) and the Accept header, so
+    different principals or encodings never share a validator. Responses that
+    depend on the clock (online/offline, "last N hours") pass
+    `time_bucket_seconds`: their ETag changes once per bucket and they carry
+    no Last-Modified.
+
+    A matching If-None-Match is answered before the view runs, so it costs
+    the version lookup only. The view's own empresa checks have not run at
+    that point, but the ETag is per caller: it can only match one this same
+    caller got in a 200 from the view. If-Modified-Since names no caller, so
+    it is answered after the view, and only when the view returned 200.
+    Goes below require_permissions.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            versions = current_app.extensions.get('data_versions')
+            if request.method != 'GET' or versions is None:
+                return f(*args, **kwargs)
+            try:
+                key_id = int(kwargs[arg])
+            except (KeyError, TypeError, ValueError):
+                return f(*args, **kwargs)
+
+            stamp, last_modified = versions.get(kind, key_id)
+            principal = g.get('current_user')
+            parts = [
+                request.full_path,
+                stamp,
+                str(getattr(principal, 'user_id', '')),
+                str(getattr(principal, 'empresa_id', '')),
+                str(getattr(principal, 'permission_mask', '')),
+                request.headers.get('Accept', ''),
+            ]
+            if time_bucket_seconds:
+                parts.append(str(int(time.time() // time_bucket_seconds)))
+                last_modified = None
+            etag = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+            # Weak comparison: compressed responses carry W/ ETags
+            if request.if_none_match and request.if_none_match.contains_weak(etag):
+                return _not_modified(etag)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if _unmodified_since(last_modified):
+                return _not_modified(etag)
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            _set_cache_headers(response)
+            return response
+        return decorated_function
+    return decorator
+
+
+def _not_modified(etag: str):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    _set_cache_headers(response)
+    return response
+
+
+def _unmodified_since(last_modified) -> bool:
+    # If-None-Match takes precedence: If-Modified-Since only counts without it
+    if request.if_none_match or last_modified is None or request.if_modified_since is None:
+        return False
+    return last_modified <= request.if_modified_since
+
+
+def _set_cache_headers(response) -> None:
+    # Per-user data: browsers may keep it, but must revalidate every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+
+
+def data_changed(controller_id=None, empresa_id=None) -> None:
+    """Call after a write so validators handed out by this process change at once"""
+    versions = current_app.extensions.get('data_versions')
+    if versions is None:
+        return
+    if controller_id is not None:
+        versions.bump_controller(int(controller_id))
+    if empresa_id is not None:
+        versions.bump('empresa', int(empresa_id))
@@ -1,11 +1,23 @@
 from flask import Flask, request
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 from ..config import (
     get_postgres_uri, 
     get_jwt_secret, 
     get_app_secret,
-    get_cors_origins
+    get_cors_origins,
+    get_analytics_job_settings,
+    get_arrival_stats_settings,
+    get_stream_settings,
+    get_alert_settings,
+    get_alert_log_settings,
+    get_data_version_settings,
+    get_compression_settings,
+    get_server_settings,
+    get_metrics_settings,
+    get_query_tracking_settings,
+    get_slow_query_settings,
+    get_profiler_settings,
+    get_ingest_rate_limit_settings
 )
 from .routes.signals import signals_bp
 from .routes.users import users_bp
@@ -13,8 +25,29 @@ from .routes.empresas import empresas_bp
 from .routes.dashboard import dashboard_bp
 from .routes.controladores import controladores_bp
 from .routes.auth import auth_bp
+from .routes.alerts import alerts_bp
+from .routes.admin import admin_bp
+from .routes.health import health_bp
+from .routes.metrics import metrics_bp
+from ..adapters.engine import create_db_engine
+from ..adapters.sql_events import StatementEvents
+from ..adapters.session import LazySession
 from ..services.auth_service import AuthService
+from ..services.analytics_jobs import AnalyticsJobManager
+from ..services.arrival_stats import ArrivalStats
+from ..services.event_bus import EventBus, ControllerEvent
+from ..services.liveness_tracker import LivenessTracker
+from ..services.dashboard_stream import DashboardStreamBroker
+from ..services.alert_service import AlertEngine
+from ..services.alert_log_writer import AlertLogWriter
+from ..services.data_versions import DataVersions
+from ..services.slow_queries import SlowQueryLog
+from ..services.profiler import Profiler
+from ..services.rate_limiter import IngestRateLimiter
 from .middleware import setup_middleware
+from .compression import ResponseCompressor
+from .warmup import Readiness, warm_up, track_first_request
+from .instrumentation import setup_request_metrics, setup_query_tracking, setup_profiler
 from flask_cors import CORS
 from src.bootstrap import create_initial_data
 
@@ -24,15 +57,84 @@ app.secret_key = get_app_secret()
 CORS(app)
 
 # Database setup
-engine = create_engine(get_postgres_uri())
+engine = create_db_engine(get_postgres_uri())
 get_session = sessionmaker(bind=engine)
+# Read-only handlers: every statement autocommits, nothing is flushed
+get_read_only_session = sessionmaker(bind=engine.execution_options(isolation_level='AUTOCOMMIT'), autoflush=False)
+app.extensions['db_engine'] = engine
 
-# Setup auth service with session
-auth_service = AuthService(get_session(), get_jwt_secret())
+# Statement timing shared by the instrumentation below
+statement_events = StatementEvents(engine)
+app.extensions['statement_events'] = statement_events
+
+# Per-endpoint latency/SQL/JSON histograms, exported on /metrics (before auth: 401s count too)
+if get_metrics_settings()['enabled']:
+    setup_request_metrics(app, statement_events)
+
+# Statement shapes repeated within a request (N+1 loops) are logged with the endpoint
+query_tracking = get_query_tracking_settings()
+if query_tracking['enabled']:
+    setup_query_tracking(app, statement_events, query_tracking['threshold'])
+
+# Statements over the latency threshold, with sampled EXPLAIN plans, for /api/admin/slow-queries
+slow_query_settings = get_slow_query_settings()
+slow_query_log = None
+if slow_query_settings.pop('enabled'):
+    slow_query_log = SlowQueryLog(engine, **slow_query_settings)
+    statement_events.subscribe(slow_query_log.on_statement)
+    app.extensions['slow_query_log'] = slow_query_log
+
+# Stack sampler / cProfile / tracemalloc runs on live traffic, started from /api/admin/profile
+profiler_settings = get_profiler_settings()
+if profiler_settings.pop('enabled'):
+    setup_profiler(app, Profiler(**profiler_settings))
+
+# Token verification only (no session): the middleware's auth service never queries
+auth_service = AuthService(None, get_jwt_secret())
 
 # Setup middleware
 setup_middleware(app, auth_service)
 
+# gzip/brotli for large JSON bodies, streamed ones included
+ResponseCompressor(**get_compression_settings()).init_app(app)
+
+# Background analytics jobs for long date ranges
+app.extensions['analytics_jobs'] = AnalyticsJobManager(get_session, **get_analytics_job_settings())
+
+# Learned per-controller reporting rhythm for online/offline decisions
+app.extensions['arrival_stats'] = ArrivalStats(**get_arrival_stats_settings())
+
+# Controller events (signals, offline/online, alerts) and the deadline tracker feeding them
+event_bus = EventBus()
+liveness_tracker = LivenessTracker(app.extensions['arrival_stats'], event_bus)
+event_bus.subscribe(liveness_tracker.on_event, kinds=[ControllerEvent.SIGNAL])
+app.extensions['event_bus'] = event_bus
+app.extensions['liveness_tracker'] = liveness_tracker
+
+# Alert rules from Controlador.config, evaluated inline on every reading
+alert_engine = AlertEngine(event_bus, **get_alert_settings())
+app.extensions['alert_engine'] = alert_engine
+
+# Alert history is persisted in batches by a background writer, never on the ingest path
+alert_log_writer = AlertLogWriter(get_session, **get_alert_log_settings())
+event_bus.subscribe(alert_log_writer.on_event, kinds=[ControllerEvent.ALERT])
+app.extensions['alert_log_writer'] = alert_log_writer
+
+# Live dashboard streams (SSE) fed from the event bus
+app.extensions['dashboard_stream'] = DashboardStreamBroker(event_bus, **get_stream_settings())
+
+# Version stamps behind ETag/Last-Modified on the read endpoints
+data_versions = DataVersions(get_session, **get_data_version_settings())
+event_bus.subscribe(data_versions.on_event, kinds=[ControllerEvent.SIGNAL])
+app.extensions['data_versions'] = data_versions
+
+# Per-controller token buckets on signal ingestion; overrides come with each accepted reading
+ingest_limits = get_ingest_rate_limit_settings()
+if ingest_limits.pop('enabled'):
+    ingest_limiter = IngestRateLimiter(**ingest_limits)
+    event_bus.subscribe(ingest_limiter.on_event, kinds=[ControllerEvent.SIGNAL])
+    app.extensions['ingest_limiter'] = ingest_limiter
+
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(empresas_bp, url_prefix='/api/empresas')
@@ -40,12 +142,41 @@ app.register_blueprint(users_bp, url_prefix='/api/users')
 app.register_blueprint(signals_bp, url_prefix='/api/signals')
 app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
 app.register_blueprint(controladores_bp, url_prefix='/api/controladores')
+app.register_blueprint(alerts_bp, url_prefix='/api')
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+app.register_blueprint(health_bp, url_prefix='/health')
+app.register_blueprint(metrics_bp)
+
+# Warm-up state behind /health/ready, and startup/first-request timings
+app.extensions['readiness'] = Readiness()
+track_first_request(app)
+
+def start_background_services(rebuild_liveness: bool = True) -> None:
+    """Start this process's service threads (idempotent)"""
+    liveness_tracker.start(get_session if rebuild_liveness else None)
+    alert_engine.start()
+    alert_log_writer.start()
+    if slow_query_log is not None:
+        slow_query_log.start()
+
+def start_worker() -> None:
+    """Per-process start-up: warm up, then start the service threads.
+
+    With a preloading server this runs in every worker after the fork, since
+    threads started in the master would not survive it.
+    """
+    warmed = warm_up(app, get_session)
+    # A successful warm-up already loaded the liveness state
+    start_background_services(rebuild_liveness=not warmed)
+
+if not get_server_settings()['preload']:
+    start_background_services()
 
 # Middleware to inject database session
 @app.before_request
 def inject_session():
-    session = get_session()
-    request.environ['session'] = session
+    # Created on first use: preflights and rejected requests never check out a connection
+    request.environ['session'] = LazySession(get_session, get_read_only_session)
 
 @app.teardown_request
 def remove_session(exception=None):
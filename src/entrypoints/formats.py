@@ -0,0 +1,57 @@
+from typing import Iterable, Optional
+from flask import Response, current_app, jsonify, request, stream_with_context
+from werkzeug.datastructures import MIMEAccept
+
+# Opt-in column-per-field encoding of signal lists (see services/columnar.py)
+COLUMNAR_MIMETYPE = 'application/vnd.iot.columnar+json'
+
+
+def wants_columnar() -> bool:
+    """?format=columnar, or an Accept header preferring the columnar media type"""
+    return prefers_columnar(request.args.get('format'), request.accept_mimetypes)
+
+
+def prefers_columnar(format_arg: Optional[str], accept: MIMEAccept) -> bool:
+    """wants_columnar outside a Flask request (see asgi_app)"""
+    if format_arg == 'columnar':
+        return True
+    return accept.best_match(['application/json', COLUMNAR_MIMETYPE]) == COLUMNAR_MIMETYPE
+
+
+def format_response(data, columnar: bool):
+    """jsonify, labelled with the columnar media type when that encoding was used"""
+    response = jsonify(data)
+    if columnar:
+        response.mimetype = COLUMNAR_MIMETYPE
+    response.vary.add('Accept')
+    return response
+
+
+def stream_json_array(items: Iterable, chunk_size: int = 500) -> Response:
+    """A JSON array response serialized `chunk_size` items at a time.
+
+    Same document as jsonify(list(items)) but never holds all of it in
+    memory, and lets the compression layer start sending before the end.
+    """
+    json = current_app.json
+
+    def dumps(item):
+        return json.dumps(item, separators=(',', ':'))
+
+    def generate():
+        yield '['
+        batch = []
+        first = True
+        for item in items:
+            batch.append(dumps(item))
+            if len(batch) >= chunk_size:
+                yield ('' if first else ',') + ','.join(batch)
+                first = False
+                batch = []
+        if batch:
+            yield ('' if first else ',') + ','.join(batch)
+        yield ']\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    response.vary.add('Accept')
+    return response
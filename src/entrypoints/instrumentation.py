@@ -0,0 +1,91 @@
+import time
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from src.adapters.sql_events import StatementEvents
+from src.services.request_metrics import RequestMetrics, RequestSample, current_sample
+from src.services.query_patterns import QueryPatternTracker
+from src.services.profiler import Profiler
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Charges JSON encoding (jsonify, streamed arrays) to the running request"""
+
+    def dumps(self, obj, **kwargs):
+        sample = current_sample.get()
+        if sample is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            sample.serialize_seconds += time.perf_counter() - start
+
+
+def setup_request_metrics(app, statement_events: StatementEvents) -> RequestMetrics:
+    """Record per-endpoint latency, SQL statements, DB time, rows and JSON time.
+
+    Register before the auth middleware so rejected requests are counted
+    too. Whatever is left of the latency once DB and JSON time are taken
+    out is view code: ORM hydration, to_dict and the like.
+    """
+    metrics = RequestMetrics()
+    statement_events.subscribe(metrics.on_statement)
+    app.json = TimedJSONProvider(app)
+    app.extensions['request_metrics'] = metrics
+
+    @app.before_request
+    def _start_request_sample():
+        current_sample.set(RequestSample(time.perf_counter()))
+
+    @app.after_request
+    def _record_status(response):
+        g._response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_sample(exception=None):
+        # Runs after the last chunk for streamed responses
+        sample = current_sample.get()
+        if sample is None:
+            return
+        current_sample.set(None)
+        status = g.get('_response_status', 500 if exception is not None else 200)
+        metrics.observe(request.endpoint or 'unmatched', status, sample, time.perf_counter())
+
+    return metrics
+
+
+def setup_query_tracking(app, statement_events: StatementEvents, threshold: int) -> QueryPatternTracker:
+    """Log statement shapes repeated `threshold`+ times in one request (N+1 loops)"""
+    tracker = QueryPatternTracker(threshold)
+    statement_events.subscribe(tracker.on_statement)
+    app.extensions['query_tracker'] = tracker
+
+    @app.before_request
+    def _start_query_log():
+        tracker.start()
+
+    @app.teardown_request
+    def _finish_query_log(exception=None):
+        tracker.finish(request.endpoint or 'unmatched')
+
+    return tracker
+
+
+def setup_profiler(app, profiler: Profiler) -> Profiler:
+    """Attach the on-demand profiler (driven from /api/admin/profile) to every request"""
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def _start_profiling():
+        traced = profiler.request_started(request.endpoint or 'unmatched')
+        if traced is not None:
+            g._profile = traced
+
+    @app.teardown_request
+    def _finish_profiling(exception=None):
+        traced = g.pop('_profile', None)
+        if traced is not None:
+            profiler.request_finished(traced)
+
+    return profiler
@@ -2,8 +2,10 @@ from functools import wraps
 from flask import request, jsonify, g, current_app, make_response
 from flask_cors import CORS
 from src.services.auth_service import AuthService
-from src.services.auth import UserPermissions
 from src.config import get_cors_origins
+from src.entrypoints.auth import (
+    get_request_token, authenticate_token, authenticate_stream_ticket, STREAM_TICKET_ENDPOINTS
+)
 
 def setup_middleware(app, auth_service: AuthService):
     # Setup CORS with specific origins
@@ -25,27 +27,31 @@ def setup_middleware(app, auth_service: AuthService):
         if (request.method == 'OPTIONS' or
             request.endpoint == 'auth.login' or
             request.endpoint == 'signals.receive_signal' or
+            request.blueprint in ('health', 'metrics') or
             'socket.io' in request.path):
             return
             
         auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
+        if auth_header and not auth_header.startswith('Bearer '):
+            return jsonify({"error": "No token provided"}), 401
+        if not auth_header and request.endpoint in STREAM_TICKET_ENDPOINTS:
+            principal = authenticate_stream_ticket(auth_service)
+            if principal is None:
+                return jsonify({"error": "Invalid or expired stream ticket"}), 401
+            g.current_user = principal
+            return
+        token = get_request_token()
+        if not token:
             return jsonify({"error": "No token provided"}), 401
             
         try:
-            token = auth_header.split(' ')[1]
-            payload = auth_service.verify_token(token)
+            principal = authenticate_token(token, auth_service)
             
-            if not payload:
+            if principal is None:
                 return jsonify({"error": "Invalid token"}), 401
                 
-            # Store user in g for the request duration
-            g.current_user = UserPermissions(
-                user_id=payload['user_id'],
-                email=payload['email'],
-                role=payload['role'],
-                permissions=set(payload['permissions'])
-            )
+            # Store the principal in g for the request duration
+            g.current_user = principal
             
         except Exception as e:
             return jsonify({"error": f"Token verification failed: {str(e)}"}), 401
@@ -0,0 +1,115 @@
+import os
+from flask import Blueprint, Response, current_app, jsonify, request
+from src.entrypoints.auth import require_permissions
+from src.adapters.engine import pool_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/pool', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_pool_stats():
+    """Connection pool usage of this worker process"""
+    return jsonify(pool_stats(current_app.extensions['db_engine']))
+
+@admin_bp.route('/metrics', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_request_metrics():
+    """Latency percentiles, DB and JSON time per endpoint of this worker process"""
+    metrics = current_app.extensions.get('request_metrics')
+    if metrics is None:
+        return jsonify({"error": "Request metrics are disabled"}), 404
+    return jsonify(metrics.summary())
+
+@admin_bp.route('/repeated-queries', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_repeated_queries():
+    """Recent requests that ran one statement shape many times (likely N+1 loops)"""
+    tracker = current_app.extensions.get('query_tracker')
+    if tracker is None:
+        return jsonify({"error": "Query tracking is disabled"}), 404
+    return jsonify({"threshold": tracker.threshold, "per_endpoint": tracker.flagged, "recent": tracker.recent()})
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_slow_queries():
+    """Recent statements over the slow-query threshold, newest first, with any captured plans"""
+    log = current_app.extensions.get('slow_query_log')
+    if log is None:
+        return jsonify({"error": "Slow query log is disabled"}), 404
+    return jsonify({
+        "threshold_ms": log.threshold_seconds * 1000,
+        "recorded": log.recorded,
+        "explained": log.explained,
+        "queries": log.recent()
+    })
+
+@admin_bp.route('/ingest-throttling', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_ingest_throttling():
+    """Ingestion rate limits and readings rejected per controller in this worker"""
+    limiter = current_app.extensions.get('ingest_limiter')
+    if limiter is None:
+        return jsonify({"error": "Ingestion rate limiting is disabled"}), 404
+    return jsonify(limiter.stats(top=request.args.get('top', 50, type=int)))
+
+def _profiler():
+    return current_app.extensions.get('profiler')
+
+def _profile_result(run):
+    if run is None:
+        return jsonify({"error": "No profile run yet in this worker", "worker": os.getpid()}), 404
+    if request.args.get('format') == 'collapsed':
+        if run.mode == 'cprofile':
+            return jsonify({"error": "cprofile runs have no stacks; use mode=sample"}), 400
+        # Feed to flamegraph.pl or speedscope
+        return Response(run.collapsed(), mimetype='text/plain', headers={'X-Profile-Worker': str(run.worker)})
+    return jsonify({"active": run.finished_at is None, **run.to_dict()})
+
+@admin_bp.route('/profile', methods=['POST'])
+@require_permissions(['manage_users'])
+def start_profile():
+    """Profile the next `requests` requests or `seconds` of traffic in this worker.
+
+    The run exists only in the worker process that served this request
+    (`worker` in the response): GET and DELETE reach it only when served by
+    the same worker, so profile with WEB_WORKERS=1 (the default).
+
+    Body: {"mode": "sample" | "cprofile" | "memory", "seconds": 30,
+    "requests": 100, "endpoint": "dashboard.get_empresa_dashboard",
+    "interval_ms": 10}; every field is optional.
+    """
+    profiler = _profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        run = profiler.start(
+            mode=data.get('mode', 'sample'),
+            seconds=float(data['seconds']) if data.get('seconds') is not None else None,
+            requests=int(data['requests']) if data.get('requests') is not None else None,
+            endpoint=data.get('endpoint'),
+            interval_ms=float(data['interval_ms']) if data.get('interval_ms') is not None else None
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "worker": os.getpid()}), 409
+    return jsonify(run.to_dict()), 202
+
+@admin_bp.route('/profile', methods=['GET'])
+@require_permissions(['manage_users'])
+def get_profile():
+    """Active or last profile run; ?format=collapsed for flame graph stacks"""
+    profiler = _profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled"}), 404
+    return _profile_result(profiler.active or profiler.last)
+
+@admin_bp.route('/profile', methods=['DELETE'])
+@require_permissions(['manage_users'])
+def stop_profile():
+    """End the active run early and return its results"""
+    profiler = _profiler()
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled"}), 404
+    return _profile_result(profiler.stop())
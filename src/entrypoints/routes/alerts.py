@@ -1,27 +1,95 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify, g
 from src.services.alert_service import AlertService
 from src.adapters.repository import EmpresaRepository
+from src.entrypoints.session import read_only_session
 
 alerts_bp = Blueprint('alerts', __name__)
 
-@alerts_bp.route('/controlador/<string:controlador_id>/alerts', methods=['GET'])
-def get_controller_alerts(controlador_id):
+MAX_LOG_PAGE = 500
+
+
+def _alert_service() -> AlertService:
     session = request.environ.get('session')
-    service = AlertService(
+    return AlertService(
         empresa_repo=EmpresaRepository(session),
-        session=session
+        session=session,
+        engine=current_app.extensions['alert_engine']
     )
-    
-    alerts = service.get_controller_alerts(controlador_id)
+
+def _controller_access_error(controlador_id):
+    """404/403 response unless the caller may see the controller's empresa, else None"""
+    controller = EmpresaRepository(request.environ.get('session')).get_controlador(controlador_id)
+    if not controller:
+        return jsonify({"error": f"Controller not found: {controlador_id}"}), 404
+    if not g.current_user.can_access_empresa(controller.empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+    return None
+
+@alerts_bp.route('/controlador/<int:controlador_id>/alerts', methods=['GET'])
+@read_only_session
+def get_controller_alerts(controlador_id):
+    denied = _controller_access_error(controlador_id)
+    if denied:
+        return denied
+    service = _alert_service()
+
+    try:
+        alerts = service.get_controller_alerts(controlador_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
     return jsonify({"alerts": alerts})
 
-@alerts_bp.route('/controlador/<string:controlador_id>/alert-logs', methods=['GET'])
+@alerts_bp.route('/controlador/<int:controlador_id>/alert-logs', methods=['GET'])
+@read_only_session
 def get_controller_alert_logs(controlador_id):
-    session = request.environ.get('session')
-    service = AlertService(
-        empresa_repo=EmpresaRepository(session),
-        session=session
-    )
-    
-    logs = service.get_controller_alert_logs(controlador_id)
-    return jsonify({"logs": logs}) 
\ No newline at end of file
+    """Paginated alert history: ?limit=50&cursor=<next_cursor of the previous page>"""
+    limit = request.args.get('limit', 50, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 400
+    limit = min(limit, MAX_LOG_PAGE)
+    denied = _controller_access_error(controlador_id)
+    if denied:
+        return denied
+    service = _alert_service()
+
+    try:
+        page = service.get_controller_alert_logs(controlador_id, limit=limit, cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
+
+@alerts_bp.route('/controlador/<int:controlador_id>/alert-logs/daily', methods=['GET'])
+@read_only_session
+def get_controller_alert_counts(controlador_id):
+    """Alerts fired per rule and day, last 30 days unless start_date/end_date are given"""
+    denied = _controller_access_error(controlador_id)
+    if denied:
+        return denied
+    service = _alert_service()
+    try:
+        end_date = datetime.fromisoformat(request.args['end_date']) if 'end_date' in request.args else datetime.now()
+        start_date = (datetime.fromisoformat(request.args['start_date']) if 'start_date' in request.args
+                      else end_date - timedelta(days=30))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    counts = service.get_controller_alert_counts(controlador_id, start_date, end_date)
+    return jsonify({"counts": counts})
+
+@alerts_bp.route('/controlador/<int:controlador_id>/alerts/open', methods=['GET'])
+@read_only_session
+def get_controller_open_alerts(controlador_id):
+    denied = _controller_access_error(controlador_id)
+    if denied:
+        return denied
+    service = _alert_service()
+    return jsonify({"alerts": service.get_open_alerts(controlador_id=controlador_id)})
+
+@alerts_bp.route('/empresa/<int:empresa_id>/alerts/open', methods=['GET'])
+@read_only_session
+def get_empresa_open_alerts(empresa_id):
+    if not g.current_user.can_access_empresa(empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+    service = _alert_service()
+    return jsonify({"alerts": service.get_open_alerts(empresa_id=empresa_id)})
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from src.services.auth_service import AuthService
-from functools import wraps
-import jwt
+from src.services.password_hasher import HasherBusy
+from src.entrypoints.auth import require_permissions
 from src.services.empresa_service import EmpresaService
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
@@ -24,50 +24,12 @@ def login():
         if token:
             return jsonify({"token": token}), 200
         return jsonify({"error": "Invalid credentials"}), 401
+    except HasherBusy:
+        return jsonify({"error": "Too many logins in progress, retry shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def require_permissions(permissions):
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            try:
-                # Get token from header
-                auth_header = request.headers.get('Authorization')
-                if not auth_header:
-                    return jsonify({"error": "No token provided"}), 401
-                
-                # Extract token from "Bearer <token>"
-                token = auth_header.split(' ')[1] if len(auth_header.split(' ')) > 1 else auth_header
-                
-                # Verify token
-                session = request.environ['session']
-                auth_service = AuthService(session)
-                payload = auth_service.verify_token(token)
-                
-                if not payload:
-                    return jsonify({"error": "Invalid token"}), 401
-                
-                # Check if user has required permissions
-                user_permissions = set(payload.get('permissions', []))
-                if not all(p in user_permissions for p in permissions):
-                    return jsonify({"error": "Insufficient permissions"}), 403
-                
-                # Store user info in flask.g
-                g.current_user = auth_service.get_user_by_email(payload['email'])
-                
-                return f(*args, **kwargs)
-            except jwt.ExpiredSignatureError:
-                return jsonify({"error": "Token has expired"}), 401
-            except jwt.InvalidTokenError:
-                return jsonify({"error": "Invalid token"}), 401
-            except Exception as e:
-                print(f"Auth error: {str(e)}")
-                return jsonify({"error": str(e)}), 500
-        return decorated_function
-    return decorator 
-
 @auth_bp.route('/me', methods=['GET'])
 @require_permissions(['view_dashboard'])
 def get_user_info():
@@ -78,18 +40,12 @@ def get_user_info():
     user_info = {
         "user": {
             "email": user.email,
-            "role": user.role.value if hasattr(user.role, 'value') else str(user.role),
+            "role": Role[user.role].value if user.role in Role.__members__ else str(user.role),
             "permissions": list(user.permissions)
         }
     }
     
-    # Check if role is admin (handle both Enum and string cases)
-    is_admin = (
-        (hasattr(user.role, 'value') and user.role == Role.ADMIN) or
-        (isinstance(user.role, str) and user.role.lower() == 'admin')
-    )
-    
-    if is_admin:
+    if user.is_admin:
         service = EmpresaService(
             empresa_repo=EmpresaRepository(session),
             signal_queries=SignalQueries(session),
@@ -106,7 +62,9 @@ def get_user_info():
             signal_queries=SignalQueries(session),
             session=session
         )
-        empresa = service.get_empresa(user.empresa.id) if user.empresa else None
+        # Tokens issued before empresa_id was a claim fall back to loading the user
+        empresa_id = user.empresa_id if user.empresa_id is not None else (user.empresa.id if user.empresa else None)
+        empresa = service.get_empresa(empresa_id) if empresa_id is not None else None
         user_info.update({
             "isAdmin": False,
             "empresa": empresa
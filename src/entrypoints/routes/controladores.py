@@ -1,16 +1,22 @@
-from flask import Blueprint, current_app, request, jsonify, g
+from flask import Blueprint, current_app, request, jsonify, g, url_for
 from datetime import datetime, timedelta
 from src.services.controller_monitoring_service import ControllerMonitoringService
 from src.services.controller_analytics_service import ControllerAnalyticsService
 from src.services.controller_configuration_service import ControllerConfigurationService
+from src.services.alert_service import AlertService
+from src.services.analytics_jobs import TooManyJobs
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
 from src.entrypoints.auth import require_permissions
+from src.entrypoints.session import read_only_session
+from src.entrypoints.conditional import conditional_get, data_changed
+from src.entrypoints.formats import wants_columnar, format_response
 
 controladores_bp = Blueprint('controladores', __name__)
 
 @controladores_bp.route('/<string:controlador_id>/config', methods=['GET', 'POST'])
 @require_permissions(['manage_controller'])
+@conditional_get('controller', 'controlador_id')
 def controller_config(controlador_id):
     session = request.environ.get('session')
     service = ControllerConfigurationService(
@@ -23,7 +29,11 @@ def controller_config(controlador_id):
         return jsonify(service.get_config(controlador_id))
     
     new_config = request.get_json()
-    return jsonify(service.update_config(controlador_id, new_config))
+    result = service.update_config(controlador_id, new_config)
+    data_changed(controller_id=controlador_id)
+    # New alert rules apply from the next reading, not after recompile_seconds
+    current_app.extensions['alert_engine'].invalidate(int(controlador_id))
+    return jsonify(result)
 
 @controladores_bp.route('', methods=['POST'])
 @require_permissions(['manage_controller'])
@@ -47,6 +57,7 @@ def create_controller():
             
         # Model validation will handle the rest
         controller = service.create_controller(empresa_id, data)
+        data_changed(empresa_id=empresa_id)
         return jsonify(controller), 201
         
     except ValueError as e:
@@ -57,6 +68,8 @@ def create_controller():
 
 @controladores_bp.route('/<string:controlador_id>/sensor/<string:sensor_id>/connection-data')
 @require_permissions(['view_signals'])
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_connection_data(controlador_id, sensor_id):
     session = request.environ.get('session')
     user = g.current_user
@@ -73,6 +86,7 @@ def get_connection_data(controlador_id, sensor_id):
     ))
 
 @controladores_bp.route('/<string:controlador_id>/changes')
+@read_only_session
 def get_controller_changes(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -83,6 +97,8 @@ def get_controller_changes(controlador_id):
 
 @controladores_bp.route('/<string:controlador_id>/sensor_activity')
 @require_permissions(['view_signals'])
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_sensor_activity(controlador_id):
     session = request.environ.get('session')
     user = g.current_user
@@ -94,6 +110,8 @@ def get_sensor_activity(controlador_id):
 
 @controladores_bp.route('/<string:controlador_id>/sensor_uptime')
 @require_permissions(['view_signals'])
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_sensor_uptime(controlador_id):
     session = request.environ.get('session')
     user = g.current_user
@@ -104,6 +122,8 @@ def get_sensor_uptime(controlador_id):
     return jsonify(service.get_sensor_uptime(controlador_id, user.permissions))
 
 @controladores_bp.route('/<string:controlador_id>/sensor_correlation')
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_sensor_correlation(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -113,15 +133,27 @@ def get_sensor_correlation(controlador_id):
     return jsonify(service.get_sensor_correlation(controlador_id))
 
 @controladores_bp.route('/<string:controlador_id>/alerts')
+@read_only_session
 def get_controller_alerts(controlador_id):
     session = request.environ.get('session')
-    service = ControllerMonitoringService(
+    controller = EmpresaRepository(session).get_controlador(controlador_id)
+    if not controller:
+        return jsonify({"error": f"Controller not found: {controlador_id}"}), 404
+    if not g.current_user.can_access_empresa(controller.empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+    service = AlertService(
         empresa_repo=EmpresaRepository(session),
-        signal_queries=SignalQueries(session)
+        session=session,
+        engine=current_app.extensions['alert_engine']
     )
-    return jsonify(service.get_controller_alerts(controlador_id))
+    try:
+        return jsonify(service.get_controller_alerts(controlador_id))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
 
 @controladores_bp.route('/<string:controlador_id>/uptime-downtime')
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_uptime_downtime(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -132,9 +164,16 @@ def get_uptime_downtime(controlador_id):
     start_date = datetime.fromisoformat(request.args.get('start_date'))
     end_date = datetime.fromisoformat(request.args.get('end_date'))
     
-    return jsonify(service.get_uptime_downtime(controlador_id, start_date, end_date))
+    if request.args.get('mode') == 'job':
+        return _submit_analytics_job(controlador_id, 'uptime-downtime', start_date, end_date)
+    try:
+        return jsonify(service.get_uptime_downtime(controlador_id, start_date, end_date))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
 
 @controladores_bp.route('/<string:controlador_id>/operational-hours')
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_operational_hours(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -145,9 +184,64 @@ def get_operational_hours(controlador_id):
     start_date = datetime.fromisoformat(request.args.get('start_date'))
     end_date = datetime.fromisoformat(request.args.get('end_date'))
     
-    return jsonify(service.get_operational_hours(controlador_id, start_date, end_date))
+    if request.args.get('mode') == 'job':
+        return _submit_analytics_job(controlador_id, 'operational-hours', start_date, end_date)
+    try:
+        return jsonify(service.get_operational_hours(controlador_id, start_date, end_date))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+def _submit_analytics_job(controlador_id, metric, start_date, end_date):
+    """Run a long-range report in the background; returns 202 with the job to poll"""
+    user = g.current_user
+    controller = EmpresaRepository(request.environ.get('session')).get_controlador(controlador_id)
+    if not controller:
+        return jsonify({"error": f"Controller not found: {controlador_id}"}), 404
+    if not user.can_access_empresa(controller.empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+
+    jobs = current_app.extensions['analytics_jobs']
+    try:
+        job = jobs.submit(
+            controlador_id, metric, start_date, end_date,
+            owner_id=user.user_id, empresa_id=controller.empresa_id
+        )
+    except TooManyJobs as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "30"}
+    status = 200 if job.status == job.DONE else 202
+    response = jsonify(job.to_dict())
+    response.headers['Location'] = url_for('controladores.get_analytics_job', job_id=job.id)
+    return response, status
+
+def _can_read_job(job, user) -> bool:
+    # Identical reports are shared, so anyone with access to the controller's empresa may poll
+    if job.empresa_id is None:
+        return user.is_admin or user.user_id == job.owner_id
+    return user.can_access_empresa(job.empresa_id)
+
+@controladores_bp.route('/jobs/<string:job_id>', methods=['GET'])
+def get_analytics_job(job_id):
+    job = current_app.extensions['analytics_jobs'].get(job_id)
+    # 404 rather than 403: job ids of other empresas are not confirmed to exist
+    if not job or not _can_read_job(job, g.current_user):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@controladores_bp.route('/jobs/<string:job_id>', methods=['DELETE'])
+def cancel_analytics_job(job_id):
+    user = g.current_user
+    jobs = current_app.extensions['analytics_jobs']
+    job = jobs.get(job_id)
+    if not job or not _can_read_job(job, user):
+        return jsonify({"error": "Job not found"}), 404
+    if not (user.is_admin or user.user_id == job.owner_id):
+        return jsonify({"error": "Only the submitter can cancel this job"}), 403
+    jobs.cancel(job_id)
+    return jsonify(job.to_dict(include_result=False)), 202
 
 @controladores_bp.route('/<string:controlador_id>/timeline')
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=30)
+@read_only_session
 def get_controller_timeline(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -157,8 +251,13 @@ def get_controller_timeline(controlador_id):
     
     start_date = datetime.fromisoformat(request.args.get('start_date'))
     end_date = datetime.fromisoformat(request.args.get('end_date'))
+    max_points = request.args.get('points', type=int)
     
-    return jsonify(service.get_timeline_data(controlador_id, start_date, end_date))
+    columnar = wants_columnar()
+    return format_response(
+        service.get_timeline_data(controlador_id, start_date, end_date, max_points=max_points, columnar=columnar),
+        columnar
+    )
 
 @controladores_bp.route('/<string:controlador_id>', methods=['DELETE'])
 def delete_controller(controlador_id):
@@ -169,4 +268,5 @@ def delete_controller(controlador_id):
     )
     
     service.delete_controller(controlador_id)
+    data_changed(controller_id=controlador_id)
     return '', 204 
\ No newline at end of file
@@ -1,16 +1,25 @@
-from flask import Blueprint, current_app, request, jsonify, g
+import os
+from flask import Blueprint, Response, current_app, request, jsonify, g
 from datetime import datetime, timedelta
 from src.services.controller_monitoring_service import ControllerMonitoringService
 from src.services.controller_analytics_service import ControllerAnalyticsService
 from src.services.controller_configuration_service import ControllerConfigurationService
+from src.services.fleet_analytics_service import FleetAnalyticsRunner
 from src.adapters.repository import EmpresaRepository
+from src.services.auth_service import AuthService, STREAM_TICKET_SECONDS
 from src.queries.queries import SignalQueries
 from src.entrypoints.auth import require_permissions
+from src.entrypoints.session import read_only_session
+from src.entrypoints.conditional import conditional_get, data_changed
+from src.entrypoints.formats import wants_columnar, format_response
+from src.config import get_fleet_analytics_settings
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/empresa/<string:empresa_id>/dashboard')
 @require_permissions(['view_dashboard'])
+@conditional_get('empresa', 'empresa_id')
+@read_only_session
 def get_empresa_dashboard(empresa_id):
     session = request.environ.get('session')
     user = g.current_user
@@ -18,20 +27,63 @@ def get_empresa_dashboard(empresa_id):
         empresa_repo=EmpresaRepository(session),
         signal_queries=SignalQueries(session)
     )
-    return jsonify(service.get_empresa_dashboard(empresa_id, user.permissions))
+    columnar = wants_columnar()
+    return format_response(service.get_empresa_dashboard(empresa_id, user.permissions, columnar=columnar), columnar)
+
+@dashboard_bp.route('/empresa/<int:empresa_id>/stream-ticket', methods=['POST'])
+@require_permissions(['view_dashboard'])
+def get_stream_ticket(empresa_id):
+    """Short-lived ticket for opening the empresa's stream: GET .../stream?ticket=..."""
+    if not g.current_user.can_access_empresa(empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+    ticket = AuthService(request.environ.get('session')).issue_stream_ticket(g.current_user, empresa_id)
+    return jsonify({"ticket": ticket, "expires_in": STREAM_TICKET_SECONDS})
+
+@dashboard_bp.route('/empresa/<int:empresa_id>/stream')
+@require_permissions(['view_dashboard'])
+@read_only_session
+def stream_empresa_dashboard(empresa_id):
+    """Server-Sent Events with new readings, status changes and alerts for an empresa.
+
+    Authenticated with a ticket from POST .../stream-ticket. Served here, an
+    open stream holds one gthread worker thread (WEB_THREADS) for as long
+    as the browser keeps it open; run dashboards against the ASGI app
+    (src/entrypoints/asgi_app.py), where a stream is a coroutine, when more
+    than a handful are expected.
+    """
+    if not g.current_user.can_access_empresa(empresa_id):
+        return jsonify({"error": "Unauthorized access to empresa"}), 403
+
+    session = request.environ.get('session')
+    controller_ids = [ref.id for ref in EmpresaRepository(session).get_controller_refs(empresa_id)]
+    broker = current_app.extensions['dashboard_stream']
+    client = broker.register(controller_ids, empresa_id=empresa_id)
+    if client is None:
+        return jsonify({"error": "Too many open streams"}), 503
+
+    return Response(
+        broker.stream(client),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @dashboard_bp.route('/controlador/<string:controlador_id>/detail')
 @require_permissions(['view_signals'])
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=30)
+@read_only_session
 def get_controller_detail(controlador_id):
     session = request.environ.get('session')
     user = g.current_user
     service = ControllerMonitoringService(
         empresa_repo=EmpresaRepository(session),
-        signal_queries=SignalQueries(session)
+        signal_queries=SignalQueries(session),
+        arrival_stats=current_app.extensions['arrival_stats']
     )
     return jsonify(service.get_controller_status(controlador_id, user.permissions))
 
 @dashboard_bp.route('/controlador/<string:controlador_id>/analytics')
+@conditional_get('controller', 'controlador_id', time_bucket_seconds=60)
+@read_only_session
 def get_controller_analytics(controlador_id):
     session = request.environ.get('session')
     service = ControllerAnalyticsService(
@@ -43,6 +95,7 @@ def get_controller_analytics(controlador_id):
 
 @dashboard_bp.route('/controlador/<string:controlador_id>/config', methods=['GET', 'POST'])
 @require_permissions(['manage_controller'])
+@conditional_get('controller', 'controlador_id')
 def controller_config(controlador_id):
     session = request.environ.get('session')
     user = g.current_user
@@ -55,5 +108,28 @@ def controller_config(controlador_id):
         return jsonify(service.get_config(controlador_id))
     
     new_config = request.get_json()
-    return jsonify(service.update_config(controlador_id, new_config))
+    result = service.update_config(controlador_id, new_config)
+    data_changed(controller_id=controlador_id)
+    # New alert rules apply from the next reading, not after recompile_seconds
+    current_app.extensions['alert_engine'].invalidate(int(controlador_id))
+    return jsonify(result)
 
+@dashboard_bp.route('/fleet/analytics')
+@require_permissions(['manage_empresa'])
+def get_fleet_analytics():
+    """Uptime, duty cycle and correlation for every controller of an empresa (or all empresas)"""
+    session = request.environ.get('session')
+    empresa_id = request.args.get('empresa_id', type=int)
+    end_date = request.args.get('end_date', type=datetime.fromisoformat) or datetime.now()
+    start_date = request.args.get('start_date', type=datetime.fromisoformat) or end_date - timedelta(days=1)
+    if start_date >= end_date:
+        return jsonify({"error": "start_date must be before end_date"}), 400
+
+    # Each worker is a process: the client may ask for fewer, never for more than the cap
+    cap = max(1, min(os.cpu_count() or 1, get_fleet_analytics_settings()['max_workers']))
+    workers = request.args.get('workers', cap, type=int)
+    runner = FleetAnalyticsRunner(
+        empresa_repo=EmpresaRepository(session),
+        max_workers=max(1, min(workers, cap))
+    )
+    return jsonify(runner.run(start_date, end_date, empresa_id=empresa_id))
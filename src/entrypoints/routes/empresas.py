@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, current_app, request, jsonify, g
 from src.services.controller_monitoring_service import ControllerMonitoringService
 from src.services.empresa_service import EmpresaService
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
 from src.entrypoints.auth import require_permissions
+from src.entrypoints.formats import wants_columnar, format_response
+from src.entrypoints.conditional import conditional_get, data_changed
 
 empresas_bp = Blueprint('empresas', __name__)
 
@@ -53,6 +55,7 @@ def list_empresas():
 
 @empresas_bp.route('/<int:empresa_id>', methods=['GET'])
 @require_permissions(['view_empresas'])
+@conditional_get('empresa', 'empresa_id')
 def get_empresa(empresa_id):
     try:
         session = request.environ['session']
@@ -74,7 +77,9 @@ def update_empresa(empresa_id):
         signal_queries=SignalQueries(session)
     )
     data = request.get_json()
-    return jsonify(service.update_empresa(empresa_id, data, user.permissions))
+    result = service.update_empresa(empresa_id, data, user.permissions)
+    data_changed(empresa_id=empresa_id)
+    return jsonify(result)
 
 @empresas_bp.route('/<int:empresa_id>', methods=['DELETE'])
 def delete_empresa(empresa_id):
@@ -94,6 +99,7 @@ def get_components(empresa_id):
 
 @empresas_bp.route('/<string:empresa_id>/dashboard')
 @require_permissions(['view_dashboard'])
+@conditional_get('empresa', 'empresa_id')
 def get_empresa_dashboard(empresa_id):
     session = request.environ['session']
     user = g.current_user
@@ -103,10 +109,12 @@ def get_empresa_dashboard(empresa_id):
         signal_queries=SignalQueries(session)
     )
     
-    return jsonify(service.get_empresa_dashboard(
+    columnar = wants_columnar()
+    return format_response(service.get_empresa_dashboard(
         empresa_id=empresa_id,
-        user_permissions=user.permissions
-    ))
+        user_permissions=user.permissions,
+        columnar=columnar
+    ), columnar)
 
 @empresas_bp.route('/stats', methods=['GET', 'OPTIONS'])
 @require_permissions(['manage_empresa'])
@@ -132,13 +140,15 @@ def get_empresas_stats():
 
 @empresas_bp.route('/<string:id>/connected_stats')
 @require_permissions(['view_dashboard'])
+@conditional_get('empresa', 'id', time_bucket_seconds=30)
 def get_connected_stats(id):
     try:
         session = request.environ.get('session')
         user = g.current_user
         service = ControllerMonitoringService(
             empresa_repo=EmpresaRepository(session),
-            signal_queries=SignalQueries(session)
+            signal_queries=SignalQueries(session),
+            arrival_stats=current_app.extensions['arrival_stats']
         )
         
         stats = service.get_empresa_connected_stats(id, user.permissions)
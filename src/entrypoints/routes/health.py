@@ -0,0 +1,15 @@
+from flask import Blueprint, current_app, jsonify
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/live', methods=['GET'])
+def live():
+    """The process is up (it may still be warming up)"""
+    return jsonify({"status": "ok"})
+
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    """200 once this worker is warmed up, 503 until then; includes startup timings"""
+    readiness = current_app.extensions['readiness']
+    readiness.check()
+    return jsonify(readiness.to_dict()), 200 if readiness.ready else 503
@@ -0,0 +1,31 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from src.config import get_metrics_settings
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint, behind the METRICS_TOKEN bearer token.
+
+    Only reports the worker that serves the scrape: with WEB_WORKERS > 1
+    every scrape lands on an arbitrary worker. Keep the single-worker default,
+    or run each worker as its own scrape target (one server per port, each
+    with its own METRICS_WORKER_ID).
+    """
+    settings = get_metrics_settings()
+    token = settings['token']
+    if token:
+        given = request.headers.get('Authorization', '').split(' ')[-1]
+        if not hmac.compare_digest(given, token):
+            return jsonify({"error": "Invalid token"}), 401
+    elif not settings['public']:
+        return jsonify({"error": "Metrics endpoint is disabled: set METRICS_TOKEN"}), 404
+    request_metrics = current_app.extensions.get('request_metrics')
+    if request_metrics is None:
+        return jsonify({"error": "Request metrics are disabled"}), 404
+    body = request_metrics.render_prometheus(settings['worker_id'])
+    ingest_limiter = current_app.extensions.get('ingest_limiter')
+    if ingest_limiter is not None:
+        body += ingest_limiter.render_prometheus()
+    return Response(body, mimetype='text/plain', headers={'Content-Type': 'text/plain; version=0.0.4'})
@@ -1,25 +1,60 @@
-from flask import Blueprint, request, jsonify
+import math
+from flask import Blueprint, current_app, request, jsonify, g
 from src.services.signal_service import SignalService
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
 from datetime import datetime
 from src.entrypoints.auth import require_permissions
+from src.entrypoints.formats import wants_columnar, format_response, stream_json_array
+from src.entrypoints.session import read_only_session
+from src.services.columnar import signal_rows_to_columns, iter_signal_dicts
 
 signals_bp = Blueprint('signals', __name__)
 
+def device_signal_data(data):
+    """Signal payload for SignalService from a device's /input body"""
+    return {
+        "tstamp": datetime.now().isoformat(),
+        "values": data['sensor_states'],
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+        "metadata": data.get("metadata", {}),
+        "controlador_id": data['controlador_id']
+    }
+
+def throttle_response(phone_number):
+    """429 with Retry-After when the controller is over its ingestion rate, else None"""
+    limiter = current_app.extensions.get('ingest_limiter')
+    if limiter is None or phone_number is None:
+        return None
+    retry_after = limiter.acquire(str(phone_number))
+    if retry_after <= 0:
+        return None
+    seconds = max(1, math.ceil(retry_after))
+    response = jsonify({"error": "Too many readings", "retry_after": seconds})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
 @signals_bp.route('', methods=['POST'])
 def create_signal():
     try:
         session = request.environ.get('session')
         service = SignalService(
             empresa_repo=EmpresaRepository(session),
-            session=session
+            session=session,
+            arrival_stats=current_app.extensions['arrival_stats'],
+            event_bus=current_app.extensions['event_bus']
         )
         
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-            
+
+        throttled = throttle_response(data.get('controlador_id'))
+        if throttled is not None:
+            return throttled
+
         result = service.process_incoming_signal(data)
         return jsonify(result), 201
         
@@ -38,21 +73,19 @@ def receive_signal():
         if not data or 'controlador_id' not in data or 'sensor_states' not in data:
             return jsonify({"error": "Missing required fields"}), 400
 
+        # Before any database work: a controller stuck retrying must not starve the pool
+        throttled = throttle_response(data['controlador_id'])
+        if throttled is not None:
+            return throttled
+
         service = SignalService(
             empresa_repo=EmpresaRepository(session),
-            session=session
+            session=session,
+            arrival_stats=current_app.extensions['arrival_stats'],
+            event_bus=current_app.extensions['event_bus']
         )
         
-        signal_data = {
-            "tstamp": datetime.now().isoformat(),
-            "values": data['sensor_states'],
-            "latitude": data.get("latitude"),
-            "longitude": data.get("longitude"),
-            "metadata": data.get("metadata", {}),
-            "controlador_id": data['controlador_id']
-        }
-        
-        result = service.process_incoming_signal(signal_data)
+        result = service.process_incoming_signal(device_signal_data(data))
         return jsonify(result), 201
         
     except ValueError as e:
@@ -64,29 +97,28 @@ def receive_signal():
 # All other endpoints require authentication
 @signals_bp.route("/<int:controlador_id>", methods=["GET"])
 @require_permissions(['view_signals'])
+@read_only_session
 def get_signals(controlador_id):
     session = request.environ.get('session')
     try:
         start_time = request.args.get('start_time', type=datetime.fromisoformat)
         end_time = request.args.get('end_time', type=datetime.fromisoformat)
-        user_id = request.args.get('user_id', type=int)
         
-        if not all([start_time, end_time, user_id]):
+        if not all([start_time, end_time]):
             return jsonify({"error": "Missing required parameters"}), 400
 
-        service = SignalService(
-            empresa_repo=EmpresaRepository(session),
-            signal_queries=SignalQueries(session)
-        )
-        
-        signals = service.get_controlador_signals(
-            user_id=user_id,
-            controlador_id=controlador_id,
-            start_time=start_time,
-            end_time=end_time
-        )
-        
-        return jsonify([s.to_dict() for s in signals]), 200
+        controller = EmpresaRepository(session).get_controlador(controlador_id)
+        if not controller:
+            return jsonify({"error": f"Controller not found: {controlador_id}"}), 404
+        if not g.current_user.can_access_empresa(controller.empresa_id):
+            return jsonify({"error": "Unauthorized access to empresa"}), 403
+
+        rows = SignalQueries(session).get_signal_rows(controlador_id, start_time, end_time)
+        if wants_columnar():
+            data = {"phone_number": controller.phone_number, "signals": signal_rows_to_columns(rows)}
+            return format_response(data, True), 200
+        # Serialized while it is sent (and compressed), not built up front
+        return stream_json_array(iter_signal_dicts(rows, controller.phone_number))
         
     except ValueError as e:
-        return jsonify({"error": str(e)}), 400 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 400
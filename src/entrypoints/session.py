@@ -0,0 +1,13 @@
+from functools import wraps
+from flask import request
+
+
+def read_only_session(f):
+    """Serve the handler from a read-only session (no flush, no transaction round trips)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        session = request.environ.get('session')
+        if hasattr(session, 'set_read_only'):
+            session.set_read_only()
+        return f(*args, **kwargs)
+    return decorated_function
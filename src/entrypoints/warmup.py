@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from sqlalchemy.orm import configure_mappers
+from src.adapters.repository import EmpresaRepository
+from src.queries.queries import SignalQueries
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Warm-up state of this process, reported by /health/ready.
+
+    Also measures how long the process took to become ready, counted from
+    import (or from the fork, for workers of a preloading server), and how
+    long its first request took.
+    """
+
+    RETRY_SECONDS = 5.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._warm: Optional[Callable[[], bool]] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over, e.g. in a freshly forked worker"""
+        self.started = time.monotonic()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}
+        self.startup_ms: Optional[float] = None
+        self.first_request_ms: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+
+    def check(self) -> bool:
+        """Ready yet? Retries a warm-up that failed (or never ran) now and then"""
+        if self.ready or self._warm is None:
+            return self.ready
+        due = self._attempted_at is None or time.monotonic() - self._attempted_at >= self.RETRY_SECONDS
+        if due and self._lock.acquire(blocking=False):
+            try:
+                self._warm()
+            finally:
+                self._lock.release()
+        return self.ready
+
+    def observe_first_request(self, seconds: float) -> None:
+        if self.first_request_ms is None:
+            self.first_request_ms = round(seconds * 1000, 1)
+            logger.info("First request served in %.1f ms", self.first_request_ms)
+
+    def to_dict(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "steps_ms": self.steps,
+            "startup_ms": self.startup_ms,
+            "first_request_ms": self.first_request_ms,
+        }
+
+
+def warm_up(app, session_factory: Callable) -> bool:
+    """Get this process ready to serve: mappers, compiled queries, controller state.
+
+    Runs each step once and records its time; a failure (database down)
+    leaves the process not ready and is retried by the readiness probe.
+    """
+    readiness: Readiness = app.extensions['readiness']
+    readiness._warm = lambda: warm_up(app, session_factory)
+    readiness._attempted_at = time.monotonic()
+    try:
+        _step(readiness, 'configure_mappers', configure_mappers)
+        session = session_factory()
+        try:
+            # Executing the hot statement shapes fills the engine's compiled
+            # cache and opens the worker's first pooled connection
+            _step(readiness, 'compile_queries', lambda: _compile_queries(session))
+            _step(readiness, 'load_controllers', lambda: _load_controllers(app, session))
+        finally:
+            session.close()
+    except Exception as e:
+        readiness.error = str(e)
+        logger.warning("Warm-up failed, not ready: %s", e)
+        return False
+
+    readiness.error = None
+    readiness.ready = True
+    readiness.startup_ms = round((time.monotonic() - readiness.started) * 1000, 1)
+    logger.info("Ready in %.1f ms (%s)", readiness.startup_ms, readiness.steps)
+    return True
+
+
+def track_first_request(app) -> None:
+    """Record the latency of the process's first request in its Readiness"""
+    readiness: Readiness = app.extensions['readiness']
+    state = {}
+
+    @app.before_request
+    def _first_request_started():
+        if readiness.first_request_ms is None and 'start' not in state:
+            state['start'] = time.perf_counter()
+
+    @app.teardown_request
+    def _first_request_done(exception=None):
+        start = state.pop('start', None)
+        if start is not None:
+            readiness.observe_first_request(time.perf_counter() - start)
+
+
+def _step(readiness: Readiness, name: str, fn: Callable) -> None:
+    if name in readiness.steps:
+        return
+    start = time.perf_counter()
+    fn()
+    readiness.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _compile_queries(session) -> None:
+    queries = SignalQueries(session)
+    now = datetime.now()
+    queries.get_signal_rows(-1, now, now)
+    queries.get_latest_rows([-1], 1)
+    queries.get_version_rows(controller_id=-1)
+    EmpresaRepository(session).get_controlador(-1)
+
+
+def _load_controllers(app, session) -> None:
+    tracker = app.extensions.get('liveness_tracker')
+    if tracker is not None:
+        tracker.rebuild(SignalQueries(session).get_last_seen_all())
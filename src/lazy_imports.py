@@ -0,0 +1,52 @@
+"""Deferred imports for heavy, analytics-only dependencies (numpy, pandas).
+
+    np = lazy_import('numpy')
+
+binds a stand-in that imports the real module on first attribute access,
+so importing the app (or a CLI script) does not pay for it until an
+analytics code path actually runs. Annotations that name the module must
+be strings (`'np.ndarray'`) or they would trigger the import.
+"""
+import importlib
+from typing import Dict, List
+
+_registry: Dict[str, 'LazyModule'] = {}
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__.get('_module') is not None
+
+    def __getattr__(self, attr: str):
+        # Only reached until the first load: afterwards the module's names are
+        # instance attributes and `np.mean` is a plain dict lookup
+        module = self.__dict__.get('_module')
+        if module is None:
+            # import_module takes the per-module import lock: safe across threads
+            module = importlib.import_module(self._name)
+            for name, value in vars(module).items():
+                self.__dict__.setdefault(name, value)
+            self.__dict__['_module'] = module
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    if name not in _registry:
+        _registry[name] = LazyModule(name)
+    return _registry[name]
+
+
+def preload() -> List[str]:
+    """Import every lazily imported module now, e.g. in a preloading server's
+    master so forked workers share the pages instead of importing each their own"""
+    for name in _registry:
+        importlib.import_module(name)
+    return list(_registry)
@@ -1,9 +1,10 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from sqlalchemy import text, func, desc
+from typing import List, Dict, Any, Optional, Sequence
+from sqlalchemy import text, func, desc, select, cast, Date, Text, or_, and_
 from sqlalchemy.orm import Session
 import src.domain.model as m
+from src.adapters.orm import signals, alert_logs, controladores, empresas
 
 @dataclass
 class SignalSummary:
@@ -13,6 +14,15 @@ class SignalSummary:
     signal_count: int
     latest_values: Dict[str, Any]
 
+_SIGNAL_ROW_COLUMNS = (
+    signals.c.id,
+    signals.c.controlador_id,
+    signals.c.tstamp,
+    signals.c['values'],
+    signals.c.latitude,
+    signals.c.longitude,
+)
+
 class SignalQueries:
     def __init__(self, session: Session):
         self.session = session
@@ -99,4 +109,156 @@ class SignalQueries:
                 .filter(m.Signal.tstamp >= start_time)
                 .filter(m.Signal.tstamp <= end_time)
                 .order_by(m.Signal.tstamp)
-                .all()) 
\ No newline at end of file
+                .all())
+
+    def get_by_timerange(
+        self,
+        controller_id: int,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[m.Signal]:
+        """Get signals within a timeframe (alias used by the analytics service)"""
+        return self.get_signals_in_timeframe(controller_id, start_time, end_time)
+
+    def get_sensor_rows(
+        self,
+        controller_ids: Sequence[int],
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Any]:
+        """Get (controlador_id, tstamp, values) rows for several controllers.
+
+        Projection query on the signals table: no ORM objects are built, and it
+        does not need the mappers to be configured (used by fleet workers).
+        """
+        stmt = (select(signals.c.controlador_id, signals.c.tstamp, signals.c['values'])
+                .where(signals.c.controlador_id.in_(list(controller_ids)))
+                .where(signals.c.tstamp.between(start_time, end_time))
+                .order_by(signals.c.controlador_id, signals.c.tstamp))
+        return self.session.execute(stmt).all()
+
+    def get_signal_rows(
+        self,
+        controller_id: int,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Any]:
+        """Get (id, controlador_id, tstamp, values, latitude, longitude) rows in a timeframe"""
+        stmt = (select(*_SIGNAL_ROW_COLUMNS)
+                .where(signals.c.controlador_id == controller_id)
+                .where(signals.c.tstamp.between(start_time, end_time))
+                .order_by(signals.c.tstamp))
+        return self.session.execute(stmt).all()
+
+    def get_latest_rows(self, controller_ids: Sequence[int], per_controller: int) -> List[Any]:
+        """Get the newest `per_controller` signal rows of several controllers in one query"""
+        rank = func.row_number().over(
+            partition_by=signals.c.controlador_id,
+            order_by=signals.c.tstamp.desc()
+        ).label('rank')
+        ranked = (select(*_SIGNAL_ROW_COLUMNS, rank)
+                  .where(signals.c.controlador_id.in_(list(controller_ids)))
+                  .subquery())
+        stmt = (select(*(ranked.c[column.name] for column in _SIGNAL_ROW_COLUMNS))
+                .where(ranked.c.rank <= per_controller)
+                .order_by(ranked.c.controlador_id, ranked.c.tstamp.desc()))
+        return self.session.execute(stmt).all()
+
+    def get_version_rows(self, controller_id: Optional[int] = None, empresa_id: Optional[int] = None) -> List[Any]:
+        """Get (id, config_hash, last_seen) of a controller, or of every controller of an empresa.
+
+        Cheap change fingerprint for HTTP validators: one index lookup per controller.
+        """
+        last_seen = (select(func.max(signals.c.tstamp))
+                     .where(signals.c.controlador_id == controladores.c.id)
+                     .correlate(controladores)
+                     .scalar_subquery())
+        stmt = (select(
+                    controladores.c.id,
+                    func.md5(cast(controladores.c.config, Text)).label('config_hash'),
+                    last_seen.label('last_seen'))
+                .order_by(controladores.c.id))
+        if controller_id is not None:
+            stmt = stmt.where(controladores.c.id == controller_id)
+        if empresa_id is not None:
+            stmt = stmt.where(controladores.c.empresa_id == empresa_id)
+        return self.session.execute(stmt).all()
+
+    def get_empresa_version_row(self, empresa_id: int) -> Optional[Any]:
+        """Get the empresa's own fields, for its change fingerprint"""
+        stmt = (select(empresas.c.name, empresas.c.phone_number, empresas.c.email)
+                .where(empresas.c.id == empresa_id))
+        return self.session.execute(stmt).first()
+
+    def get_last_seen_all(self) -> List[Any]:
+        """Get (controlador_id, last signal tstamp, config) for every controller that has signals"""
+        last_seen = (select(signals.c.controlador_id, func.max(signals.c.tstamp).label('last_seen'))
+                     .where(signals.c.controlador_id.isnot(None))
+                     .group_by(signals.c.controlador_id)
+                     .subquery())
+        stmt = (select(last_seen.c.controlador_id, last_seen.c.last_seen, controladores.c.config)
+                .join(controladores, controladores.c.id == last_seen.c.controlador_id))
+        return self.session.execute(stmt).all()
+
+
+class AlertQueries:
+    """Read side of the alert_logs table (see AlertLogWriter)"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_logs(
+        self,
+        controlador_id: Optional[int] = None,
+        empresa_id: Optional[int] = None,
+        limit: int = 50,
+        before: Optional[tuple] = None
+    ) -> List[Any]:
+        """Get alert episodes, newest first.
+
+        Keyset pagination: `before` is the (fired_at, id) of the last row of
+        the previous page, so every page is an index range scan on
+        (controlador_id, fired_at) or (empresa_id, fired_at).
+        """
+        stmt = select(alert_logs).order_by(alert_logs.c.fired_at.desc(), alert_logs.c.id.desc()).limit(limit)
+        stmt = self._scope(stmt, controlador_id, empresa_id)
+        if before is not None:
+            fired_at, log_id = before
+            stmt = stmt.where(or_(
+                alert_logs.c.fired_at < fired_at,
+                and_(alert_logs.c.fired_at == fired_at, alert_logs.c.id < log_id)
+            ))
+        return self.session.execute(stmt).all()
+
+    def count_per_rule_per_day(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        controlador_id: Optional[int] = None,
+        empresa_id: Optional[int] = None
+    ) -> List[Any]:
+        """Get (controlador_id, rule_id, day, count) of alerts fired in a timeframe"""
+        day = cast(alert_logs.c.fired_at, Date).label('day')
+        stmt = (select(alert_logs.c.controlador_id, alert_logs.c.rule_id, day, func.count().label('count'))
+                .where(alert_logs.c.fired_at.between(start_time, end_time))
+                .group_by(alert_logs.c.controlador_id, alert_logs.c.rule_id, day)
+                .order_by(day, alert_logs.c.controlador_id, alert_logs.c.rule_id))
+        return self.session.execute(self._scope(stmt, controlador_id, empresa_id)).all()
+
+    def get_open(
+        self,
+        controlador_id: Optional[int] = None,
+        empresa_id: Optional[int] = None
+    ) -> List[Any]:
+        """Get the alert episodes that have not cleared yet"""
+        stmt = (select(alert_logs)
+                .where(alert_logs.c.cleared_at.is_(None))
+                .order_by(alert_logs.c.fired_at.desc()))
+        return self.session.execute(self._scope(stmt, controlador_id, empresa_id)).all()
+
+    def _scope(self, stmt, controlador_id: Optional[int], empresa_id: Optional[int]):
+        if controlador_id is not None:
+            stmt = stmt.where(alert_logs.c.controlador_id == controlador_id)
+        if empresa_id is not None:
+            stmt = stmt.where(alert_logs.c.empresa_id == empresa_id)
+        return stmt
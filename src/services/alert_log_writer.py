@@ -0,0 +1,163 @@
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import and_, bindparam, insert, update
+from src.adapters.orm import alert_logs
+from src.services.event_bus import ControllerEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AlertLogWriter:
+    """Persists 'alert' events to alert_logs in batches, off the ingest path.
+
+    The event handler only enqueues (never blocks, never touches the
+    database). A background thread drains the queue every `flush_seconds` or
+    as soon as `batch_size` records are waiting, and writes the whole batch in
+    one transaction: an executemany INSERT for new episodes followed by an
+    executemany UPDATE closing the episodes that cleared. When the queue is
+    full new records are dropped and counted; a failed batch is retried on
+    the next flush.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        batch_size: int = 500,
+        flush_seconds: float = 1.0,
+        max_queue: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self._queue: "queue.Queue[ControllerEvent]" = queue.Queue(maxsize=max_queue)
+        self._retry: List[ControllerEvent] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def on_event(self, event: ControllerEvent) -> None:
+        """EventBus handler for 'alert' events"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of records written"""
+        batch = self._retry
+        self._retry = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return 0
+
+        written = 0
+        for i in range(0, len(batch), self.batch_size):
+            chunk = batch[i:i + self.batch_size]
+            try:
+                self._write(chunk)
+                written += len(chunk)
+            except Exception as e:
+                self.failed_batches += 1
+                logger.warning("Could not write %d alert log records: %s", len(chunk), e)
+                self._retry = batch[i:][-self.max_queue:]
+                break
+        self.written += written
+        return written
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='alert-log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_seconds * 2)
+        self.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            # Wake early when a full batch is already waiting
+            self._stop.wait(self.flush_seconds if self._queue.qsize() < self.batch_size else 0)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Alert log flush failed")
+
+    def _write(self, events: List[ControllerEvent]) -> None:
+        inserts, clears = build_alert_log_rows(events)
+        session = self.session_factory()
+        try:
+            if inserts:
+                session.execute(insert(alert_logs), inserts)
+            if clears:
+                session.execute(_CLOSE_EPISODE, clears)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+# Close the open episode of a rule; episodes opened after the clear are left alone
+_CLOSE_EPISODE = (
+    update(alert_logs)
+    .where(and_(
+        alert_logs.c.controlador_id == bindparam('c_controlador_id'),
+        alert_logs.c.rule_id == bindparam('c_rule_id'),
+        alert_logs.c.cleared_at.is_(None),
+        alert_logs.c.fired_at <= bindparam('c_cleared_at')
+    ))
+    .values(cleared_at=bindparam('c_cleared_at'))
+    .execution_options(synchronize_session=False)
+)
+
+
+def build_alert_log_rows(events: List[ControllerEvent]) -> Tuple[List[Dict], List[Dict]]:
+    """Split alert events into rows to insert and episode-closing parameters.
+
+    A clear whose fire is in the same batch is folded into the inserted row.
+    'changed' rules are instantaneous, so their episodes are closed on insert.
+    """
+    inserts: List[Dict] = []
+    clears: List[Dict] = []
+    open_rows: Dict[Tuple[int, str], Dict] = {}
+    for event in events:
+        rule_id = event.data.get('rule_id')
+        key = (event.controller_id, rule_id)
+        if event.data.get('state') == 'fired':
+            rule = event.data.get('rule') or {}
+            row = {
+                "controlador_id": event.controller_id,
+                "empresa_id": event.data.get('empresa_id'),
+                "rule_id": rule_id,
+                "fired_at": event.tstamp,
+                "cleared_at": event.tstamp if rule.get('when') == 'changed' else None,
+                "details": rule
+            }
+            inserts.append(row)
+            if row["cleared_at"] is None:
+                open_rows[key] = row
+        else:
+            row = open_rows.pop(key, None)
+            if row is not None:
+                row["cleared_at"] = event.tstamp
+            else:
+                clears.append({
+                    "c_controlador_id": event.controller_id,
+                    "c_rule_id": rule_id,
+                    "c_cleared_at": event.tstamp
+                })
+    return inserts, clears
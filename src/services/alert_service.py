@@ -0,0 +1,357 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from src.domain.model import SENSOR_COUNT, sensor_mask
+from src.adapters.repository import EmpresaRepository
+from src.queries.queries import AlertQueries
+from src.services.event_bus import ControllerEvent, EventBus
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidAlertRule(ValueError):
+    pass
+
+
+class AlertRule:
+    """A compiled rule from Controlador.config['alerts'].
+
+    Supported forms (sensors numbered 1..6):
+        {"id": "door", "sensor": 2, "when": "on"}
+        {"id": "door", "sensor": 2, "when": "off"}
+        {"id": "s4", "sensor": 4, "when": "changed"}
+        {"id": "pump", "sensor": 1, "when": "on_for", "minutes": 30}
+    with an optional "cooldown" in seconds between two firings of the rule.
+    """
+    __slots__ = ('id', 'kind', 'bit', 'seconds', 'cooldown', 'spec')
+
+    ON = 'on'
+    OFF = 'off'
+    CHANGED = 'changed'
+    ON_FOR = 'on_for'
+    KINDS = (ON, OFF, CHANGED, ON_FOR)
+
+    def __init__(self, spec: Dict[str, Any], default_cooldown: float):
+        kind = spec.get('when')
+        sensor = spec.get('sensor')
+        if kind not in self.KINDS:
+            raise InvalidAlertRule(f"Unknown alert condition: {kind}")
+        if not isinstance(sensor, int) or not 1 <= sensor <= SENSOR_COUNT:
+            raise InvalidAlertRule(f"Invalid sensor: {sensor}")
+        self.id = str(spec.get('id') or f"sensor{sensor}_{kind}")
+        self.kind = kind
+        self.bit = 1 << (sensor - 1)
+        self.seconds = float(spec.get('minutes', 0)) * 60
+        if kind == self.ON_FOR and self.seconds <= 0:
+            raise InvalidAlertRule("on_for rules need a positive 'minutes'")
+        self.cooldown = float(spec.get('cooldown', default_cooldown))
+        self.spec = spec
+
+
+def compile_rules(config: Optional[Dict[str, Any]], default_cooldown: float = 300.0) -> List[AlertRule]:
+    """Compile a controller's alert rules, skipping (and logging) invalid ones"""
+    rules = []
+    for spec in (config or {}).get('alerts') or []:
+        try:
+            rules.append(AlertRule(spec, default_cooldown))
+        except (InvalidAlertRule, TypeError, ValueError) as e:
+            logger.warning("Ignoring alert rule %r: %s", spec, e)
+    return rules
+
+
+class _ControllerAlerts:
+    """Per-controller evaluation state"""
+    __slots__ = ('rules', 'index', 'watched_bits', 'compiled_at', 'empresa_id', 'prev_mask',
+                 'active', 'last_fired', 'timer_gen')
+
+    def __init__(self, rules: List[AlertRule], empresa_id: Optional[int], compiled_at: float):
+        self.rules = rules
+        self.index = {rule.id: i for i, rule in enumerate(rules)}
+        self.watched_bits = 0
+        for rule in rules:
+            self.watched_bits |= rule.bit
+        self.compiled_at = compiled_at
+        self.empresa_id = empresa_id
+        self.prev_mask: Optional[int] = None
+        n = len(rules)
+        self.active = [False] * n
+        self.last_fired = [float('-inf')] * n
+        self.timer_gen = [0] * n
+
+
+class AlertEngine:
+    """Evaluates compiled alert rules against each reading's sensor bitmask.
+
+    Rules are evaluated inline on 'signal' events. Readings that do not touch
+    a watched sensor bit cost one XOR and one AND. Level rules ('on'/'off')
+    latch: they fire when the condition becomes true and clear when it stops.
+    'changed' fires on every change of the bit. Every rule is rate-limited by
+    its cooldown; a fire the cooldown suppresses does not latch, so it is
+    never followed by a 'cleared'. 'on_for' rules arm a timer when the sensor turns on; the
+    timer thread fires them if the sensor is still on when it expires.
+    Fired and cleared alerts are published back on the event bus as 'alert'
+    events.
+    """
+
+    def __init__(
+        self,
+        event_bus: EventBus,
+        default_cooldown: float = 300.0,
+        recompile_seconds: float = 60.0,
+        tick_seconds: float = 1.0,
+        history_size: int = 100
+    ):
+        self.event_bus = event_bus
+        self.default_cooldown = default_cooldown
+        self.recompile_seconds = recompile_seconds
+        self.tick_seconds = tick_seconds
+        self.history_size = history_size
+        self.suppressed = 0
+        self._controllers: Dict[int, _ControllerAlerts] = {}
+        self._history: Dict[int, deque] = {}
+        self._timers: List = []
+        self._timer_seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        event_bus.subscribe(self.on_event, kinds=[ControllerEvent.SIGNAL])
+
+    def on_event(self, event: ControllerEvent) -> None:
+        values = event.data.get('values') or {}
+        self.evaluate(
+            event.controller_id,
+            event.tstamp.timestamp(),
+            sensor_mask(values),
+            config=event.data.get('config'),
+            empresa_id=event.data.get('empresa_id')
+        )
+
+    def evaluate(
+        self,
+        controller_id: int,
+        tstamp: float,
+        mask: int,
+        config: Optional[Dict[str, Any]] = None,
+        empresa_id: Optional[int] = None
+    ) -> None:
+        fired = []
+        with self._lock:
+            state = self._controllers.get(controller_id)
+            if state is None or (config is not None and tstamp - state.compiled_at > self.recompile_seconds):
+                state = self._compile(controller_id, config, empresa_id, tstamp, state)
+            if not state.rules:
+                state.prev_mask = mask
+                return
+
+            prev = state.prev_mask
+            changed = state.watched_bits if prev is None else (prev ^ mask) & state.watched_bits
+            state.prev_mask = mask
+            if not changed:
+                return
+
+            for i, rule in enumerate(state.rules):
+                if not changed & rule.bit:
+                    continue
+                on = bool(mask & rule.bit)
+                if rule.kind == AlertRule.CHANGED:
+                    if prev is not None:
+                        self._fire(controller_id, state, i, tstamp, fired)
+                elif rule.kind == AlertRule.ON_FOR:
+                    state.timer_gen[i] += 1
+                    if on:
+                        heapq.heappush(self._timers, (
+                            tstamp + rule.seconds, next(self._timer_seq), controller_id, rule.id, state.timer_gen[i]
+                        ))
+                    elif state.active[i]:
+                        self._clear(controller_id, state, i, tstamp, fired)
+                else:
+                    condition = on if rule.kind == AlertRule.ON else not on
+                    if condition and not state.active[i]:
+                        self._fire(controller_id, state, i, tstamp, fired)
+                    elif not condition and state.active[i]:
+                        self._clear(controller_id, state, i, tstamp, fired)
+        self._publish(fired)
+
+    def tick(self, now: float) -> None:
+        """Fire the windowed ('on_for') rules whose timer expired"""
+        fired = []
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                due, _, controller_id, rule_id, generation = heapq.heappop(self._timers)
+                state = self._controllers.get(controller_id)
+                i = state.index.get(rule_id) if state is not None else None
+                if i is None or state.timer_gen[i] != generation:
+                    continue
+                if not state.active[i]:
+                    self._fire(controller_id, state, i, due, fired)
+        self._publish(fired)
+
+    def invalidate(self, controller_id: int) -> None:
+        """Recompile the controller's rules on its next reading (after a config change)"""
+        with self._lock:
+            state = self._controllers.get(controller_id)
+            if state is not None:
+                state.compiled_at = float('-inf')
+
+    def active_rules(self, controller_id: int) -> Dict[str, bool]:
+        state = self._controllers.get(controller_id)
+        if state is None:
+            return {}
+        return {rule.id: state.active[i] for i, rule in enumerate(state.rules)}
+
+    def recent(self, controller_id: int) -> List[Dict]:
+        return list(self._history.get(controller_id, ()))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='alert-timers', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_seconds * 2)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.tick(time.time())
+            except Exception:
+                logger.exception("Alert timer tick failed")
+
+    def _compile(self, controller_id, config, empresa_id, now, old_state) -> _ControllerAlerts:
+        state = _ControllerAlerts(compile_rules(config, self.default_cooldown), empresa_id, now)
+        if old_state is not None:
+            # Keep latches, cooldowns and timers for rules that survived the recompile
+            for i, rule in enumerate(state.rules):
+                j = old_state.index.get(rule.id)
+                if j is not None:
+                    state.active[i] = old_state.active[j]
+                    state.last_fired[i] = old_state.last_fired[j]
+                    state.timer_gen[i] = old_state.timer_gen[j]
+            state.prev_mask = old_state.prev_mask
+            state.empresa_id = state.empresa_id or old_state.empresa_id
+        self._controllers[controller_id] = state
+        return state
+
+    def _fire(self, controller_id: int, state: _ControllerAlerts, i: int, tstamp: float, out: List) -> None:
+        rule = state.rules[i]
+        if tstamp - state.last_fired[i] < rule.cooldown:
+            # Not latched either: a suppressed fire must not produce a lone 'cleared'
+            self.suppressed += 1
+            return
+        if rule.kind != AlertRule.CHANGED:
+            state.active[i] = True
+        state.last_fired[i] = tstamp
+        out.append(self._record(controller_id, state, rule, tstamp, 'fired'))
+
+    def _clear(self, controller_id: int, state: _ControllerAlerts, i: int, tstamp: float, out: List) -> None:
+        state.active[i] = False
+        out.append(self._record(controller_id, state, state.rules[i], tstamp, 'cleared'))
+
+    def _record(self, controller_id, state, rule, tstamp, alert_state) -> ControllerEvent:
+        event = ControllerEvent(ControllerEvent.ALERT, controller_id, datetime.fromtimestamp(tstamp), {
+            "rule_id": rule.id,
+            "rule": rule.spec,
+            "state": alert_state,
+            "empresa_id": state.empresa_id
+        })
+        history = self._history.get(controller_id)
+        if history is None:
+            history = self._history[controller_id] = deque(maxlen=self.history_size)
+        history.append(event.to_dict())
+        return event
+
+    def _publish(self, events: List[ControllerEvent]) -> None:
+        for event in events:
+            self.event_bus.publish(event)
+
+
+class AlertService:
+    def __init__(
+        self,
+        empresa_repo: EmpresaRepository,
+        session: Session,
+        engine: Optional[AlertEngine] = None
+    ):
+        self.empresa_repo = empresa_repo
+        self.session = session
+        self.engine = engine
+
+    def get_controller_alerts(self, controlador_id: str) -> List[Dict]:
+        """Get the controller's alert rules with their current state"""
+        controller = self.empresa_repo.get_controlador(controlador_id)
+        if not controller:
+            raise ValueError(f"Controller not found: {controlador_id}")
+
+        active = self.engine.active_rules(controller.id) if self.engine else {}
+        return [
+            {
+                "id": rule.id,
+                "sensor": rule.spec.get('sensor'),
+                "when": rule.kind,
+                "minutes": rule.spec.get('minutes'),
+                "cooldown": rule.cooldown,
+                "active": active.get(rule.id, False)
+            }
+            for rule in compile_rules(controller.config)
+        ]
+
+    def get_controller_alert_logs(
+        self,
+        controlador_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """Get a page of the controller's alert history, newest first"""
+        before = None
+        if cursor:
+            try:
+                fired_at, log_id = cursor.split(',')
+                before = (datetime.fromisoformat(fired_at), int(log_id))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+
+        rows = AlertQueries(self.session).get_logs(
+            controlador_id=int(controlador_id), limit=limit, before=before
+        )
+        next_cursor = None
+        if rows and len(rows) == limit:
+            next_cursor = f"{rows[-1].fired_at.isoformat()},{rows[-1].id}"
+        return {"logs": [_log_to_dict(row) for row in rows], "next_cursor": next_cursor}
+
+    def get_controller_alert_counts(self, controlador_id: str, start: datetime, end: datetime) -> List[Dict]:
+        """Get the number of alerts fired per rule and day"""
+        rows = AlertQueries(self.session).count_per_rule_per_day(start, end, controlador_id=int(controlador_id))
+        return [
+            {"rule_id": row.rule_id, "day": row.day.isoformat(), "count": row.count}
+            for row in rows
+        ]
+
+    def get_open_alerts(self, controlador_id: Optional[str] = None, empresa_id: Optional[int] = None) -> List[Dict]:
+        """Get the alerts that fired and have not cleared yet"""
+        rows = AlertQueries(self.session).get_open(
+            controlador_id=int(controlador_id) if controlador_id is not None else None,
+            empresa_id=empresa_id
+        )
+        return [_log_to_dict(row) for row in rows]
+
+
+def _log_to_dict(row) -> Dict:
+    return {
+        "id": row.id,
+        "controller_id": row.controlador_id,
+        "empresa_id": row.empresa_id,
+        "rule_id": row.rule_id,
+        "fired_at": row.fired_at.isoformat(),
+        "cleared_at": row.cleared_at.isoformat() if row.cleared_at else None,
+        "rule": row.details
+    }
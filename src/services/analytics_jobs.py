@@ -0,0 +1,220 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from src.adapters.repository import EmpresaRepository
+from src.queries.queries import SignalQueries
+from src.services.controller_analytics_service import ControllerAnalyticsService
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class UnknownMetric(ValueError):
+    pass
+
+
+class TooManyJobs(Exception):
+    """max_jobs reports are already pending or running"""
+    pass
+
+
+class AnalyticsJob:
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, key: Tuple, owner_id: Optional[int] = None, empresa_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        # Who submitted it and whose controller it reports on: checked by the job routes
+        self.owner_id = owner_id
+        self.empresa_id = empresa_id
+        self.status = self.PENDING
+        self.progress = 0.0
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        controller_id, metric, start_date, end_date = self.key
+        data = {
+            "job_id": self.id,
+            "controller_id": controller_id,
+            "metric": metric,
+            "start_date": start_date,
+            "end_date": end_date,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.status == self.DONE:
+            data["result"] = self.result
+        return data
+
+
+class AnalyticsJobManager:
+    """Runs long-range analytics on a background thread pool and caches the results.
+
+    Jobs are keyed by (controller, metric, start, end): submitting a report that
+    is already running or still cached returns the existing job. Finished jobs
+    are evicted to make room; once `max_jobs` are still unfinished, new reports
+    are refused with TooManyJobs. The registry is per process, so job polling must reach the process that accepted the job
+    (the server runs a single worker, see gunicorn.conf.py).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_workers: int = 2,
+        cache_ttl_seconds: int = 600,
+        max_jobs: int = 256,
+        chunk_days: int = 7
+    ):
+        self.session_factory = session_factory
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_jobs = max_jobs
+        self.chunk = timedelta(days=chunk_days)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analytics-job')
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, AnalyticsJob]" = OrderedDict()
+        self._jobs_by_key: Dict[Tuple, AnalyticsJob] = {}
+        self._builders = {
+            'uptime-downtime': ControllerAnalyticsService.build_uptime_downtime,
+            'operational-hours': ControllerAnalyticsService.build_operational_hours,
+        }
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._builders)
+
+    def submit(
+        self,
+        controller_id: str,
+        metric: str,
+        start_date: datetime,
+        end_date: datetime,
+        owner_id: Optional[int] = None,
+        empresa_id: Optional[int] = None
+    ) -> AnalyticsJob:
+        """Start a job, or attach to a running or cached one for the same report"""
+        if metric not in self._builders:
+            raise UnknownMetric(f"Unknown metric: {metric}")
+        key = (str(controller_id), metric, start_date.isoformat(), end_date.isoformat())
+
+        with self._lock:
+            self._evict()
+            existing = self._jobs_by_key.get(key)
+            if existing and existing.status not in (AnalyticsJob.FAILED, AnalyticsJob.CANCELLED):
+                return existing
+
+            if sum(1 for job in self._jobs.values() if not job.finished) >= self.max_jobs:
+                raise TooManyJobs(f"{self.max_jobs} analytics jobs are already queued or running")
+
+            job = AnalyticsJob(key, owner_id=owner_id, empresa_id=empresa_id)
+            self._jobs[job.id] = job
+            self._jobs_by_key[key] = job
+            job.future = self._executor.submit(self._run, job, start_date, end_date)
+            return job
+
+    def get(self, job_id: str) -> Optional[AnalyticsJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; a running job stops at its next chunk boundary"""
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job._cancel.set()
+        if job.future and job.future.cancel():
+            self._finish(job, AnalyticsJob.CANCELLED)
+        return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: AnalyticsJob, start_date: datetime, end_date: datetime) -> None:
+        controller_id, metric = job.key[0], job.key[1]
+        job.status = AnalyticsJob.RUNNING
+        session = self.session_factory()
+        try:
+            empresa_repo = EmpresaRepository(session)
+            signal_queries = SignalQueries(session)
+            controller = empresa_repo.get_controlador(controller_id)
+            if not controller:
+                raise ValueError(f"Controller not found: {controller_id}")
+
+            # The fetch dominates for long ranges, so it is done chunk by chunk
+            # (progress + cancellation points) and the metric is computed once.
+            rows = []
+            windows = self._windows(start_date, end_date)
+            for i, (chunk_start, chunk_end) in enumerate(windows):
+                if job._cancel.is_set():
+                    raise JobCancelled()
+                rows.extend(signal_queries.get_sensor_rows([int(controller_id)], chunk_start, chunk_end))
+                job.progress = 0.9 * (i + 1) / len(windows)
+
+            if job._cancel.is_set():
+                raise JobCancelled()
+            service = ControllerAnalyticsService(empresa_repo, signal_queries)
+            job.result = self._builders[metric](service, controller, rows, start_date, end_date)
+            job.progress = 1.0
+            self._finish(job, AnalyticsJob.DONE)
+        except JobCancelled:
+            self._finish(job, AnalyticsJob.CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, AnalyticsJob.FAILED)
+        finally:
+            session.close()
+
+    def _windows(self, start_date: datetime, end_date: datetime) -> List[Tuple[datetime, datetime]]:
+        """Split [start, end] into consecutive non-overlapping fetch windows"""
+        windows = []
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + self.chunk, end_date)
+            # between() is inclusive, so stop just before the next window starts
+            windows.append((chunk_start, chunk_end if chunk_end == end_date else chunk_end - timedelta(microseconds=1)))
+            if chunk_end == end_date:
+                break
+            chunk_start = chunk_end
+        return windows
+
+    def _finish(self, job: AnalyticsJob, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now()
+        job.finished_monotonic = time.monotonic()
+
+    def _evict(self) -> None:
+        """Drop expired results and keep the registry bounded (caller holds the lock)"""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            expired = job.finished and now - job.finished_monotonic > self.cache_ttl_seconds
+            overflow = len(self._jobs) >= self.max_jobs and job.finished
+            if expired or overflow:
+                del self._jobs[job_id]
+                if self._jobs_by_key.get(job.key) is job:
+                    del self._jobs_by_key[job.key]
@@ -0,0 +1,182 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+from src.domain.model import CONNECTION_WINDOW_SECONDS
+from src.lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+
+def configured_interval(config: Optional[Dict]) -> Optional[float]:
+    """Controlador.config['report_interval'] in seconds, if configured"""
+    value = (config or {}).get('report_interval')
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ArrivalStats:
+    """Running inter-arrival statistics per controller, used to decide online/offline.
+
+    Each controller owns one slot in a set of flat float arrays (last seen,
+    EWMA mean and variance of the gap between signals, sample count, prior).
+    `observe` is O(1) and `evaluate` decides the whole fleet with a few
+    vectorised operations.
+
+    A controller is considered offline once it has been silent longer than
+    mean + max(k * std, slack * mean), clamped to [min_timeout, max_timeout].
+    Until `min_samples` gaps have been seen the configured report interval
+    (or CONNECTION_WINDOW_SECONDS) stands in for the mean.
+
+    The arrays (and numpy) are only allocated when the first controller is
+    observed, so creating the app does not import numpy.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        k: float = 4.0,
+        slack: float = 0.5,
+        min_samples: int = 3,
+        min_timeout: float = 60.0,
+        max_timeout: float = 86400.0,
+        capacity: int = 1024
+    ):
+        self.alpha = alpha
+        self.k = k
+        self.slack = slack
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._lock = threading.Lock()
+        self._slots: Dict[int, int] = {}
+        self._ids: List[int] = []
+        self._capacity = capacity
+        self._last = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, controller_id: int) -> bool:
+        return controller_id in self._slots
+
+    def observe(self, controller_id: int, tstamp: float, prior_interval: Optional[float] = None) -> None:
+        """Record a signal arrival (epoch seconds)"""
+        # Request threads report concurrently, and _grow swaps the arrays:
+        # without the lock an update could land in an array already replaced
+        with self._lock:
+            slot = self._slots.get(controller_id)
+            if slot is None:
+                slot = self._add(controller_id)
+            if prior_interval:
+                self._prior[slot] = float(prior_interval)
+
+            last = self._last[slot]
+            self._last[slot] = tstamp if math.isnan(last) else max(last, tstamp)
+            if math.isnan(last) or tstamp <= last:
+                return
+
+            # Winsorise outages so one long silence does not teach us a huge interval
+            gap = min(tstamp - last, 2.0 * self._timeout(slot))
+            if self._count[slot] == 0:
+                self._mean[slot] = gap
+            else:
+                delta = gap - self._mean[slot]
+                self._mean[slot] += self.alpha * delta
+                self._var[slot] = (1.0 - self.alpha) * (self._var[slot] + self.alpha * delta * delta)
+            self._count[slot] += 1
+
+    def last_seen(self, controller_id: int) -> Optional[float]:
+        slot = self._slots.get(controller_id)
+        if slot is None or math.isnan(self._last[slot]):
+            return None
+        return float(self._last[slot])
+
+    def offline_after(self, controller_id: int, prior_interval: Optional[float] = None) -> float:
+        """Seconds of silence after which the controller counts as offline.
+
+        `prior_interval` (the configured report interval) is used until the
+        controller's own rhythm is learned, including for controllers this
+        process has not observed yet (after a restart, in another worker).
+        """
+        slot = self._slots.get(controller_id)
+        if prior_interval and (slot is None or self._count[slot] < self.min_samples):
+            return self._prior_timeout(float(prior_interval))
+        if slot is None:
+            return float(CONNECTION_WINDOW_SECONDS)
+        return self._timeout(slot)
+
+    def expected_next(self, controller_id: int) -> Optional[float]:
+        """Epoch seconds at which the next report is expected"""
+        slot = self._slots.get(controller_id)
+        if slot is None or math.isnan(self._last[slot]):
+            return None
+        interval = self._mean[slot] if self._count[slot] >= self.min_samples else self._prior[slot]
+        return float(self._last[slot] + interval)
+
+    def is_online(
+        self,
+        controller_id: int,
+        now: float,
+        last_seen: Optional[float] = None,
+        prior_interval: Optional[float] = None
+    ) -> bool:
+        """Online decision; `last_seen` overrides the tracked value (e.g. read from the database)"""
+        if last_seen is None:
+            last_seen = self.last_seen(controller_id)
+        if last_seen is None:
+            return False
+        return now - last_seen <= self.offline_after(controller_id, prior_interval)
+
+    def evaluate(self, now: float) -> Tuple[List[int], 'np.ndarray']:
+        """Online flags for every tracked controller, as (controller ids, bool array)"""
+        with self._lock:
+            n = len(self._ids)
+            if n == 0:
+                return [], np.zeros(0, dtype=bool)
+            return list(self._ids), (now - self._last[:n]) <= self._timeouts(slice(0, n))
+
+    def _timeout(self, slot: int) -> float:
+        # Scalar twin of _timeouts, kept in plain floats for the per-signal path
+        if self._count[slot] >= self.min_samples:
+            mean = float(self._mean[slot])
+            spread = max(self.k * math.sqrt(float(self._var[slot])), self.slack * mean)
+        else:
+            return self._prior_timeout(float(self._prior[slot]))
+        return min(max(mean + spread, self.min_timeout), self.max_timeout)
+
+    def _prior_timeout(self, interval: float) -> float:
+        return min(max(interval + self.slack * interval, self.min_timeout), self.max_timeout)
+
+    def _timeouts(self, slots: slice) -> 'np.ndarray':
+        learned = self._count[slots] >= self.min_samples
+        mean = np.where(learned, self._mean[slots], self._prior[slots])
+        spread = np.maximum(self.k * np.sqrt(np.where(learned, self._var[slots], 0.0)), self.slack * mean)
+        return np.clip(mean + spread, self.min_timeout, self.max_timeout)
+
+    def _add(self, controller_id: int) -> int:
+        """New slot for a controller (caller holds the lock)"""
+        slot = len(self._ids)
+        if self._last is None:
+            self._allocate(self._capacity)
+        elif slot == self._last.size:
+            self._grow()
+        self._ids.append(controller_id)
+        self._slots[controller_id] = slot
+        return slot
+
+    def _allocate(self, capacity: int) -> None:
+        self._last = np.full(capacity, np.nan)
+        self._mean = np.zeros(capacity)
+        self._var = np.zeros(capacity)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._prior = np.full(capacity, float(CONNECTION_WINDOW_SECONDS))
+
+    def _grow(self) -> None:
+        size = self._last.size
+        self._last = np.concatenate([self._last, np.full(size, np.nan)])
+        self._mean = np.concatenate([self._mean, np.zeros(size)])
+        self._var = np.concatenate([self._var, np.zeros(size)])
+        self._count = np.concatenate([self._count, np.zeros(size, dtype=np.int64)])
+        self._prior = np.concatenate([self._prior, np.full(size, float(CONNECTION_WINDOW_SECONDS))])
@@ -1,24 +1,97 @@
 from dataclasses import dataclass
-from typing import List, Set, Optional
+from typing import Callable, Dict, FrozenSet, List, Set, Optional
 from src.domain import model as m	
 from sqlalchemy.orm import Session
 
+_UNLOADED = object()
+
 class UserPermissions:
-    def __init__(self, user_id: int, role: str, permissions: Set[str], email: Optional[str] = None):
+    """The authenticated principal, built from the token claims alone.
+
+    The `User` and `Empresa` rows are only queried (once) when a handler
+    reads `user` or `empresa`; permission checks never touch the database.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        role: str,
+        permissions: Optional[Set[str]] = None,
+        email: Optional[str] = None,
+        empresa_id: Optional[int] = None,
+        user_loader: Optional[Callable[[], Optional[m.User]]] = None,
+        empresa_loader: Optional[Callable[[int], Optional[m.Empresa]]] = None,
+        permission_mask: Optional[int] = None
+    ):
         self.user_id = user_id
         self.role = role
         self.email = email
-        self.permissions = permissions
+        self.permission_mask = (permission_mask if permission_mask is not None
+                                else m.permissions_to_mask(permissions or ()))
+        self.empresa_id = empresa_id
+        self._user_loader = user_loader
+        self._empresa_loader = empresa_loader
+        self._user = _UNLOADED
+        self._empresa = _UNLOADED
+
+    @classmethod
+    def from_claims(
+        cls,
+        payload: Dict,
+        user_loader: Optional[Callable[[], Optional[m.User]]] = None,
+        empresa_loader: Optional[Callable[[int], Optional[m.Empresa]]] = None
+    ) -> 'UserPermissions':
+        # 'pm' is the permission bitmask; older tokens carry the names instead
+        return cls(
+            user_id=payload['user_id'],
+            email=payload.get('email'),
+            role=payload.get('role'),
+            permissions=payload.get('permissions'),
+            permission_mask=payload.get('pm'),
+            empresa_id=payload.get('empresa_id'),
+            user_loader=user_loader,
+            empresa_loader=empresa_loader
+        )
+
+    @property
+    def permissions(self) -> FrozenSet[str]:
+        return m.mask_to_permissions(self.permission_mask)
+
+    def has_mask(self, required: int) -> bool:
+        return self.permission_mask & required == required
+
+    @property
+    def is_admin(self) -> bool:
+        return str(self.role).upper() == 'ADMIN'
+
+    @property
+    def user(self) -> Optional[m.User]:
+        if self._user is _UNLOADED:
+            self._user = self._user_loader() if self._user_loader else None
+        return self._user
+
+    @property
+    def empresa(self) -> Optional[m.Empresa]:
+        if self._empresa is _UNLOADED:
+            if self.empresa_id is not None and self._empresa_loader:
+                self._empresa = self._empresa_loader(self.empresa_id)
+            else:
+                # Tokens issued before empresa_id was a claim
+                user = self.user
+                self._empresa = user.empresa if user else None
+        return self._empresa
 
     def has_permission(self, permission: str) -> bool:
-        return permission in self.permissions
+        return self.has_mask(m.required_mask([permission]))
 
     def can_access_empresa(self, empresa_id: int) -> bool:
         # Admin can access all empresas
-        if self.role == 'ADMIN':
+        if self.is_admin:
             return True
-        # TODO: Implement empresa-specific access logic
-        return False
+        if self.empresa_id is not None:
+            return self.empresa_id == int(empresa_id)
+        empresa = self.empresa
+        return empresa is not None and empresa.id == int(empresa_id)
 
 class PermissionQueries:
     def __init__(self, session: Session):
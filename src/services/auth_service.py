@@ -1,15 +1,93 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import hashlib
+import logging
+import threading
+import time
 import jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.orm import Session
 from src.domain.model import User, Role
-from src.config import get_jwt_secret
+from src.config import get_jwt_secret, get_token_cache_settings, get_password_hash_settings
+from src.services.password_hasher import PasswordHasher
+
+logger = logging.getLogger(__name__)
+
+# Dashboard streams authenticate with a ticket in the URL (EventSource cannot
+# send headers): short-lived and only good for one empresa's stream
+STREAM_SCOPE = 'stream'
+STREAM_TICKET_SECONDS = 60
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, keyed by a digest of secret + token.
+
+    Entries expire at the token's `exp` claim (or after `ttl_seconds` for
+    tokens without one), so a cached payload is never served past the point
+    where a full decode would reject it. `maxsize=0` disables caching.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(secret: str, token: str) -> bytes:
+        return hashlib.sha256(f"{secret}.{token}".encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: bytes, payload: Dict) -> None:
+        if self.maxsize <= 0:
+            return
+        exp = payload.get('exp')
+        expires_at = float(exp) if exp is not None else time.time() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# AuthService is created per request, so verified tokens and the hashing pool are process-wide
+_token_cache = TokenCache(**get_token_cache_settings())
+password_hasher = PasswordHasher(**get_password_hash_settings())
+
 
 class AuthService:
-    def __init__(self, session: Session, jwt_secret: str = None):
+    def __init__(
+        self,
+        session: Session,
+        jwt_secret: str = None,
+        token_cache: Optional[TokenCache] = None,
+        hasher: Optional[PasswordHasher] = None
+    ):
         self.session = session
         self.jwt_secret = jwt_secret or get_jwt_secret()
+        self.token_cache = token_cache if token_cache is not None else _token_cache
+        self.hasher = hasher or password_hasher
 
     def register_user(self, user_data: Dict) -> User:
         """Register a new user"""
@@ -17,8 +95,9 @@ class AuthService:
             first_name=user_data["first_name"],
             last_name=user_data["last_name"],
             email=user_data["email"],
-            password=user_data["password"],
-            role=user_data["role"]
+            password=None,
+            role=user_data["role"],
+            password_hash=self.hasher.hash(user_data["password"])
         )
         self.session.add(user)
         self.session.flush()
@@ -28,38 +107,78 @@ class AuthService:
         """Authenticate user and return JWT token"""
         user = self.session.query(User).filter_by(email=email).first()
         
-        if user and user.check_password(password):
+        if user and self.hasher.verify(user.password_hash, password):
+            if self.hasher.needs_rehash(user.password_hash):
+                self._rehash(user, password)
             token_data = {
                 'user_id': user.id,
                 'email': user.email,
                 'role': user.role.name,
-                'permissions': list(user.permissions),
+                'pm': user.permission_mask,
+                'empresa_id': user.empresa.id if user.empresa else None,
                 'exp': datetime.utcnow() + timedelta(days=1)
             }
             return jwt.encode(token_data, self.jwt_secret, algorithm='HS256')
         return None
 
+    def _rehash(self, user: User, password: str) -> None:
+        """Upgrade a stored hash to the configured method/cost (best effort)"""
+        try:
+            user.password_hash = self.hasher.hash(password)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            logger.warning("Could not rehash password for user %s: %s", user.id, e)
+
     def verify_token(self, token: str) -> Optional[Dict]:
         """Verify JWT token and return payload"""
+        key = TokenCache.key(self.jwt_secret, token)
+        payload = self.token_cache.get(key)
+        if payload is not None:
+            return payload
+
         try:
-            print(f"\nAttempting to verify token...")
-            print(f"Token: {token[:20]}...")
-            print(f"Secret used: {self.jwt_secret[:5]}...")
-            
             payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
-            print(f"Token decoded successfully!")
-            print(f"Payload: {payload}")
-            return payload
-            
         except jwt.ExpiredSignatureError as e:
-            print(f"Token expired: {str(e)}")
+            logger.debug("Token expired: %s", e)
             return None
         except jwt.InvalidTokenError as e:
-            print(f"Invalid token error: {str(e)}")
+            logger.debug("Invalid token: %s", e)
             return None
         except Exception as e:
-            print(f"Unexpected error during token verification: {str(e)}")
+            logger.warning("Unexpected error during token verification: %s", e)
+            return None
+
+        if payload.get('scope'):
+            logger.debug("Scoped ticket used as a session token")
+            return None
+        self.token_cache.put(key, payload)
+        return payload
+
+    def issue_stream_ticket(self, principal, empresa_id: int, ttl_seconds: float = STREAM_TICKET_SECONDS) -> str:
+        """Signed ticket that opens the dashboard stream of one empresa, for `ttl_seconds`"""
+        ticket_data = {
+            'user_id': principal.user_id,
+            'email': principal.email,
+            'role': principal.role,
+            'pm': principal.permission_mask,
+            'empresa_id': principal.empresa_id,
+            'scope': STREAM_SCOPE,
+            'stream_empresa': empresa_id,
+            'exp': datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        }
+        return jwt.encode(ticket_data, self.jwt_secret, algorithm='HS256')
+
+    def verify_stream_ticket(self, ticket: str, empresa_id: int) -> Optional[Dict]:
+        """Payload of a stream ticket issued for `empresa_id`, else None"""
+        try:
+            payload = jwt.decode(ticket, self.jwt_secret, algorithms=['HS256'])
+        except jwt.InvalidTokenError as e:
+            logger.debug("Invalid stream ticket: %s", e)
+            return None
+        if payload.get('scope') != STREAM_SCOPE or payload.get('stream_empresa') != empresa_id:
             return None
+        return payload
 
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
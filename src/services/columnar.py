@@ -0,0 +1,37 @@
+"""Signal serializers working straight from projection rows
+(id, controlador_id, tstamp, values, latitude, longitude), no ORM objects.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from src.domain.model import SENSOR_COUNT, sensor_mask
+
+
+def signal_rows_to_dicts(rows: Sequence[Any], phone_number: Optional[str]) -> List[Dict]:
+    """Row-per-signal format, identical to Signal.to_dict"""
+    return list(iter_signal_dicts(rows, phone_number))
+
+
+def iter_signal_dicts(rows: Iterable[Any], phone_number: Optional[str]) -> Iterator[Dict]:
+    """signal_rows_to_dicts one row at a time, for streamed responses"""
+    for row in rows:
+        values = row.values or {}
+        item = {
+            "id": row.id,
+            "controlador_id": phone_number,
+            "tstamp": row.tstamp.isoformat(),
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+        }
+        for i in range(1, SENSOR_COUNT + 1):
+            item[f"value_sensor{i}"] = bool(values.get(f"sensor{i}", False))
+        yield item
+
+
+def signal_rows_to_columns(rows: Sequence[Any]) -> Dict[str, List]:
+    """Column-per-field format: epoch-second timestamps and one sensor bitmask per signal (bit 0 is sensor1)"""
+    return {
+        "id": [row.id for row in rows],
+        "tstamp": [int(row.tstamp.timestamp()) for row in rows],
+        "latitude": [row.latitude for row in rows],
+        "longitude": [row.longitude for row in rows],
+        "sensors": [sensor_mask(row.values or {}) for row in rows],
+    }
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
-from typing import Dict, List
-import numpy as np
+from typing import Dict, List, Optional
 import src.domain.model as m
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
+from src.services.downsampling import downsample_step_indices, connectivity_segments
+from src.lazy_imports import lazy_import
+
+np = lazy_import('numpy')
 
 class ControllerAnalyticsService:
     def __init__(
@@ -16,11 +19,16 @@ class ControllerAnalyticsService:
 
     def get_uptime_downtime(self, controller_id: str, start_date: datetime, end_date: datetime) -> Dict:
         """Calculate uptime/downtime intervals for a controller"""
+        controller = self.empresa_repo.get_controlador(controller_id)
+        if not controller:
+            raise ValueError(f"Controller not found: {controller_id}")
         signals = self.signal_queries.get_by_timerange(controller_id, start_date, end_date)
-        controller = self.empresa_repo.get_by_id(controller_id)
-        
+        return self.build_uptime_downtime(controller, signals, start_date, end_date)
+
+    def build_uptime_downtime(self, controller: m.Controlador, signals: List, start_date: datetime, end_date: datetime) -> Dict:
+        """Uptime/downtime intervals from already fetched signals (anything with a tstamp)"""
         if not signals:
-            return self._create_empty_activity_data(start_date, end_date)
+            return self._create_empty_activity_data(controller, start_date, end_date)
 
         daily_activity = self._process_uptime_intervals(signals, start_date, end_date)
         
@@ -31,9 +39,14 @@ class ControllerAnalyticsService:
 
     def get_operational_hours(self, controller_id: str, start_date: datetime, end_date: datetime) -> Dict:
         """Calculate operational hours heatmap"""
+        controller = self.empresa_repo.get_controlador(controller_id)
+        if not controller:
+            raise ValueError(f"Controller not found: {controller_id}")
         signals = self.signal_queries.get_by_timerange(controller_id, start_date, end_date)
-        controller = self.empresa_repo.get_by_id(controller_id)
-        
+        return self.build_operational_hours(controller, signals, start_date, end_date)
+
+    def build_operational_hours(self, controller: m.Controlador, signals: List, start_date: datetime, end_date: datetime) -> Dict:
+        """Operational hours heatmap from already fetched signals (anything with tstamp and values)"""
         heatmap_data = self._calculate_hourly_activity(signals, start_date, end_date)
         
         return {
@@ -103,6 +116,50 @@ class ControllerAnalyticsService:
             ]
         }
 
+    def get_timeline_data(
+        self,
+        controlador_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        max_points: Optional[int] = None,
+        columnar: bool = False
+    ) -> Dict:
+        """Get a compact state/connectivity timeline, downsampled to about max_points.
+
+        `states` is a list of [epoch, sensor bitmask] pairs and `connectivity` a
+        list of [start, end, status] segments. Every state transition and
+        connectivity gap is kept whatever max_points is. With `columnar` both
+        are returned as one array per field instead.
+        """
+        controller = self.empresa_repo.get_controlador(controlador_id)
+        rows = self.signal_queries.get_sensor_rows([int(controlador_id)], start_date, end_date)
+
+        times = [row.tstamp.timestamp() for row in rows]
+        masks = [m.sensor_mask(row.values or {}) for row in rows]
+        kept = downsample_step_indices(times, masks, max_points, m.CONNECTION_WINDOW_SECONDS)
+
+        connectivity = connectivity_segments(
+            times, min(end_date, datetime.now()).timestamp(), m.CONNECTION_WINDOW_SECONDS
+        )
+        if columnar:
+            states = {"tstamp": [int(times[i]) for i in kept], "sensors": [masks[i] for i in kept]}
+            connectivity = {
+                "start": [segment[0] for segment in connectivity],
+                "end": [segment[1] for segment in connectivity],
+                "status": [segment[2] for segment in connectivity]
+            }
+        else:
+            states = [[int(times[i]), masks[i]] for i in kept]
+
+        return {
+            "sensor_config": controller.config if controller else None,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "signal_count": len(times),
+            "states": states,
+            "connectivity": connectivity
+        }
+
     def _process_uptime_intervals(self, signals: List, start_date: datetime, end_date: datetime) -> Dict:
         daily_activity = {}
         current_date = start_date.date()
@@ -113,16 +170,47 @@ class ControllerAnalyticsService:
 
         last_signal_time = None
         for signal in signals:
-            if last_signal_time and (signal.tstamp - last_signal_time).total_seconds() > 300:
+            if last_signal_time and (signal.tstamp - last_signal_time).total_seconds() > m.CONNECTION_WINDOW_SECONDS:
                 self._add_interval(daily_activity, last_signal_time, signal.tstamp, 'downtime')
             
             self._add_interval(daily_activity, signal.tstamp, 
-                             signal.tstamp + timedelta(minutes=5), 'uptime')
+                             signal.tstamp + timedelta(seconds=m.CONNECTION_WINDOW_SECONDS), 'uptime')
             
             last_signal_time = signal.tstamp
 
         return daily_activity
 
+    @staticmethod
+    def _add_interval(daily_activity: Dict, start: datetime, end: datetime, interval_type: str) -> None:
+        """Add an interval to the day(s) it covers, extending the previous one when contiguous"""
+        while start < end:
+            day_end = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+            chunk_end = min(end, day_end)
+            intervals = daily_activity.get(start.date().isoformat())
+            if intervals is not None:
+                last = intervals[-1] if intervals else None
+                if last and last["type"] == interval_type and last["end"] >= start.isoformat():
+                    last["end"] = max(last["end"], chunk_end.isoformat())
+                else:
+                    intervals.append({
+                        "start": start.isoformat(),
+                        "end": chunk_end.isoformat(),
+                        "type": interval_type
+                    })
+            start = chunk_end
+
+    @staticmethod
+    def _create_empty_activity_data(controller: m.Controlador, start_date: datetime, end_date: datetime) -> Dict:
+        daily_activity = {}
+        current_date = start_date.date()
+        while current_date <= end_date.date():
+            daily_activity[current_date.isoformat()] = []
+            current_date += timedelta(days=1)
+        return {
+            "controller_name": controller.name if controller else None,
+            "daily_activity": daily_activity
+        }
+
     def _calculate_hourly_activity(self, signals: List, start_date: datetime, end_date: datetime) -> Dict:
         heatmap_data = {}
         current_date = start_date.date()
@@ -162,10 +250,7 @@ class ControllerAnalyticsService:
 
     @staticmethod
     def _is_signal_active(signal) -> bool:
-        return any([
-            signal.value_sensor1, signal.value_sensor2, signal.value_sensor3,
-            signal.value_sensor4, signal.value_sensor5, signal.value_sensor6
-        ])
+        return m.sensor_mask(signal.values or {}) != 0
 
     @staticmethod
     def _create_empty_correlation_matrix() -> Dict:
@@ -3,15 +3,20 @@ from typing import Dict, List, Optional
 import src.domain.model as m
 from src.adapters.repository import EmpresaRepository
 from src.queries.queries import SignalQueries
+from src.services.arrival_stats import ArrivalStats, configured_interval
+from src.domain.model import CONNECTION_WINDOW_SECONDS
+from src.services.columnar import signal_rows_to_columns, signal_rows_to_dicts
 
 class ControllerMonitoringService:
     def __init__(
         self,
         empresa_repo: EmpresaRepository,
-        signal_queries: SignalQueries
+        signal_queries: SignalQueries,
+        arrival_stats: Optional[ArrivalStats] = None
     ):
         self.empresa_repo = empresa_repo
         self.signal_queries = signal_queries
+        self.arrival_stats = arrival_stats
 
     def get_controller_status(self, controller_id: str, user_permissions: List[str]) -> Dict:
         """Get current status of a controller"""
@@ -23,43 +28,55 @@ class ControllerMonitoringService:
             1,
             user_permissions
         )
-        controller = self.empresa_repo.get_by_id(controller_id)
+        controller = self.empresa_repo.get_controlador(controller_id)
         
         if not latest_signal:
             return {"status": "offline", "last_seen": None}
 
-        is_connected = self._check_connection_status(latest_signal[0].tstamp)
+        is_connected = self._is_connected(controller_id, latest_signal[0].tstamp, report_interval(controller))
         
-        return {
+        status = {
             "status": "online" if is_connected else "offline",
             "last_seen": latest_signal[0].tstamp.isoformat(),
             "controller_name": controller.name
         }
+        if self.arrival_stats is not None:
+            expected_next = self.arrival_stats.expected_next(int(controller_id))
+            status["expected_next_report"] = (
+                datetime.fromtimestamp(expected_next).isoformat() if expected_next else None
+            )
+        return status
 
-    def get_empresa_dashboard(self, empresa_id: str, user_permissions: List[str]) -> List[Dict]:
+    def get_empresa_dashboard(
+        self,
+        empresa_id: str,
+        user_permissions: List[str],
+        columnar: bool = False
+    ) -> List[Dict]:
         """Get dashboard data for all controllers in a company"""
         if 'view_dashboard' not in user_permissions:
             raise ValueError("Insufficient permissions")
         
         controllers = self.empresa_repo.get_by_empresa(empresa_id)
+        # Latest signals of every controller in one projection query
+        rows_by_controller = {controller.id: [] for controller in controllers}
+        if controllers:
+            for row in self.signal_queries.get_latest_rows(list(rows_by_controller), 10):
+                rows_by_controller[row.controlador_id].append(row)
         
         dashboard_data = []
         for controller in controllers:
-            latest_signals = self.signal_queries.get_latest_by_controller(
-                controller.id, 
-                10,
-                user_permissions
-            )
-            
-            # Use to_dict() instead of to_frontend_format()
-            formatted_signals = [signal.to_dict() for signal in latest_signals]
-            
+            rows = rows_by_controller[controller.id]
             controller_data = {
                 "id": str(controller.id),
                 "name": controller.name,
-                "signals": formatted_signals,
                 "config": controller.config
             }
+            if columnar:
+                controller_data["phone_number"] = controller.phone_number
+                controller_data["signals"] = signal_rows_to_columns(rows)
+            else:
+                controller_data["signals"] = signal_rows_to_dicts(rows, controller.phone_number)
             
             dashboard_data.append(controller_data)
 
@@ -78,7 +95,7 @@ class ControllerMonitoringService:
             latest_signal = self.signal_queries.get_latest_by_controller(
                 controller.id, 1, user_permissions
             )
-            if latest_signal and self._check_connection_status(latest_signal[0].tstamp):
+            if latest_signal and self._is_connected(controller.id, latest_signal[0].tstamp, report_interval(controller)):
                 connected += 1
             else:
                 disconnected += 1
@@ -88,6 +105,32 @@ class ControllerMonitoringService:
             "disconnected": disconnected
         }
 
+    def _is_connected(
+        self,
+        controller_id,
+        last_signal_time: datetime,
+        report_interval: Optional[float] = None
+    ) -> bool:
+        """Online decision, adaptive to the controller's reporting rhythm when stats are available.
+
+        The configured report interval stands in until the rhythm is learned,
+        so controllers this process has not seen report yet are not flapped.
+        """
+        if self.arrival_stats is None:
+            return self._check_connection_status(last_signal_time, report_interval)
+        return self.arrival_stats.is_online(
+            int(controller_id),
+            datetime.now().timestamp(),
+            last_seen=last_signal_time.timestamp(),
+            prior_interval=report_interval
+        )
+
     @staticmethod
-    def _check_connection_status(last_signal_time: datetime, threshold_minutes: int = 5) -> bool:
-        return (datetime.now() - last_signal_time) <= timedelta(minutes=threshold_minutes) 
\ No newline at end of file
+    def _check_connection_status(last_signal_time: datetime, report_interval: Optional[float] = None) -> bool:
+        window = max(CONNECTION_WINDOW_SECONDS, 1.5 * report_interval) if report_interval else CONNECTION_WINDOW_SECONDS
+        return (datetime.now() - last_signal_time) <= timedelta(seconds=window)
+
+
+def report_interval(controller) -> Optional[float]:
+    """The controller's configured report interval in seconds, if any"""
+    return configured_interval(controller.config if controller is not None else None) 
\ No newline at end of file
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.services.event_bus import ControllerEvent, EventBus
+
+
+class StreamClient:
+    """One connected dashboard: a bounded, coalescing buffer of pending updates.
+
+    Updates are keyed by (type, controller), so a newer reading or status for a
+    controller replaces the one still waiting to be sent. Alerts are never
+    coalesced. When the buffer is full the oldest update is dropped and the
+    client is told to resync instead of growing without bound.
+    """
+
+    def __init__(self, controller_ids: Iterable[int], max_pending: int = 256, empresa_id: Optional[int] = None):
+        self.controller_ids: Set[int] = set(controller_ids)
+        self.empresa_id = empresa_id
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.closed = False
+        self._pending: "OrderedDict[Tuple, Tuple[str, Dict]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._seq = 0
+
+    def offer(self, event_type: str, controller_id: int, payload: Dict) -> None:
+        with self._cond:
+            if event_type == 'alert':
+                self._seq += 1
+                key = (event_type, controller_id, self._seq)
+            else:
+                key = (event_type, controller_id)
+                self._pending.pop(key, None)
+            self._pending[key] = (event_type, payload)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._cond.notify()
+
+    def next_batch(self, window: float, heartbeat: float) -> Optional[Tuple[List[Tuple[str, Dict]], int]]:
+        """Wait for updates, let them coalesce for `window` seconds, then take them all.
+
+        Returns None when nothing arrived within `heartbeat` seconds.
+        """
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(heartbeat)
+            if not self._pending:
+                return None
+        time.sleep(window)
+        return self._take()
+
+    def _take(self) -> Tuple[List[Tuple[str, Dict]], int]:
+        with self._cond:
+            batch = list(self._pending.values())
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        return batch, dropped
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class AsyncStreamClient(StreamClient):
+    """StreamClient for asyncio servers: waiting for updates holds no thread.
+
+    Events are still offered from the publishing thread; the client's event
+    loop is woken through call_soon_threadsafe.
+    """
+
+    def __init__(self, controller_ids: Iterable[int], max_pending: int = 256,
+                 empresa_id: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None):
+        super().__init__(controller_ids, max_pending, empresa_id)
+        self._loop = loop or asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def offer(self, event_type: str, controller_id: int, payload: Dict) -> None:
+        super().offer(event_type, controller_id, payload)
+        self._wake()
+
+    def close(self) -> None:
+        super().close()
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # loop already closed, nobody is waiting
+
+    async def next_batch_async(self, window: float, heartbeat: float) -> Optional[Tuple[List[Tuple[str, Dict]], int]]:
+        """next_batch for coroutines"""
+        if not self._pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        if not self._pending:
+            return None
+        await asyncio.sleep(window)
+        return self._take()
+
+
+class DashboardStreamBroker:
+    """Fans controller events out to the dashboards watching those controllers.
+
+    A client registered for an empresa also picks up controllers added to it
+    after it connected, from their first reading (signal events carry the
+    controller's empresa_id).
+    """
+
+    def __init__(
+        self,
+        event_bus: EventBus,
+        coalesce_seconds: float = 0.5,
+        heartbeat_seconds: float = 15.0,
+        max_pending: int = 256,
+        max_clients: int = 1000
+    ):
+        self.coalesce_seconds = coalesce_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_pending = max_pending
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._clients: Set[StreamClient] = set()
+        self._by_controller: Dict[int, Set[StreamClient]] = {}
+        self._by_empresa: Dict[int, Set[StreamClient]] = {}
+        event_bus.subscribe(self.on_event)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def register(
+        self,
+        controller_ids: Iterable[int],
+        asynchronous: bool = False,
+        empresa_id: Optional[int] = None
+    ) -> Optional[StreamClient]:
+        """Attach a new client (an AsyncStreamClient if `asynchronous`); None when the stream limit is reached"""
+        if asynchronous:
+            client = AsyncStreamClient(controller_ids, self.max_pending, empresa_id)
+        else:
+            client = StreamClient(controller_ids, self.max_pending, empresa_id)
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return None
+            self._clients.add(client)
+            for controller_id in client.controller_ids:
+                self._by_controller.setdefault(controller_id, set()).add(client)
+            if empresa_id is not None:
+                self._by_empresa.setdefault(empresa_id, set()).add(client)
+        return client
+
+    def unregister(self, client: StreamClient) -> None:
+        client.close()
+        with self._lock:
+            self._clients.discard(client)
+            for controller_id in client.controller_ids:
+                watchers = self._by_controller.get(controller_id)
+                if watchers:
+                    watchers.discard(client)
+                    if not watchers:
+                        del self._by_controller[controller_id]
+            watchers = self._by_empresa.get(client.empresa_id)
+            if watchers:
+                watchers.discard(client)
+                if not watchers:
+                    del self._by_empresa[client.empresa_id]
+
+    def _adopt(self, controller_id: int, empresa_id: int) -> None:
+        """Watch a controller the empresa's clients did not know about when they connected"""
+        with self._lock:
+            clients = self._by_empresa.get(empresa_id)
+            if not clients:
+                return
+            watchers = self._by_controller.setdefault(controller_id, set())
+            for client in clients - watchers:
+                client.controller_ids.add(controller_id)
+                watchers.add(client)
+
+    def on_event(self, event: ControllerEvent) -> None:
+        if event.kind == ControllerEvent.SIGNAL and event.data.get('empresa_id') in self._by_empresa:
+            self._adopt(event.controller_id, event.data['empresa_id'])
+        watchers = self._by_controller.get(event.controller_id)
+        if not watchers:
+            return
+        if event.kind == ControllerEvent.SIGNAL:
+            event_type, payload = 'reading', event.data.get('signal') or event.to_dict()
+        elif event.kind in (ControllerEvent.OFFLINE, ControllerEvent.ONLINE):
+            event_type, payload = 'status', {
+                "controller_id": event.controller_id,
+                "status": event.kind,
+                "tstamp": event.tstamp.isoformat()
+            }
+        else:
+            event_type, payload = event.kind, event.to_dict()
+        for client in list(watchers):
+            client.offer(event_type, event.controller_id, payload)
+
+    def stream(self, client: StreamClient) -> Iterator[str]:
+        """Server-Sent Events frames for a client; unregisters it when the response closes"""
+        try:
+            yield "retry: 3000\n\n"
+            while not client.closed:
+                result = client.next_batch(self.coalesce_seconds, self.heartbeat_seconds)
+                if result is None:
+                    yield ": keepalive\n\n"
+                    continue
+                batch, dropped = result
+                if dropped:
+                    yield _sse('resync', {"dropped": dropped})
+                yield "".join(_sse(event_type, payload) for event_type, payload in batch)
+        finally:
+            self.unregister(client)
+
+    async def astream(self, client: AsyncStreamClient) -> AsyncIterator[str]:
+        """stream() for an AsyncStreamClient, for ASGI servers"""
+        try:
+            yield "retry: 3000\n\n"
+            while not client.closed:
+                result = await client.next_batch_async(self.coalesce_seconds, self.heartbeat_seconds)
+                if result is None:
+                    yield ": keepalive\n\n"
+                    continue
+                batch, dropped = result
+                if dropped:
+                    yield _sse('resync', {"dropped": dropped})
+                yield "".join(_sse(event_type, payload) for event_type, payload in batch)
+        finally:
+            self.unregister(client)
+
+
+def _sse(event_type: str, payload: Dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+from src.queries.queries import SignalQueries
+from src.services.event_bus import ControllerEvent
+
+CONTROLLER = 'controller'
+EMPRESA = 'empresa'
+
+
+class DataVersions:
+    """Version stamps for controllers and empresas, used as HTTP validators.
+
+    A stamp is a hash of a database fingerprint (each controller's config
+    hash and last signal time, plus the empresa row), so every worker process
+    hands out the same stamp for the same data. Fingerprints are cached for
+    `ttl_seconds`, so repeated polls cost a dict lookup; changes seen in this
+    process (signals on the event bus, config and empresa updates) bump a
+    local counter that drops the cached fingerprint at once, changes made by
+    other worker processes are seen within the TTL.
+
+    Last-Modified is the later of the newest signal and the moment this
+    process first saw the current stamp, so config edits (which have no
+    timestamp of their own) still move it forward.
+    """
+
+    def __init__(self, session_factory: Callable, ttl_seconds: float = 2.0, max_entries: int = 10000):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, int], int] = {}
+        self._cache: Dict[Tuple[str, int], Tuple[float, str, Optional[datetime]]] = {}
+        self._first_seen: Dict[Tuple[str, int], Tuple[str, datetime]] = {}
+
+    def on_event(self, event: ControllerEvent) -> None:
+        """EventBus handler: a new signal changes its controller and empresa"""
+        self.bump(CONTROLLER, event.controller_id)
+        empresa_id = event.data.get('empresa_id')
+        if empresa_id is not None:
+            self.bump(EMPRESA, empresa_id)
+
+    def bump(self, kind: str, key_id: int) -> None:
+        key = (kind, int(key_id))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            self._cache.pop(key, None)
+
+    def bump_controller(self, controller_id: int) -> None:
+        """A controller changed and its empresa is not known here: refresh every empresa"""
+        self.bump(CONTROLLER, controller_id)
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == EMPRESA]:
+                self._counters[key] = self._counters.get(key, 0) + 1
+                del self._cache[key]
+
+    def get(self, kind: str, key_id: int) -> Tuple[str, Optional[datetime]]:
+        """(stamp, last modified as an aware UTC datetime) for a controller or empresa"""
+        key = (kind, int(key_id))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1], cached[2]
+            counter = self._counters.get(key, 0)
+
+        fingerprint, last_modified = self._load(kind, key[1])
+        stamp = hashlib.sha1(repr(fingerprint).encode()).hexdigest()[:20]
+        if last_modified is not None:
+            last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+                self._first_seen.clear()
+            seen = self._first_seen.get(key)
+            if seen is None or seen[0] != stamp:
+                seen = (stamp, datetime.now(timezone.utc).replace(microsecond=0))
+                self._first_seen[key] = seen
+            if last_modified is None or seen[1] > last_modified:
+                last_modified = seen[1]
+            # A bump while loading wins: do not cache the stamp it invalidated
+            if self._counters.get(key, 0) == counter:
+                self._cache[key] = (now + self.ttl_seconds, stamp, last_modified)
+        return stamp, last_modified
+
+    def _load(self, kind: str, key_id: int) -> Tuple[tuple, Optional[datetime]]:
+        session = self.session_factory()
+        try:
+            queries = SignalQueries(session)
+            if kind == CONTROLLER:
+                rows = queries.get_version_rows(controller_id=key_id)
+                extra = ()
+            else:
+                rows = queries.get_version_rows(empresa_id=key_id)
+                extra = tuple(queries.get_empresa_version_row(key_id) or ())
+        finally:
+            session.close()
+        fingerprint = (extra, tuple(tuple(row) for row in rows))
+        last_seen = [row.last_seen for row in rows if row.last_seen is not None]
+        return fingerprint, max(last_seen) if last_seen else None
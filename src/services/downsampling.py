@@ -0,0 +1,66 @@
+from typing import List, Optional, Sequence
+
+
+def downsample_step_indices(
+    times: Sequence[float],
+    masks: Sequence[int],
+    max_points: Optional[int],
+    gap_seconds: float
+) -> List[int]:
+    """Pick the indices of a sensor-state series to send to the browser.
+
+    Sensor states are a step function, so min/max per bucket is meaningless;
+    what matters for an exact drawing is every state transition and every
+    connectivity gap. Those points (and the sample right before them, which
+    closes the previous run) are always kept. Whatever is left of the
+    `max_points` budget is filled with evenly spaced samples so the chart keeps
+    a readable density. The result can exceed `max_points` only when the
+    transitions alone do.
+    """
+    n = len(times)
+    if max_points is None or n <= max_points:
+        return list(range(n))
+
+    keep = {0, n - 1}
+    for i in range(1, n):
+        if masks[i] != masks[i - 1] or times[i] - times[i - 1] > gap_seconds:
+            keep.add(i - 1)
+            keep.add(i)
+
+    remaining = max_points - len(keep)
+    if remaining > 0:
+        span = times[-1] - times[0]
+        bucket_width = span / remaining if span > 0 else 0
+        next_edge = times[0]
+        for i in range(n):
+            # Already-kept indices may fall on an edge: count what is kept, not the edges
+            if len(keep) >= max_points:
+                break
+            if times[i] >= next_edge:
+                keep.add(i)
+                if bucket_width <= 0:
+                    break
+                next_edge = times[i] + bucket_width
+
+    return sorted(keep)
+
+
+def connectivity_segments(times: Sequence[float], end_time: float, gap_seconds: float) -> List[List]:
+    """Collapse signal times into [start, end, status] segments.
+
+    A signal keeps the controller connected for `gap_seconds` or until the next
+    signal, whichever comes first; consecutive connected spans are merged.
+    """
+    segments: List[List] = []
+    n = len(times)
+    for i in range(n):
+        start = times[i]
+        next_time = times[i + 1] if i + 1 < n else end_time
+        connected_until = min(next_time, start + gap_seconds)
+        if segments and segments[-1][2] == "connected" and segments[-1][1] >= start:
+            segments[-1][1] = connected_until
+        else:
+            segments.append([start, connected_until, "connected"])
+        if next_time > connected_until:
+            segments.append([connected_until, next_time, "disconnected"])
+    return [[int(s), int(e), status] for s, e, status in segments if e > s]
@@ -0,0 +1,63 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ControllerEvent:
+    kind: str
+    controller_id: int
+    tstamp: datetime
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    SIGNAL = 'signal'
+    OFFLINE = 'offline'
+    ONLINE = 'online'
+    ALERT = 'alert'
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "controller_id": self.controller_id,
+            "tstamp": self.tstamp.isoformat(),
+            **self.data
+        }
+
+
+class EventBus:
+    """In-process publish/subscribe for controller events.
+
+    Handlers run synchronously on the publisher's thread, in subscription
+    order, so they must be cheap (hand heavy work to a queue). A failing
+    handler is logged and does not affect the others or the publisher.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[int, tuple] = {}
+        self._next_token = 0
+
+    def subscribe(self, handler: Callable[[ControllerEvent], None], kinds: Optional[Iterable[str]] = None) -> int:
+        """Register a handler for some event kinds (all kinds if None); returns a token"""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._handlers[token] = (handler, frozenset(kinds) if kinds else None)
+            return token
+
+    def unsubscribe(self, token: int) -> None:
+        with self._lock:
+            self._handlers.pop(token, None)
+
+    def publish(self, event: ControllerEvent) -> None:
+        for handler, kinds in list(self._handlers.values()):
+            if kinds is not None and event.kind not in kinds:
+                continue
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Event handler failed for %s event", event.kind)
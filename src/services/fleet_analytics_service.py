@@ -0,0 +1,194 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.domain.model import SENSOR_COUNT, CONNECTION_WINDOW_SECONDS, sensor_mask
+from src.adapters.repository import EmpresaRepository
+from src.queries.queries import SignalQueries
+from src.config import get_postgres_uri
+from src.lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+SENSOR_KEYS = [f'value_sensor{i}' for i in range(1, SENSOR_COUNT + 1)]
+
+# Per-process session factory, created by the pool initializer
+_worker_session_factory = None
+
+
+def _init_worker(db_uri: str) -> None:
+    """Give every pool worker its own engine (connections must not cross processes)"""
+    global _worker_session_factory
+    engine = create_engine(db_uri, pool_size=1, max_overflow=0)
+    _worker_session_factory = sessionmaker(bind=engine)
+
+
+def _compute_chunk(controller_ids: List[int], start_date: datetime, end_date: datetime) -> Dict[int, Dict]:
+    """Fetch one chunk of controllers with a projection query and compute their metrics"""
+    session = _worker_session_factory()
+    try:
+        rows = SignalQueries(session).get_sensor_rows(controller_ids, start_date, end_date)
+    finally:
+        session.close()
+
+    series = {cid: ([], []) for cid in controller_ids}
+    for controlador_id, tstamp, values in rows:
+        times, masks = series[controlador_id]
+        times.append(tstamp.timestamp())
+        masks.append(sensor_mask(values or {}))
+
+    return {
+        cid: compute_controller_metrics(times, masks, start_date, end_date)
+        for cid, (times, masks) in series.items()
+    }
+
+
+def compute_controller_metrics(
+    times: Sequence[float],
+    masks: Sequence[int],
+    start_date: datetime,
+    end_date: datetime
+) -> Dict:
+    """Uptime, per-sensor duty cycle and sensor correlation for one controller.
+
+    `times` are epoch seconds in ascending order and `masks` the matching sensor
+    bitmasks. Each signal covers the time until the next one, capped at
+    CONNECTION_WINDOW_SECONDS; duty cycle is the share of that covered time a sensor was on.
+    """
+    range_seconds = max((end_date - start_date).total_seconds(), 0.0)
+    if not len(times):
+        return {
+            "signal_count": 0,
+            "uptime_seconds": 0.0,
+            "uptime_ratio": 0.0,
+            "duty_cycle": {key: 0.0 for key in SENSOR_KEYS},
+            "correlation": _empty_correlation()
+        }
+
+    t = np.asarray(times, dtype=np.float64)
+    bits = (np.asarray(masks, dtype=np.int64)[:, None] >> np.arange(SENSOR_COUNT)) & 1
+
+    gaps = np.diff(np.append(t, end_date.timestamp()))
+    covered = np.clip(gaps, 0.0, CONNECTION_WINDOW_SECONDS)
+    uptime = float(covered.sum())
+
+    if uptime > 0:
+        duty = (bits * covered[:, None]).sum(axis=0) / uptime
+    else:
+        duty = np.zeros(SENSOR_COUNT)
+
+    return {
+        "signal_count": int(t.size),
+        "uptime_seconds": uptime,
+        "uptime_ratio": uptime / range_seconds if range_seconds else 0.0,
+        "duty_cycle": {key: float(duty[i]) for i, key in enumerate(SENSOR_KEYS)},
+        "correlation": _correlation_matrix(bits)
+    }
+
+
+def _correlation_matrix(bits: 'np.ndarray') -> Dict:
+    if bits.shape[0] < 2:
+        return _empty_correlation()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.corrcoef(bits, rowvar=False)
+    corr = np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(corr, 1.0)
+    return {
+        s1: {s2: float(corr[i, j]) for j, s2 in enumerate(SENSOR_KEYS)}
+        for i, s1 in enumerate(SENSOR_KEYS)
+    }
+
+
+def _empty_correlation() -> Dict:
+    return {s1: {s2: 0.0 for s2 in SENSOR_KEYS} for s1 in SENSOR_KEYS}
+
+
+def chunk_ids(ids: Sequence[int], chunk_size: int) -> List[List[int]]:
+    """Split controller ids into consecutive chunks of at most chunk_size"""
+    return [list(ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+
+
+class FleetAnalyticsRunner:
+    """Computes analytics for many controllers at once on a process pool"""
+
+    # Chunks per worker: small enough to balance uneven controllers, large enough to amortise queries
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(
+        self,
+        empresa_repo: EmpresaRepository,
+        db_uri: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        self.empresa_repo = empresa_repo
+        self.db_uri = db_uri or get_postgres_uri()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def run(self, start_date: datetime, end_date: datetime, empresa_id: Optional[int] = None) -> Dict:
+        """Compute metrics for every controller of an empresa (or of every empresa)"""
+        refs = self.empresa_repo.get_controller_refs(empresa_id)
+        ids = [ref.id for ref in refs]
+
+        results: Dict[int, Dict] = {}
+        if ids:
+            chunk_size = self.chunk_size or max(
+                1, math.ceil(len(ids) / (self.max_workers * self.CHUNKS_PER_WORKER))
+            )
+            chunks = chunk_ids(ids, chunk_size)
+            workers = min(self.max_workers, len(chunks))
+            # spawn: the parent may hold open connections and background threads
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.db_uri,)
+            ) as pool:
+                futures = [pool.submit(_compute_chunk, chunk, start_date, end_date) for chunk in chunks]
+                for future in as_completed(futures):
+                    results.update(future.result())
+
+        return merge_fleet_report(refs, results, start_date, end_date)
+
+
+def merge_fleet_report(refs: List, results: Dict[int, Dict], start_date: datetime, end_date: datetime) -> Dict:
+    """Merge per-controller metrics into one report with fleet-wide summary"""
+    controllers = {}
+    total_uptime = 0.0
+    weighted_duty = np.zeros(SENSOR_COUNT)
+    signal_count = 0
+
+    for ref in refs:
+        metrics = results.get(ref.id)
+        if metrics is None:
+            continue
+        controllers[str(ref.id)] = {
+            "name": ref.name,
+            "empresa_id": ref.empresa_id,
+            **metrics
+        }
+        total_uptime += metrics["uptime_seconds"]
+        signal_count += metrics["signal_count"]
+        weighted_duty += np.array([metrics["duty_cycle"][key] for key in SENSOR_KEYS]) * metrics["uptime_seconds"]
+
+    range_seconds = (end_date - start_date).total_seconds()
+    count = len(controllers)
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "controller_count": count,
+        "controllers": controllers,
+        "summary": {
+            "signal_count": signal_count,
+            "uptime_ratio": total_uptime / (range_seconds * count) if count and range_seconds > 0 else 0.0,
+            "duty_cycle": {
+                key: float(weighted_duty[i] / total_uptime) if total_uptime else 0.0
+                for i, key in enumerate(SENSOR_KEYS)
+            }
+        }
+    }
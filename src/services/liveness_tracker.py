@@ -0,0 +1,172 @@
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from src.services.arrival_stats import ArrivalStats, configured_interval
+from src.services.event_bus import ControllerEvent, EventBus
+from src.queries.queries import SignalQueries
+
+logger = logging.getLogger(__name__)
+
+
+class LivenessTracker:
+    """Tracks each controller's next report deadline and emits offline/online events.
+
+    Deadlines live in a hashed timing wheel: `wheel_size` slots of
+    `tick_seconds`, each a set of controller ids. Refreshing a controller moves
+    it between two sets (O(1)); advancing the clock only visits the slots that
+    elapsed, and ids whose deadline is further than one wheel turn away simply
+    stay until their round comes. The allowed silence per controller comes
+    from ArrivalStats.
+    """
+
+    def __init__(
+        self,
+        arrival_stats: ArrivalStats,
+        event_bus: EventBus,
+        tick_seconds: float = 1.0,
+        wheel_size: int = 4096
+    ):
+        self.arrival_stats = arrival_stats
+        self.event_bus = event_bus
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self._wheel: List[Set[int]] = [set() for _ in range(wheel_size)]
+        self._deadline: Dict[int, float] = {}
+        self._slot_of: Dict[int, int] = {}
+        self._offline: Set[int] = set()
+        self._cursor: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self, controller_id: int, last_seen: float) -> None:
+        """A controller reported at `last_seen` (epoch seconds): push its deadline out"""
+        came_back = False
+        with self._lock:
+            deadline = last_seen + self.arrival_stats.offline_after(controller_id)
+            if deadline <= self._deadline.get(controller_id, -math.inf) and controller_id not in self._offline:
+                return
+            self._schedule(controller_id, deadline)
+            if controller_id in self._offline:
+                self._offline.discard(controller_id)
+                came_back = True
+        if came_back:
+            self.event_bus.publish(ControllerEvent(
+                ControllerEvent.ONLINE, controller_id, datetime.fromtimestamp(last_seen)
+            ))
+
+    def on_event(self, event: ControllerEvent) -> None:
+        """EventBus handler: signals refresh the deadline"""
+        self.refresh(event.controller_id, event.tstamp.timestamp())
+
+    def advance(self, now: float) -> List[int]:
+        """Expire every deadline up to `now`; returns the controllers that went offline"""
+        expired: List[Tuple[int, float]] = []
+        with self._lock:
+            target = self._tick(now)
+            if self._cursor is None:
+                self._cursor = target - 1
+            # A pause longer than a wheel turn still needs each slot visited just once
+            start = max(self._cursor + 1, target - self.wheel_size + 1)
+            for tick in range(start, target + 1):
+                bucket = self._wheel[tick % self.wheel_size]
+                if not bucket:
+                    continue
+                for controller_id in [c for c in bucket if self._deadline[c] <= now]:
+                    bucket.discard(controller_id)
+                    expired.append((controller_id, self._deadline.pop(controller_id)))
+                    del self._slot_of[controller_id]
+                    self._offline.add(controller_id)
+            self._cursor = target
+
+        for controller_id, deadline in expired:
+            self.event_bus.publish(ControllerEvent(
+                ControllerEvent.OFFLINE, controller_id, datetime.fromtimestamp(deadline)
+            ))
+        return [controller_id for controller_id, _ in expired]
+
+    def rebuild(self, last_seen_rows: Iterable[Tuple], now: Optional[float] = None) -> None:
+        """Load (controller id, last signal time[, config]) rows without emitting events.
+
+        The config's report_interval is the prior for controllers this
+        process has not learned yet. Controllers already refreshed by live
+        traffic keep their state.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._cursor is None:
+                self._cursor = self._tick(now)
+            for controller_id, last_seen, *config in last_seen_rows:
+                if last_seen is None or controller_id in self._deadline or controller_id in self._offline:
+                    continue
+                last_seen_ts = last_seen.timestamp()
+                prior_interval = configured_interval(config[0] if config else None)
+                if controller_id not in self.arrival_stats:
+                    self.arrival_stats.observe(controller_id, last_seen_ts, prior_interval=prior_interval)
+                deadline = last_seen_ts + self.arrival_stats.offline_after(controller_id, prior_interval)
+                if deadline <= now:
+                    self._offline.add(controller_id)
+                else:
+                    self._schedule(controller_id, deadline)
+
+    def status(self, controller_id: int) -> str:
+        if controller_id in self._offline:
+            return 'offline'
+        if controller_id in self._deadline:
+            return 'online'
+        return 'unknown'
+
+    def offline_ids(self) -> Set[int]:
+        with self._lock:
+            return set(self._offline)
+
+    def start(self, session_factory: Optional[Callable] = None) -> None:
+        """Start the ticking thread, rebuilding from the database first when possible"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(session_factory,), name='liveness-tracker', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_seconds * 2)
+
+    def _loop(self, session_factory: Optional[Callable]) -> None:
+        if session_factory is not None:
+            session = None
+            try:
+                session = session_factory()
+                self.rebuild(SignalQueries(session).get_last_seen_all())
+            except Exception as e:
+                logger.warning("Could not rebuild liveness state from the database: %s", e)
+            finally:
+                if session is not None:
+                    session.close()
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.advance(time.time())
+            except Exception:
+                logger.exception("Liveness tick failed")
+
+    def _schedule(self, controller_id: int, deadline: float) -> None:
+        old_slot = self._slot_of.get(controller_id)
+        if old_slot is not None:
+            self._wheel[old_slot].discard(controller_id)
+        tick = self._tick(deadline)
+        if self._cursor is not None and tick <= self._cursor:
+            # Already-elapsed deadline: expire on the next advance, not a wheel turn later
+            tick = self._cursor + 1
+        slot = tick % self.wheel_size
+        self._wheel[slot].add(controller_id)
+        self._slot_of[controller_id] = slot
+        self._deadline[controller_id] = deadline
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
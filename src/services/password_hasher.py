@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many password hash/verify operations are already waiting, or one timed out"""
+    pass
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a small dedicated thread pool.
+
+    Key derivation (scrypt/pbkdf2) releases the GIL, so moving it off the
+    request thread lets the worker keep serving other requests during a burst
+    of logins, while `max_workers` caps how many cores hashing may take.
+    At most `max_pending` operations may be queued or running; beyond that
+    callers get HasherBusy immediately instead of piling up. A caller that
+    waits longer than `timeout` also gets HasherBusy; the operation keeps its
+    slot until it actually finishes.
+    """
+
+    def __init__(
+        self,
+        method: str = 'scrypt',
+        max_workers: int = 2,
+        max_pending: int = 32,
+        timeout: float = 10.0
+    ):
+        self.method = method
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._method_prefix: Optional[str] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._pending = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    @property
+    def method_prefix(self) -> str:
+        """The fully parameterised method stored hashes start with (e.g. 'scrypt:32768:8:1')"""
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('probe', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def hash(self, password: str) -> str:
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._submit(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash was made with a different method or cost"""
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+    def stats(self) -> Dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "method": self.method_prefix,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "queued": max(self._pending - self.max_workers, 0),
+                "completed": completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else 0.0,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 2) if completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy("Password hashing queue is full")
+        with self._lock:
+            self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            future = self._executor.submit(self._run, fn, submitted, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            # Dropped if still queued; if running, its slot frees when it finishes
+            future.cancel()
+            with self._lock:
+                self._timed_out += 1
+            raise HasherBusy(f"Password hashing took longer than {self.timeout:g}s") from None
+
+    def _release(self, future: Optional[Future] = None) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _run(self, fn: Callable, submitted: float, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._completed += 1
+                self._wait_seconds += started - submitted
+                self._run_seconds += finished - started
@@ -0,0 +1,284 @@
+import cProfile
+import gc
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SAMPLE = 'sample'
+CPROFILE = 'cprofile'
+MEMORY = 'memory'
+MODES = (SAMPLE, CPROFILE, MEMORY)
+
+
+def _frame_name(code, module: str) -> str:
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame, root: str, max_depth: int = 128) -> str:
+    """'root;outer;...;inner' for a thread's current frame (the collapsed-stack format flame graphs read)"""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        names.append(_frame_name(frame.f_code, frame.f_globals.get('__name__', '?')))
+        frame = frame.f_back
+    names.append(root)
+    return ';'.join(reversed(names))
+
+
+class ProfileRun:
+    """One profiling window and what it collected"""
+
+    def __init__(self, run_id: int, mode: str, seconds: float, max_requests: Optional[int],
+                 endpoint: Optional[str], interval: float):
+        self.id = run_id
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.endpoint = endpoint
+        self.interval = interval
+        # The run only sees (and is only visible from) this process
+        self.worker = os.getpid()
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.requests = 0
+        # Threads currently serving a profiled request: thread id -> endpoint
+        self.threads: Dict[int, str] = {}
+        self.samples: Counter = Counter()
+        self.stats: Optional[pstats.Stats] = None
+        self.memory: List[Dict] = []
+        self.memory_stacks: Counter = Counter()
+        self.error: Optional[str] = None
+        self.stop_event = threading.Event()
+        # Guards `samples` and `stats` against readers while the run is active
+        self.lock = threading.Lock()
+
+    def matches(self, endpoint: str) -> bool:
+        return self.endpoint is None or self.endpoint == endpoint
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one 'frames count' line each (bytes of growth in memory mode)"""
+        with self.lock:
+            stacks = (self.memory_stacks if self.mode == MEMORY else self.samples).most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top_functions(self, limit: int = 50) -> List[Dict]:
+        with self.lock:
+            entries = list(self.stats.stats.items()) if self.stats is not None else []
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in entries:
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "own_ms": round(own * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+            })
+        rows.sort(key=lambda row: -row["cumulative_ms"])
+        return rows[:limit]
+
+    def to_dict(self) -> Dict:
+        data = {
+            "id": self.id,
+            "worker": self.worker,
+            "mode": self.mode,
+            "endpoint": self.endpoint,
+            "seconds": self.seconds,
+            "max_requests": self.max_requests,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "requests": self.requests,
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.mode == SAMPLE:
+            with self.lock:
+                data["samples"] = sum(self.samples.values())
+                data["stacks"] = len(self.samples)
+        elif self.mode == CPROFILE:
+            data["functions"] = self.top_functions()
+        else:
+            data["growth"] = self.memory
+        return data
+
+
+class _Traced:
+    """What the profiler attached to one request"""
+    __slots__ = ('run', 'thread_id', 'profile')
+
+    def __init__(self, run: ProfileRun, thread_id: int, profile: Optional[cProfile.Profile]):
+        self.run = run
+        self.thread_id = thread_id
+        self.profile = profile
+
+
+class Profiler:
+    """On-demand profiling of live traffic in this worker process, one run at a time.
+
+    `sample` mode walks the stacks of the threads serving profiled requests
+    every `interval_ms` (sys._current_frames, no tracing overhead in the
+    request threads) and counts collapsed stacks rooted at the endpoint.
+    `cprofile` mode runs a deterministic profiler around each profiled
+    request and aggregates the stats. `memory` mode diffs two tracemalloc
+    snapshots taken at the start and end of the window; tracing slows down
+    every allocation while it runs.
+
+    A run ends after `seconds`, after `requests` profiled requests, or on
+    stop(), whichever comes first. Request hooks cost one attribute read
+    while no run is active. Runs live in one process: with several server
+    workers, a run started through one only sees that worker's requests and
+    can only be read or stopped through it, so profile with one worker.
+    """
+
+    def __init__(self, max_seconds: float = 300.0, max_requests: int = 1000, default_interval_ms: float = 10.0):
+        self.max_seconds = max_seconds
+        self.max_requests = max_requests
+        self.default_interval_ms = default_interval_ms
+        self.active: Optional[ProfileRun] = None
+        self.last: Optional[ProfileRun] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(
+        self,
+        mode: str = SAMPLE,
+        seconds: Optional[float] = None,
+        requests: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        interval_ms: Optional[float] = None
+    ) -> ProfileRun:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (expected one of {', '.join(MODES)})")
+        if (seconds is not None and seconds <= 0) or (requests is not None and requests <= 0):
+            raise ValueError("seconds and requests must be positive")
+        interval_ms = interval_ms or self.default_interval_ms
+        if interval_ms < 1:
+            raise ValueError("interval_ms must be at least 1")
+
+        with self._lock:
+            if self.active is not None:
+                raise RuntimeError(f"Profile run {self.active.id} is still active")
+            run = ProfileRun(
+                next(self._ids), mode,
+                seconds=min(seconds or self.max_seconds, self.max_seconds),
+                max_requests=min(requests, self.max_requests) if requests else None,
+                endpoint=endpoint,
+                interval=interval_ms / 1000
+            )
+            started_tracing = False
+            if mode == MEMORY:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(25)
+                    started_tracing = True
+                gc.collect()
+                baseline = tracemalloc.take_snapshot()
+            else:
+                baseline = None
+            self.active = run
+
+        self._thread = threading.Thread(
+            target=self._run, args=(run, baseline, started_tracing), name='profiler', daemon=True
+        )
+        self._thread.start()
+        return run
+
+    def stop(self, timeout: float = 10.0) -> Optional[ProfileRun]:
+        """End the active run now and return it once its results are in"""
+        thread = self._thread
+        run = self.active
+        if run is not None:
+            run.stop_event.set()
+        if thread is not None:
+            thread.join(timeout)
+        return run or self.last
+
+    def request_started(self, endpoint: str) -> Optional[_Traced]:
+        run = self.active
+        if run is None or not run.matches(endpoint) or run.stop_event.is_set():
+            return None
+        thread_id = threading.get_ident()
+        profile = None
+        if run.mode == SAMPLE:
+            with self._lock:
+                run.threads[thread_id] = endpoint
+        elif run.mode == CPROFILE:
+            profile = cProfile.Profile()
+            profile.enable()
+        return _Traced(run, thread_id, profile)
+
+    def request_finished(self, traced: _Traced) -> None:
+        run = traced.run
+        if traced.profile is not None:
+            traced.profile.disable()
+        with self._lock:
+            run.threads.pop(traced.thread_id, None)
+            if run.finished_at is not None:
+                return
+            if traced.profile is not None:
+                with run.lock:
+                    if run.stats is None:
+                        run.stats = pstats.Stats(traced.profile)
+                    else:
+                        run.stats.add(traced.profile)
+            run.requests += 1
+            if run.max_requests and run.requests >= run.max_requests:
+                run.stop_event.set()
+
+    def _run(self, run: ProfileRun, baseline: Optional[tracemalloc.Snapshot], started_tracing: bool) -> None:
+        deadline = time.monotonic() + run.seconds
+        try:
+            if run.mode == SAMPLE:
+                own_id = threading.get_ident()
+                while not run.stop_event.wait(run.interval) and time.monotonic() < deadline:
+                    with self._lock:
+                        threads = dict(run.threads)
+                    if not threads:
+                        continue
+                    frames = sys._current_frames()
+                    stacks = [
+                        collapse_stack(frames[thread_id], endpoint)
+                        for thread_id, endpoint in threads.items()
+                        if thread_id in frames and thread_id != own_id
+                    ]
+                    del frames
+                    with run.lock:
+                        run.samples.update(stacks)
+            else:
+                run.stop_event.wait(max(deadline - time.monotonic(), 0))
+                if run.mode == MEMORY:
+                    self._diff_memory(run, baseline)
+        except Exception as e:
+            run.error = str(e)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            with self._lock:
+                run.finished_at = datetime.now()
+                run.threads.clear()
+                self.active = None
+                self.last = run
+
+    @staticmethod
+    def _diff_memory(run: ProfileRun, baseline: tracemalloc.Snapshot, limit: int = 30) -> None:
+        gc.collect()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = snapshot.compare_to(baseline.filter_traces(ignore), 'traceback')
+        for stat in diff:
+            if stat.size_diff <= 0:
+                continue
+            # Oldest frame first, the allocation site last
+            frames = [f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+            run.memory_stacks[';'.join(['memory'] + frames)] += stat.size_diff
+        for stat in sorted(diff, key=lambda s: -s.size_diff)[:limit]:
+            run.memory.append({
+                "location": str(stat.traceback[-1]) if len(stat.traceback) else '?',
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "traceback": [str(frame) for frame in stat.traceback],
+            })
@@ -0,0 +1,116 @@
+import contextlib
+import logging
+import re
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?|__\[POSTCOMPILE_\w+\]")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """Statement shape: literals and bind parameters become ?, IN lists (?...), whitespace collapsed"""
+    sql = _STRING.sub('?', statement)
+    sql = _PARAM.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('(?...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class QueryLog:
+    """Statements of one request (or one `capture_queries()` block), grouped by shape.
+
+    Logs nest: a request started inside a capture block (test client) also
+    counts its statements in the enclosing log.
+    """
+
+    def __init__(self, parent: Optional['QueryLog'] = None):
+        self.parent = parent
+        self.shapes: Counter = Counter()
+        self.total = 0
+
+    def add(self, statement: str) -> None:
+        shape = normalize_sql(statement)
+        log = self
+        while log is not None:
+            log.shapes[shape] += 1
+            log.total += 1
+            log = log.parent
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes executed at least `threshold` times, most repeated first"""
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+# The log of the request (or capture block) running in this thread / task
+current_query_log: ContextVar[Optional[QueryLog]] = ContextVar('current_query_log', default=None)
+
+
+class QueryPatternTracker:
+    """Flags statement shapes repeated within one request: the N+1 signature.
+
+    Subscribes to StatementEvents; each request gets a QueryLog and when
+    it ends every shape run `threshold` times or more is logged with the
+    endpoint and kept in a bounded list of recent findings.
+    """
+
+    def __init__(self, threshold: int = 5, max_findings: int = 200):
+        self.threshold = threshold
+        self.findings: deque = deque(maxlen=max_findings)
+        self.flagged: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def on_statement(record) -> None:
+        """StatementEvents subscriber"""
+        log = current_query_log.get()
+        if log is not None:
+            log.add(record.statement)
+
+    def start(self) -> QueryLog:
+        log = QueryLog(parent=current_query_log.get())
+        current_query_log.set(log)
+        return log
+
+    def finish(self, endpoint: str) -> Optional[QueryLog]:
+        log = current_query_log.get()
+        if log is None:
+            return None
+        current_query_log.set(log.parent)
+        for sql, count in log.repeated(self.threshold):
+            logger.warning("Repeated query in %s: %d x %s", endpoint, count, sql[:300])
+            with self._lock:
+                self.flagged[endpoint] = self.flagged.get(endpoint, 0) + 1
+                self.findings.append({
+                    "endpoint": endpoint,
+                    "count": count,
+                    "statement": sql,
+                    "total_statements": log.total,
+                    "seen_at": datetime.now().isoformat()
+                })
+        return log
+
+    def recent(self) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self.findings))
+
+
+@contextlib.contextmanager
+def capture_queries() -> Iterator[QueryLog]:
+    """Collect the statements run inside the block (needs a subscribed tracker)"""
+    log = QueryLog()
+    token = current_query_log.set(log)
+    try:
+        yield log
+    finally:
+        current_query_log.reset(token)
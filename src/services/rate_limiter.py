@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from src.services.event_bus import ControllerEvent
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate_limit(config: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    """(tokens per second, burst) from Controlador.config['rate_limit'], or None for the defaults.
+
+        {"rate_limit": {"per_minute": 120, "burst": 30}}
+    """
+    spec = (config or {}).get('rate_limit')
+    if not isinstance(spec, dict):
+        return None
+    try:
+        per_minute = float(spec['per_minute'])
+        burst = float(spec.get('burst', max(per_minute / 6, 1)))
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Ignoring invalid rate_limit config: %r", spec)
+        return None
+    if per_minute <= 0 or burst < 1:
+        logger.warning("Ignoring invalid rate_limit config: %r", spec)
+        return None
+    return per_minute / 60, burst
+
+
+class IngestRateLimiter:
+    """Token bucket per controller phone number for signal ingestion.
+
+    Each controller may send `burst` readings at once and `per_minute`
+    readings a minute on average. Buckets are slots in flat arrays (tokens,
+    last update, rate, burst, throttled count) indexed through a phone ->
+    slot dict in least-recently-used order, and are refilled lazily when
+    the controller next reports. Slots idle for `idle_seconds` are
+    recycled, and the table never holds more than `max_controllers`: the
+    ingestion endpoint is unauthenticated and checks the limit before the
+    phone number is validated, so made-up numbers must not grow it. When
+    full, the least recently seen bucket is evicted, with its counter.
+    A per-controller override from Controlador.config['rate_limit'] is
+    learned from its accepted readings ('signal' events).
+
+    Everything is in process: with several workers each one limits its
+    own share of the traffic.
+    """
+
+    def __init__(
+        self,
+        per_minute: float = 60.0,
+        burst: float = 10.0,
+        idle_seconds: float = 3600.0,
+        max_controllers: int = 50000
+    ):
+        self.default_rate = per_minute / 60
+        self.default_burst = burst
+        self.idle_seconds = idle_seconds
+        self.max_controllers = max_controllers
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._tokens = array('d')
+        self._updated = array('d')
+        self._rate = array('d')
+        self._burst = array('d')
+        self._throttled = array('q')
+        self._overrides: Dict[str, Tuple[float, float]] = {}
+        self._next_sweep = time.monotonic() + idle_seconds
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.throttled_total = 0
+        self.evicted = 0
+
+    def acquire(self, phone_number: str, now: Optional[float] = None) -> float:
+        """Take a token for one reading: 0 when allowed, else seconds until the next token"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            slot = self._slots.get(phone_number)
+            if slot is None:
+                slot = self._allocate(phone_number, now)
+            else:
+                self._slots.move_to_end(phone_number)
+            rate = self._rate[slot]
+            tokens = min(self._burst[slot], self._tokens[slot] + (now - self._updated[slot]) * rate)
+            self._updated[slot] = now
+            if tokens >= 1:
+                self._tokens[slot] = tokens - 1
+                self.accepted += 1
+                return 0.0
+            self._tokens[slot] = tokens
+            self._throttled[slot] += 1
+            self.throttled_total += 1
+            return (1 - tokens) / rate
+
+    def on_event(self, event: ControllerEvent) -> None:
+        """EventBus handler for 'signal' events: pick up rate_limit config changes"""
+        phone_number = (event.data.get('signal') or {}).get('controlador_id')
+        if phone_number is None:
+            return
+        self.configure(str(phone_number), event.data.get('config'))
+
+    def configure(self, phone_number: str, config: Optional[Dict[str, Any]]) -> None:
+        override = parse_rate_limit(config)
+        with self._lock:
+            if override == self._overrides.get(phone_number):
+                return
+            if override is None:
+                self._overrides.pop(phone_number, None)
+            else:
+                self._overrides[phone_number] = override
+            slot = self._slots.get(phone_number)
+            if slot is not None:
+                self._rate[slot], self._burst[slot] = override or (self.default_rate, self.default_burst)
+                self._tokens[slot] = min(self._tokens[slot], self._burst[slot])
+
+    def stats(self, top: int = 50) -> Dict:
+        """For the admin endpoint: includes phone numbers, never export it unauthenticated"""
+        with self._lock:
+            throttled = sorted(
+                ((phone, self._throttled[slot]) for phone, slot in self._slots.items() if self._throttled[slot]),
+                key=lambda item: -item[1]
+            )
+            return {
+                "per_minute": self.default_rate * 60,
+                "burst": self.default_burst,
+                "tracked_controllers": len(self._slots),
+                "max_controllers": self.max_controllers,
+                "evicted": self.evicted,
+                "overrides": {phone: {"per_minute": rate * 60, "burst": burst}
+                              for phone, (rate, burst) in self._overrides.items()},
+                "accepted": self.accepted,
+                "throttled_total": self.throttled_total,
+                # Tracked controllers only: a counter goes with its evicted bucket
+                "throttled": dict(throttled[:top]),
+            }
+
+    def render_prometheus(self) -> str:
+        """Aggregates only: phone numbers are personal data and unbounded as labels"""
+        with self._lock:
+            values = (self.accepted, self.throttled_total, len(self._slots), self.evicted)
+        return (
+            "# HELP iot_ingest_accepted_total Readings that passed the ingestion rate limit\n"
+            "# TYPE iot_ingest_accepted_total counter\n"
+            "iot_ingest_accepted_total {}\n"
+            "# HELP iot_ingest_throttled_total Readings rejected with 429\n"
+            "# TYPE iot_ingest_throttled_total counter\n"
+            "iot_ingest_throttled_total {}\n"
+            "# HELP iot_ingest_tracked_controllers Token buckets currently held\n"
+            "# TYPE iot_ingest_tracked_controllers gauge\n"
+            "iot_ingest_tracked_controllers {}\n"
+            "# HELP iot_ingest_evicted_total Token buckets evicted because the table was full\n"
+            "# TYPE iot_ingest_evicted_total counter\n"
+            "iot_ingest_evicted_total {}\n"
+        ).format(*values)
+
+    def _allocate(self, phone_number: str, now: float) -> int:
+        rate, burst = self._overrides.get(phone_number, (self.default_rate, self.default_burst))
+        if not self._free and len(self._slots) >= self.max_controllers:
+            _, slot = self._slots.popitem(last=False)
+            self._free.append(slot)
+            self.evicted += 1
+        if self._free:
+            slot = self._free.pop()
+            self._tokens[slot], self._updated[slot] = burst, now
+            self._rate[slot], self._burst[slot] = rate, burst
+            self._throttled[slot] = 0
+        else:
+            slot = len(self._tokens)
+            self._tokens.append(burst)
+            self._updated.append(now)
+            self._rate.append(rate)
+            self._burst.append(burst)
+            self._throttled.append(0)
+        self._slots[phone_number] = slot
+        return slot
+
+    def _sweep(self, now: float) -> None:
+        """Recycle the slots of controllers idle for idle_seconds whose bucket has refilled"""
+        cutoff = now - self.idle_seconds
+        idle = []
+        # Least recently seen first: stop at the first bucket used since the cutoff
+        for phone, slot in self._slots.items():
+            if self._updated[slot] >= cutoff:
+                break
+            if self._tokens[slot] + (now - self._updated[slot]) * self._rate[slot] >= self._burst[slot]:
+                idle.append(phone)
+        for phone in idle:
+            self._free.append(self._slots.pop(phone))
+        self._next_sweep = now + self.idle_seconds / 4
@@ -0,0 +1,202 @@
+import os
+import threading
+from array import array
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus `le` bounds exported from the fine-grained histograms
+SECONDS_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BOUNDS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class HdrHistogram:
+    """Log-linear histogram of non-negative integers with bounded relative error.
+
+    Values below 2 * sub_buckets are counted exactly; above that every
+    power-of-two range is split into `sub_buckets` equal buckets, so a bucket
+    is never wider than 1/sub_buckets of its value (about 3% with 32).
+    Memory is fixed by `max_value`; larger values land in the last bucket.
+    """
+
+    def __init__(self, max_value: int = 3_600_000_000, sub_buckets: int = 32):
+        self.sub_buckets = sub_buckets
+        self._sub_bits = sub_buckets.bit_length() - 1
+        self.max_value = max_value
+        self._counts = array('q', [0]) * (self._index(max_value) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < 2 * self.sub_buckets:
+            return value
+        shift = value.bit_length() - self._sub_bits - 1
+        return (shift + 1) * self.sub_buckets + (value >> shift) - self.sub_buckets
+
+    def _upper(self, index: int) -> int:
+        """Smallest value above bucket `index`"""
+        if index < 2 * self.sub_buckets:
+            return index + 1
+        shift = index // self.sub_buckets - 1
+        mantissa = index % self.sub_buckets + self.sub_buckets
+        return (mantissa + 1) << shift
+
+    def record(self, value: int) -> None:
+        value = min(max(int(value), 0), self.max_value)
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> int:
+        """Upper edge of the bucket holding the q-th value (0 when empty)"""
+        with self._lock:
+            if self.count == 0:
+                return 0
+            rank = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, n in enumerate(self._counts):
+                seen += n
+                if seen >= rank:
+                    return min(self._upper(index) - 1, self.max)
+        return self.max
+
+    def cumulative(self, bounds: Sequence[int]) -> List[int]:
+        """Number of recorded values <= each bound (to bucket precision)"""
+        result = []
+        with self._lock:
+            seen = 0
+            index = 0
+            for bound in bounds:
+                while index < len(self._counts) and self._upper(index) - 1 <= bound:
+                    seen += self._counts[index]
+                    index += 1
+                result.append(seen)
+        return result
+
+
+@dataclass
+class RequestSample:
+    """What one request spent, filled in by the hooks while it runs"""
+    start: float
+    statements: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+    serialize_seconds: float = 0.0
+
+
+# The sample of the request running in this thread / task
+current_sample: ContextVar[Optional[RequestSample]] = ContextVar('current_sample', default=None)
+
+
+@dataclass
+class EndpointMetrics:
+    latency_us: HdrHistogram = field(default_factory=HdrHistogram)
+    db_us: HdrHistogram = field(default_factory=HdrHistogram)
+    serialize_us: HdrHistogram = field(default_factory=HdrHistogram)
+    statements: HdrHistogram = field(default_factory=lambda: HdrHistogram(max_value=100_000))
+    rows: HdrHistogram = field(default_factory=lambda: HdrHistogram(max_value=10_000_000))
+    status: Dict[int, int] = field(default_factory=dict)
+
+
+class RequestMetrics:
+    """Per-endpoint latency, SQL count, DB time, rows and serialization time.
+
+    Times are kept in microseconds in HdrHistograms (recording is a few
+    integer operations under a per-histogram lock), and exported in the
+    Prometheus text format. Metrics are per process.
+    """
+
+    HISTOGRAMS = (
+        ('iot_request_duration_seconds', 'latency_us', 'Request latency', True),
+        ('iot_request_db_seconds', 'db_us', 'Time spent executing SQL per request', True),
+        ('iot_request_serialize_seconds', 'serialize_us', 'Time spent encoding JSON per request', True),
+        ('iot_request_sql_statements', 'statements', 'SQL statements per request', False),
+        ('iot_request_db_rows', 'rows', 'Rows returned by the database per request', False),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self._endpoints.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._endpoints.setdefault(name, EndpointMetrics())
+        return metrics
+
+    def observe(self, endpoint: str, status: int, sample: RequestSample, end: float) -> None:
+        metrics = self.endpoint(endpoint)
+        metrics.latency_us.record((end - sample.start) * 1e6)
+        metrics.db_us.record(sample.db_seconds * 1e6)
+        metrics.serialize_us.record(sample.serialize_seconds * 1e6)
+        metrics.statements.record(sample.statements)
+        metrics.rows.record(sample.rows)
+        with self._lock:
+            metrics.status[status] = metrics.status.get(status, 0) + 1
+
+    @staticmethod
+    def on_statement(record) -> None:
+        """StatementEvents subscriber: charge the statement to the running request"""
+        sample = current_sample.get()
+        if sample is None:
+            return
+        sample.statements += 1
+        sample.db_seconds += record.duration
+        if record.rowcount > 0:
+            sample.rows += record.rowcount
+
+    def summary(self) -> Dict[str, Dict]:
+        """p50/p90/p99 per endpoint, for humans"""
+        result = {}
+        for name, metrics in sorted(self._endpoints.items()):
+            latency = metrics.latency_us
+            result[name] = {
+                "count": latency.count,
+                **{f"p{int(q * 100)}_ms": latency.quantile(q) / 1000 for q in (0.5, 0.9, 0.99)},
+                "max_ms": latency.max / 1000,
+                "db_p99_ms": metrics.db_us.quantile(0.99) / 1000,
+                "serialize_p99_ms": metrics.serialize_us.quantile(0.99) / 1000,
+                "statements_p99": metrics.statements.quantile(0.99),
+            }
+        return result
+
+    def render_prometheus(self, worker: Optional[str] = None) -> str:
+        worker = worker or str(os.getpid())
+        lines: List[str] = []
+        endpoints = sorted(self._endpoints.items())
+        for metric, attr, help_text, is_time in self.HISTOGRAMS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, metrics in endpoints:
+                histogram: HdrHistogram = getattr(metrics, attr)
+                labels = f'endpoint="{_escape(name)}",worker="{worker}"'
+                lines.extend(_histogram_lines(metric, labels, histogram, is_time))
+
+        lines.append("# HELP iot_requests_total Requests by endpoint and status")
+        lines.append("# TYPE iot_requests_total counter")
+        for name, metrics in endpoints:
+            for status, count in sorted(metrics.status.items()):
+                lines.append(f'iot_requests_total{{endpoint="{_escape(name)}",status="{status}",worker="{worker}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(metric: str, labels: str, histogram: HdrHistogram, is_time: bool) -> Iterable[str]:
+    bounds: Tuple = SECONDS_BOUNDS if is_time else COUNT_BOUNDS
+    raw_bounds = [int(b * 1e6) for b in bounds] if is_time else list(bounds)
+    scale = 1e6 if is_time else 1
+    for bound, count in zip(bounds, histogram.cumulative(raw_bounds)):
+        yield f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+    yield f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f'{metric}_sum{{{labels}}} {histogram.total / scale}'
+    yield f'{metric}_count{{{labels}}} {histogram.count}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
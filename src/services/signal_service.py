@@ -2,15 +2,21 @@ from datetime import datetime
 from typing import Dict, Optional
 from src.domain.model import Signal, Controlador
 from src.adapters.repository import EmpresaRepository
+from src.services.arrival_stats import ArrivalStats, configured_interval
+from src.services.event_bus import ControllerEvent, EventBus
 
 class SignalService:
     def __init__(
         self,
         empresa_repo: EmpresaRepository,
-        session
+        session,
+        arrival_stats: Optional[ArrivalStats] = None,
+        event_bus: Optional[EventBus] = None
     ):
         self.empresa_repo = empresa_repo
         self.session = session
+        self.arrival_stats = arrival_stats
+        self.event_bus = event_bus
 
     def process_incoming_signal(self, signal_data: Dict) -> Dict:
         """Process incoming signal from controller"""
@@ -41,7 +47,28 @@ class SignalService:
         self.session.add(signal)
         self.session.commit()
         
-        return signal.to_dict()
+        if self.arrival_stats is not None:
+            self.arrival_stats.observe(
+                controller.id,
+                signal.tstamp.timestamp(),
+                prior_interval=configured_interval(controller.config)
+            )
+        
+        signal_dict = signal.to_dict()
+        if self.event_bus is not None:
+            self.event_bus.publish(ControllerEvent(
+                ControllerEvent.SIGNAL,
+                controller.id,
+                signal.tstamp,
+                {
+                    "empresa_id": controller.empresa_id,
+                    "config": controller.config,
+                    "values": transformed_values,
+                    "signal": signal_dict
+                }
+            ))
+        
+        return signal_dict
 
     def _process_sensor_values(self, sensor_values: list) -> dict:
         """Convert raw sensor values to structured data"""
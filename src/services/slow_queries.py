@@ -0,0 +1,198 @@
+import itertools
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy.engine import Engine
+from src.services.query_patterns import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# Frames in these files name the query method a slow statement came from
+_CALLER_PATHS = tuple(os.path.join('src', *parts) for parts in (
+    ('queries', ''), ('adapters', 'repository.py'), ('services', '')
+))
+_SECRET_KEY = re.compile(r'pass|secret|token|hash', re.IGNORECASE)
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Bound parameters safe to show: numbers, dates and NULLs kept, strings reduced to their length"""
+    if isinstance(parameters, dict):
+        return {key: '***' if _SECRET_KEY.search(str(key)) else _redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the first row is enough to read the plan
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return [_redact(value) for value in parameters]
+    return _redact(parameters)
+
+
+def _redact(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def find_caller(max_depth: int = 60) -> Optional[str]:
+    """Innermost query/repository/service method on the current stack, as 'Class.method (file:line)'"""
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None and depth < max_depth:
+        filename = frame.f_code.co_filename
+        if filename != __file__ and any(path in filename for path in _CALLER_PATHS):
+            name = getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+            return f"{name} ({os.path.basename(filename)}:{frame.f_lineno})"
+        frame = frame.f_back
+        depth += 1
+    return None
+
+
+class SlowQueryLog:
+    """Statements slower than `threshold_seconds`, newest last, in a ring buffer.
+
+    The StatementEvents handler records the statement, redacted parameters,
+    duration and calling query method. A sample of the slow SELECTs (at most
+    one per statement shape every `explain_interval_seconds`) is re-run as
+    EXPLAIN (ANALYZE, BUFFERS) by a background thread on its own connection,
+    inside a read-only transaction with a statement timeout; the plan is
+    attached to the entry when it arrives. Plans are only captured on
+    PostgreSQL.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        threshold_seconds: float = 0.5,
+        max_entries: int = 100,
+        explain_sample_rate: float = 0.1,
+        explain_interval_seconds: float = 300.0,
+        explain_timeout_seconds: float = 30.0
+    ):
+        self.engine = engine
+        self.threshold_seconds = threshold_seconds
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval_seconds = explain_interval_seconds
+        self.explain_timeout_seconds = explain_timeout_seconds
+        self.explain_supported = engine.dialect.name == 'postgresql'
+        self.entries: deque = deque(maxlen=max_entries)
+        self.recorded = 0
+        self.explained = 0
+        self._ids = itertools.count(1)
+        self._last_explain: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Only the latest few plan requests are worth keeping
+        self._explain_queue: queue.Queue = queue.Queue(maxsize=10)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def on_statement(self, record) -> None:
+        """StatementEvents subscriber"""
+        if record.duration < self.threshold_seconds or record.statement.lstrip().startswith('EXPLAIN'):
+            return
+        shape = normalize_sql(record.statement)
+        entry = {
+            "id": next(self._ids),
+            "statement": record.statement,
+            "shape": shape,
+            "parameters": redact_parameters(record.parameters),
+            "duration_ms": round(record.duration * 1000, 1),
+            "caller": find_caller(),
+            "seen_at": datetime.now().isoformat(),
+            "plan": None,
+        }
+        with self._lock:
+            self.entries.append(entry)
+            self.recorded += 1
+        logger.warning("Slow query (%.0f ms) from %s: %s", record.duration * 1000, entry["caller"], shape[:300])
+
+        if not record.executemany and self._should_explain(shape, record.statement):
+            entry["plan"] = "pending"
+            try:
+                self._explain_queue.put_nowait((entry, record.statement, record.parameters))
+            except queue.Full:
+                entry["plan"] = None
+
+    def _should_explain(self, shape: str, statement: str) -> bool:
+        if not self.explain_supported or not _EXPLAINABLE.match(statement):
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explain.get(shape)
+            if last is not None and now - last < self.explain_interval_seconds:
+                return False
+            self._last_explain[shape] = now
+        return True
+
+    def explain(self, statement: str, parameters: Any) -> Any:
+        """EXPLAIN (ANALYZE, BUFFERS) of one statement on a separate connection"""
+        with self.engine.connect() as conn:
+            transaction = conn.begin()
+            try:
+                # ANALYZE runs the statement: never let it write or run away
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_seconds * 1000)}")
+                return conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+                ).scalar()
+            finally:
+                transaction.rollback()
+
+    def explain_pending(self, timeout: Optional[float] = None) -> int:
+        """Run the queued EXPLAINs (the background thread does this); returns how many ran"""
+        done = 0
+        while True:
+            try:
+                if timeout:
+                    entry, statement, parameters = self._explain_queue.get(timeout=timeout)
+                else:
+                    entry, statement, parameters = self._explain_queue.get_nowait()
+            except queue.Empty:
+                return done
+            try:
+                entry["plan"] = self.explain(statement, parameters)
+                self.explained += 1
+            except Exception as e:
+                entry["plan"] = {"error": str(e)}
+                logger.warning("EXPLAIN of slow query %d failed: %s", entry["id"], e)
+            done += 1
+            timeout = None
+
+    def recent(self) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self.entries))
+
+    def start(self) -> None:
+        if not self.explain_supported or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='slow-query-explain', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.explain_pending(timeout=1.0)
+            except Exception:
+                logger.exception("Slow query EXPLAIN loop failed")
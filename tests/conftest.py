@@ -1,3 +1,4 @@
+import contextlib
 import os
 import sys
 import time
@@ -10,6 +11,7 @@ from src.adapters.orm import mapper_registry, start_mappers
 from src.config import get_postgres_uri
 from flask import Flask
 from src.entrypoints.flask_app import app  # Import your Flask app
+from src.services.query_patterns import QueryPatternTracker, capture_queries
 
 # Add the project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -53,3 +55,33 @@ def session(session_factory):
     mapper_registry.metadata.create_all(engine)
 
 
+
+@pytest.fixture
+def query_budget():
+    """Fails the test when the block runs more statements (or repeats one shape more) than allowed.
+
+        with query_budget(max_statements=5, max_repeats=1):
+            test_client.get('/api/dashboard/empresa/1/dashboard')
+    """
+    subscriptions = []
+
+    @contextlib.contextmanager
+    def budget(max_statements=None, max_repeats=None, statement_events=None):
+        events = statement_events or app.extensions['statement_events']
+        # The app's own tracker may already feed capture blocks
+        if events.subscribe(QueryPatternTracker.on_statement):
+            subscriptions.append(events)
+        with capture_queries() as log:
+            yield log
+        problems = []
+        if max_statements is not None and log.total > max_statements:
+            problems.append(f"{log.total} statements, budget {max_statements}")
+        if max_repeats is not None:
+            for sql, count in log.repeated(max_repeats + 1):
+                problems.append(f"{count} x {sql}")
+        if problems:
+            pytest.fail("Query budget exceeded:\n  " + "\n  ".join(problems))
+
+    yield budget
+    for events in subscriptions:
+        events.unsubscribe(QueryPatternTracker.on_statement)
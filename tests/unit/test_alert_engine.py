@@ -0,0 +1,141 @@
+from datetime import datetime
+from unittest.mock import Mock
+from src.services.event_bus import EventBus, ControllerEvent
+from src.services.alert_service import AlertEngine, AlertService, compile_rules
+
+CONFIG = {"alerts": [
+    {"id": "s2-on", "sensor": 2, "when": "on", "cooldown": 0},
+    {"id": "s4-changed", "sensor": 4, "when": "changed", "cooldown": 60},
+    {"id": "s1-long", "sensor": 1, "when": "on_for", "minutes": 10, "cooldown": 0},
+]}
+
+def _engine():
+    bus = EventBus()
+    alerts = []
+    bus.subscribe(lambda e: alerts.append((e.data["rule_id"], e.data["state"])), kinds=[ControllerEvent.ALERT])
+    return AlertEngine(bus), alerts
+
+def test_invalid_rules_are_skipped():
+    rules = compile_rules({"alerts": [{"sensor": 9, "when": "on"}, {"sensor": 1, "when": "sideways"}, {"sensor": 3, "when": "off"}]})
+    assert [rule.id for rule in rules] == ["sensor3_off"]
+
+def test_level_rule_fires_once_and_clears():
+    engine, alerts = _engine()
+    for t, mask in [(0, 0), (10, 0b10), (20, 0b10), (30, 0b11), (40, 0)]:
+        engine.evaluate(1, t, mask, config=CONFIG)
+
+    assert alerts == [("s2-on", "fired"), ("s2-on", "cleared")]
+
+def test_changed_rule_is_rate_limited():
+    engine, alerts = _engine()
+    engine.evaluate(1, 0, 0, config=CONFIG)
+    engine.evaluate(1, 10, 0b1000, config=CONFIG)
+    engine.evaluate(1, 20, 0, config=CONFIG)
+    engine.evaluate(1, 100, 0b1000, config=CONFIG)
+
+    assert alerts == [("s4-changed", "fired"), ("s4-changed", "fired")]
+    assert engine.suppressed == 1
+
+def test_suppressed_fire_is_not_latched():
+    config = {"alerts": [{"id": "s2-on", "sensor": 2, "when": "on", "cooldown": 60}]}
+    engine, alerts = _engine()
+    for t, mask in [(0, 0), (10, 0b10), (20, 0), (30, 0b10), (40, 0)]:
+        engine.evaluate(1, t, mask, config=config)
+
+    assert alerts == [("s2-on", "fired"), ("s2-on", "cleared")]
+    assert engine.suppressed == 1
+    assert engine.active_rules(1) == {"s2-on": False}
+
+def test_invalidate_recompiles_on_next_reading():
+    engine, alerts = _engine()
+    engine.evaluate(1, 0, 0, config={"alerts": []})
+    engine.evaluate(1, 1, 0, config=CONFIG)
+    assert engine.active_rules(1) == {}
+
+    engine.invalidate(1)
+    engine.evaluate(1, 2, 0b10, config=CONFIG)
+    assert alerts == [("s2-on", "fired")]
+
+def test_windowed_rule_fires_from_timer():
+    engine, alerts = _engine()
+    engine.evaluate(1, 0, 0b1, config=CONFIG)
+    engine.tick(599)
+    assert alerts == []
+
+    engine.tick(600)
+    assert alerts == [("s1-long", "fired")]
+    assert engine.active_rules(1)["s1-long"]
+
+    engine.evaluate(1, 700, 0, config=CONFIG)
+    assert alerts[-1] == ("s1-long", "cleared")
+
+def test_windowed_rule_cancelled_when_sensor_turns_off():
+    engine, alerts = _engine()
+    engine.evaluate(1, 0, 0b1, config=CONFIG)
+    engine.evaluate(1, 300, 0, config=CONFIG)
+    engine.tick(1000)
+
+    assert alerts == []
+
+def test_engine_listens_to_signal_events():
+    engine, alerts = _engine()
+    event = ControllerEvent(ControllerEvent.SIGNAL, 1, datetime.now(), {
+        "values": {"sensor2": True}, "config": CONFIG, "empresa_id": 3
+    })
+    engine.event_bus.publish(event)
+
+    assert alerts == [("s2-on", "fired")]
+    assert engine.recent(1)[0]["empresa_id"] == 3
+
+def test_alert_service_lists_rules_with_state():
+    engine, _ = _engine()
+    engine.evaluate(5, 0, 0b10, config=CONFIG)
+    repo = Mock()
+    repo.get_controlador.return_value = Mock(id=5, config=CONFIG)
+
+    rules = AlertService(repo, Mock(), engine).get_controller_alerts("5")
+
+    assert [(r["id"], r["active"]) for r in rules] == [("s2-on", True), ("s4-changed", False), ("s1-long", False)]
+
+def test_alert_routes_check_empresa_and_numeric_ids():
+    from flask import Flask, g
+    from src.entrypoints.routes.alerts import alerts_bp
+    from src.services.auth import UserPermissions
+
+    app = Flask(__name__)
+    app.register_blueprint(alerts_bp, url_prefix='/api')
+
+    @app.before_request
+    def _principal():
+        g.current_user = UserPermissions(user_id=1, role='EMPRESA_USER', empresa_id=1)
+
+    client = app.test_client()
+    assert client.get('/api/empresa/2/alerts/open').status_code == 403
+    assert client.get('/api/controlador/abc/alerts/open').status_code == 404
+    assert client.get('/api/controlador/abc/alert-logs/daily').status_code == 404
+
+def test_controller_alert_routes_check_the_controllers_empresa():
+    from unittest.mock import patch
+    from types import SimpleNamespace
+    from flask import Flask, g
+    from src.entrypoints.routes.alerts import alerts_bp
+    from src.services.auth import UserPermissions
+
+    app = Flask(__name__)
+    app.extensions['alert_engine'] = _engine()[0]
+    app.register_blueprint(alerts_bp, url_prefix='/api')
+
+    @app.before_request
+    def _principal():
+        g.current_user = UserPermissions(user_id=1, role='EMPRESA_USER', empresa_id=1)
+
+    client = app.test_client()
+    with patch('src.entrypoints.routes.alerts.EmpresaRepository') as repo:
+        repo.return_value.get_controlador.return_value = SimpleNamespace(id=77, empresa_id=2, config=CONFIG)
+        for path in ('alerts', 'alerts/open', 'alert-logs', 'alert-logs/daily'):
+            assert client.get(f'/api/controlador/77/{path}').status_code == 403
+        assert client.get('/api/controlador/77/alert-logs?limit=0').status_code == 400
+        assert client.get('/api/controlador/77/alert-logs?limit=-5').status_code == 400
+
+        repo.return_value.get_controlador.return_value = None
+        assert client.get('/api/controlador/77/alerts/open').status_code == 404
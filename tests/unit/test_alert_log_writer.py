@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from src.services.event_bus import ControllerEvent
+from src.services.alert_log_writer import AlertLogWriter, build_alert_log_rows
+from src.queries.queries import AlertQueries
+
+
+def _alert(controller_id, rule_id, state, minute, when='on'):
+    return ControllerEvent(ControllerEvent.ALERT, controller_id, datetime(2024, 1, 1, 0, minute), {
+        "rule_id": rule_id, "rule": {"id": rule_id, "when": when}, "state": state, "empresa_id": 7
+    })
+
+def test_clear_in_same_batch_is_folded_into_insert():
+    inserts, clears = build_alert_log_rows([
+        _alert(1, "door", "fired", 0),
+        _alert(1, "door", "cleared", 5),
+        _alert(1, "door", "fired", 10),
+    ])
+
+    assert [(r["fired_at"].minute, r["cleared_at"] and r["cleared_at"].minute) for r in inserts] == [(0, 5), (10, None)]
+    assert clears == []
+
+def test_clear_of_earlier_episode_becomes_update():
+    inserts, clears = build_alert_log_rows([_alert(1, "door", "cleared", 5)])
+
+    assert inserts == []
+    assert clears == [{"c_controlador_id": 1, "c_rule_id": "door", "c_cleared_at": datetime(2024, 1, 1, 0, 5)}]
+
+def test_changed_alerts_are_closed_on_insert():
+    inserts, _ = build_alert_log_rows([_alert(1, "s4", "fired", 3, when='changed')])
+
+    assert inserts[0]["cleared_at"] == inserts[0]["fired_at"]
+
+def test_writer_batches_and_commits_once_per_batch():
+    session = Mock()
+    writer = AlertLogWriter(lambda: session, batch_size=2)
+    for minute in range(5):
+        writer.on_event(_alert(1, f"r{minute}", "fired", minute))
+
+    assert session.execute.call_count == 0
+    assert writer.flush() == 5
+    assert session.commit.call_count == 3
+    assert writer.written == 5
+
+def test_writer_keeps_failed_batch_for_retry():
+    session = Mock()
+    session.execute.side_effect = [Exception("db down"), None]
+    writer = AlertLogWriter(lambda: session)
+    writer.on_event(_alert(1, "door", "fired", 0))
+
+    assert writer.flush() == 0
+    assert writer.failed_batches == 1
+    assert writer.flush() == 1
+
+def test_writer_drops_when_queue_is_full():
+    writer = AlertLogWriter(Mock(), max_queue=2)
+    for minute in range(3):
+        writer.on_event(_alert(1, "door", "fired", minute))
+
+    assert writer.dropped == 1
+
+def test_log_pages_use_keyset_pagination():
+    session = Mock()
+    AlertQueries(session).get_logs(controlador_id=3, limit=20, before=(datetime(2024, 1, 1), 99))
+
+    sql = str(session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "alert_logs.fired_at < " in sql and "alert_logs.id < " in sql
+    assert "OFFSET" not in sql
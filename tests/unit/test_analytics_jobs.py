@@ -0,0 +1,149 @@
+import threading
+import pytest
+from collections import namedtuple
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from src.services.analytics_jobs import AnalyticsJobManager, AnalyticsJob, UnknownMetric, TooManyJobs
+
+Row = namedtuple('Row', 'controlador_id tstamp values')
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 20)
+
+def _controller():
+    controller = Mock(config={})
+    controller.name = "Test Controller"
+    return controller
+
+def _manager(rows_per_window, **kwargs):
+    session = Mock()
+    session.query.return_value.get.return_value = _controller()
+    manager = AnalyticsJobManager(lambda: session, max_workers=1, **kwargs)
+    queries = Mock()
+    queries.return_value.get_sensor_rows.side_effect = rows_per_window
+    return manager, queries
+
+def test_job_runs_in_background_and_reports_result():
+    rows = [[Row(1, START + timedelta(hours=1), {"sensor1": True})], [], []]
+    manager, queries = _manager(rows)
+
+    with patch('src.services.analytics_jobs.SignalQueries', queries):
+        job = manager.submit("1", 'operational-hours', START, END)
+        job.future.result(timeout=5)
+
+    assert job.status == AnalyticsJob.DONE
+    assert job.progress == 1.0
+    assert job.result["heatmap_data"]["2024-01-01"][1] == 5
+    assert queries.return_value.get_sensor_rows.call_count == 3
+
+def test_repeated_request_attaches_to_existing_job():
+    release = threading.Event()
+
+    def slow_rows(*args):
+        release.wait(5)
+        return []
+
+    manager, queries = _manager(slow_rows)
+    with patch('src.services.analytics_jobs.SignalQueries', queries):
+        first = manager.submit("1", 'uptime-downtime', START, END)
+        second = manager.submit("1", 'uptime-downtime', START, END)
+        release.set()
+        first.future.result(timeout=5)
+        third = manager.submit("1", 'uptime-downtime', START, END)
+
+    assert first is second is third
+
+def test_cancel_stops_running_job():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_rows(*args):
+        started.set()
+        release.wait(5)
+        return []
+
+    manager, queries = _manager(slow_rows)
+    with patch('src.services.analytics_jobs.SignalQueries', queries):
+        job = manager.submit("1", 'uptime-downtime', START, END)
+        started.wait(5)
+        assert manager.cancel(job.id)
+        release.set()
+        job.future.result(timeout=5)
+
+    assert job.status == AnalyticsJob.CANCELLED
+    assert "result" not in job.to_dict()
+
+def test_unfinished_jobs_are_capped():
+    release = threading.Event()
+
+    def slow_rows(*args):
+        release.wait(5)
+        return []
+
+    manager, queries = _manager(slow_rows, max_jobs=2)
+    with patch('src.services.analytics_jobs.SignalQueries', queries):
+        jobs = [manager.submit("1", 'uptime-downtime', START, END - timedelta(days=n)) for n in range(2)]
+        with pytest.raises(TooManyJobs):
+            manager.submit("1", 'uptime-downtime', START, END - timedelta(days=5))
+        # Attaching to an existing report still works
+        assert manager.submit("1", 'uptime-downtime', START, END) is jobs[0]
+        release.set()
+        for job in jobs:
+            job.future.result(timeout=5)
+        assert manager.submit("1", 'uptime-downtime', START, END - timedelta(days=5)).status != AnalyticsJob.FAILED
+
+def test_unknown_controller_is_a_value_error():
+    from src.services.controller_analytics_service import ControllerAnalyticsService
+    repo = Mock()
+    repo.get_controlador.return_value = None
+    service = ControllerAnalyticsService(repo, Mock())
+
+    for report in (service.get_uptime_downtime, service.get_operational_hours):
+        with pytest.raises(ValueError):
+            report("77", START, END)
+
+def test_unknown_metric_is_rejected():
+    manager, _ = _manager([])
+    with pytest.raises(UnknownMetric):
+        manager.submit("1", 'nope', START, END)
+
+def test_windows_do_not_overlap():
+    manager, _ = _manager([], chunk_days=7)
+
+    windows = manager._windows(START, END)
+
+    assert windows[0] == (START, START + timedelta(days=7, microseconds=-1))
+    assert windows[-1][1] == END
+    assert len(windows) == 3
+
+def test_job_routes_check_empresa_and_submitter():
+    from flask import Flask, g
+    from src.entrypoints.routes.controladores import controladores_bp
+    from src.services.auth import UserPermissions
+
+    job = AnalyticsJob(("1", 'uptime-downtime', START.isoformat(), END.isoformat()), owner_id=1, empresa_id=1)
+    jobs = Mock()
+    jobs.get.side_effect = lambda job_id: job if job_id == job.id else None
+    app = Flask(__name__)
+    app.register_blueprint(controladores_bp, url_prefix='/api/controladores')
+    app.extensions['analytics_jobs'] = jobs
+    principal = {}
+
+    @app.before_request
+    def _principal():
+        g.current_user = UserPermissions(user_id=principal['user_id'], role='EMPRESA_USER',
+                                         empresa_id=principal['empresa_id'])
+
+    client = app.test_client()
+    url = f'/api/controladores/jobs/{job.id}'
+    principal.update(user_id=3, empresa_id=2)
+    assert client.get(url).status_code == 404
+    assert client.delete(url).status_code == 404
+
+    principal.update(user_id=2, empresa_id=1)
+    assert client.get(url).status_code == 200
+    assert client.delete(url).status_code == 403
+
+    principal.update(user_id=1, empresa_id=1)
+    assert client.delete(url).status_code == 202
+    jobs.cancel.assert_called_once_with(job.id)
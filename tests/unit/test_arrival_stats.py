@@ -0,0 +1,118 @@
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from src.services.arrival_stats import ArrivalStats
+from src.services.controller_monitoring_service import ControllerMonitoringService, report_interval
+
+def _feed(stats, controller_id, interval, count, start=0.0):
+    t = start
+    for _ in range(count):
+        stats.observe(controller_id, t)
+        t += interval
+    return t - interval
+
+def test_unknown_controller_is_offline():
+    stats = ArrivalStats()
+    assert not stats.is_online(1, 1000.0)
+    assert stats.expected_next(1) is None
+
+def test_slow_reporter_does_not_flap():
+    stats = ArrivalStats()
+    last = _feed(stats, 1, 900.0, 20)
+
+    # 14 minutes of silence is normal for a 15 minute reporter
+    assert stats.is_online(1, last + 14 * 60)
+    assert stats.expected_next(1) == pytest.approx(last + 900.0)
+    assert not stats.is_online(1, last + 3 * 900)
+
+def test_fast_reporter_is_detected_early():
+    stats = ArrivalStats()
+    last = _feed(stats, 1, 10.0, 50)
+
+    assert not stats.is_online(1, last + 120)
+
+def test_prior_interval_used_before_enough_samples():
+    stats = ArrivalStats()
+    stats.observe(1, 0.0, prior_interval=900)
+
+    assert stats.is_online(1, 1200.0)
+
+def test_configured_interval_for_controller_not_observed_here():
+    # After a restart, or in a process that has not ingested this controller
+    stats = ArrivalStats()
+    assert not stats.is_online(1, 14 * 60, last_seen=0.0)
+    assert stats.is_online(1, 14 * 60, last_seen=0.0, prior_interval=900)
+    assert not stats.is_online(1, 3 * 900, last_seen=0.0, prior_interval=900)
+
+def test_monitoring_service_passes_report_interval():
+    service = ControllerMonitoringService(empresa_repo=None, signal_queries=None, arrival_stats=ArrivalStats())
+    fourteen_minutes_ago = datetime.now() - timedelta(minutes=14)
+    reporter = SimpleNamespace(config={"report_interval": 900})
+
+    assert service._is_connected(7, fourteen_minutes_ago, report_interval(reporter))
+    assert not service._is_connected(7, fourteen_minutes_ago)
+
+def test_outage_does_not_inflate_interval():
+    stats = ArrivalStats()
+    last = _feed(stats, 1, 60.0, 30)
+    stats.observe(1, last + 86400)
+
+    assert stats.offline_after(1) < 600
+
+def test_evaluate_whole_fleet():
+    stats = ArrivalStats(capacity=2)
+    for controller_id in range(5):
+        _feed(stats, controller_id, 60.0, 10, start=controller_id * 1000.0)
+
+    ids, online = stats.evaluate(4600.0)
+
+    assert ids == [0, 1, 2, 3, 4]
+    assert online.tolist() == [False, False, False, False, True]
+
+def test_malformed_report_interval_does_not_fail_ingestion():
+    from unittest.mock import Mock
+    from src.services.event_bus import EventBus, ControllerEvent
+    from src.services.signal_service import SignalService
+
+    controller = SimpleNamespace(id=7, empresa_id=1, phone_number="600000000", config={"report_interval": "15m"})
+    session = Mock()
+    session.query.return_value.filter_by.return_value.first.return_value = controller
+    session.add.side_effect = lambda signal: setattr(signal, 'id', 1)
+    bus, events = EventBus(), []
+    bus.subscribe(events.append, kinds=[ControllerEvent.SIGNAL])
+    stats = ArrivalStats()
+
+    SignalService(Mock(), session, arrival_stats=stats, event_bus=bus).process_incoming_signal({
+        "controlador_id": "600000000",
+        "tstamp": "2024-01-01T00:00:00",
+        "values": {f"value_sensor{i}": False for i in range(1, 7)},
+    })
+
+    assert len(events) == 1
+    assert stats.is_online(7, datetime(2024, 1, 1, 0, 1).timestamp())
+
+def test_arrival_stats_allocates_on_first_observation():
+    stats = ArrivalStats(capacity=2)
+    assert stats.evaluate(0.0)[0] == []
+    for controller_id in range(3):
+        stats.observe(controller_id, 100.0)
+    ids, online = stats.evaluate(110.0)
+    assert ids == [0, 1, 2] and online.tolist() == [True, True, True]
+
+def test_concurrent_observations_survive_growth():
+    import threading
+    stats = ArrivalStats(capacity=2, min_samples=1)
+
+    def report(controller_id):
+        for i in range(50):
+            stats.observe(controller_id, 100.0 + i * 10)
+
+    threads = [threading.Thread(target=report, args=(n,)) for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stats) == 16
+    assert all(stats._count[stats._slots[n]] == 49 for n in range(16))
+    assert stats.expected_next(5) == 600.0
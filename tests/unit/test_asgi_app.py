@@ -0,0 +1,66 @@
+import contextlib
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('a2wsgi')
+pytest.importorskip('asyncpg')
+pytest.importorskip('httpx')
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.testclient import TestClient
+from src.entrypoints import asgi_app
+from src.services.auth import UserPermissions
+
+
+@pytest.fixture
+def client(monkeypatch):
+    principal = UserPermissions(user_id=1, role='EMPRESA_USER', permissions={'view_signals'}, empresa_id=1)
+    monkeypatch.setattr(asgi_app, '_principal', lambda request, permissions, stream_empresa=None: principal)
+    # No `with`: the lifespan (mappers, background workers) is not started
+    return TestClient(asgi_app.app)
+
+
+def _fake_sessions(session=None):
+    class _Session:
+        async def run_sync(self, fn):
+            return fn(session)
+
+    @contextlib.asynccontextmanager
+    async def factory():
+        yield _Session()
+    return factory
+
+
+def test_timeline_rejects_non_numeric_points(client):
+    response = client.get('/api/controladores/5/timeline'
+                          '?start_date=2024-01-01T00:00:00&end_date=2024-01-02T00:00:00&points=abc')
+
+    assert response.status_code == 400
+    assert 'points' in response.json()['error']
+
+
+def test_signals_checks_empresa_access(client, monkeypatch):
+    monkeypatch.setattr(asgi_app, 'get_async_read_only_session', _fake_sessions())
+    url = '/api/signals/5?start_time=2024-01-01T00:00:00&end_time=2024-01-02T00:00:00'
+    with patch.object(asgi_app, 'EmpresaRepository') as repo, patch.object(asgi_app, 'SignalQueries') as queries:
+        queries.return_value.get_signal_rows.return_value = []
+        repo.return_value.get_controlador.return_value = SimpleNamespace(empresa_id=2, phone_number='6')
+        assert client.get(url).status_code == 403
+        queries.assert_not_called()
+
+        repo.return_value.get_controlador.return_value = SimpleNamespace(empresa_id=1, phone_number='6')
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.json() == []
+
+
+def test_stream_route_is_not_gzipped():
+    route = next(r for r in asgi_app.routes if getattr(r, 'path', '').endswith('/stream'))
+    app, wrappers = route.app, []
+    while hasattr(app, 'app'):
+        wrappers.append(type(app))
+        app = app.app
+
+    assert GZipMiddleware not in wrappers
@@ -0,0 +1,106 @@
+import time
+from unittest.mock import Mock, patch
+import jwt
+from flask import Flask, g, jsonify, request
+from src.services.auth_service import AuthService, TokenCache
+from src.services.auth import UserPermissions
+from src.entrypoints.auth import require_permissions
+from src.entrypoints.middleware import setup_middleware
+
+SECRET = 'test-secret'
+
+
+def _token(**claims):
+    return jwt.encode({
+        'user_id': 1, 'email': 'a@b.c', 'role': 'EMPRESA_USER',
+        'permissions': ['view_dashboard'], 'empresa_id': 4,
+        'exp': int(time.time()) + 60, **claims
+    }, SECRET, algorithm='HS256')
+
+def _app(session):
+    app = Flask(__name__)
+    setup_middleware(app, AuthService(None, SECRET, token_cache=TokenCache(maxsize=0)))
+
+    @app.before_request
+    def inject_session():
+        request.environ['session'] = session
+
+    @app.route('/api/dashboard')
+    @require_permissions(['view_dashboard'])
+    def dashboard():
+        return jsonify({"empresa": g.current_user.can_access_empresa(4)})
+
+    @app.route('/api/users')
+    @require_permissions(['manage_users'])
+    def users():
+        return jsonify({})
+
+    @app.route('/api/me')
+    @require_permissions(['view_dashboard'])
+    def me():
+        return jsonify({"email": g.current_user.user.email, "same": g.current_user.user is g.current_user.user})
+
+    return app
+
+def test_protected_request_decodes_once_without_db_lookup():
+    session = Mock()
+    client = _app(session).test_client()
+
+    with patch('src.services.auth_service.jwt.decode', wraps=jwt.decode) as decode:
+        response = client.get('/api/dashboard', headers={'Authorization': f'Bearer {_token()}'})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"empresa": True}
+    assert decode.call_count == 1
+    assert session.method_calls == []
+
+def test_missing_permission_and_bad_token_are_rejected():
+    client = _app(Mock()).test_client()
+
+    assert client.get('/api/users', headers={'Authorization': f'Bearer {_token()}'}).status_code == 403
+    assert client.get('/api/users', headers={'Authorization': 'Bearer nope'}).status_code == 401
+    assert client.get('/api/users').status_code == 401
+
+def test_user_row_is_loaded_lazily_once():
+    session = Mock()
+    session.get.return_value = Mock(email='a@b.c')
+    client = _app(session).test_client()
+
+    response = client.get('/api/me', headers={'Authorization': f'Bearer {_token()}'})
+
+    assert response.get_json() == {"email": "a@b.c", "same": True}
+    assert session.get.call_count == 1
+
+def test_empresa_access_falls_back_to_user_for_old_tokens():
+    user = Mock(empresa=Mock(id=4))
+    principal = UserPermissions.from_claims(
+        {'user_id': 1, 'role': 'EMPRESA_USER', 'permissions': []}, user_loader=lambda: user
+    )
+
+    assert principal.can_access_empresa(4)
+    assert not principal.can_access_empresa(5)
+    assert UserPermissions.from_claims({'user_id': 1, 'role': 'ADMIN'}).can_access_empresa(9)
+
+def test_stream_accepts_only_a_ticket_for_its_empresa():
+    from flask import Blueprint
+    app = _app(Mock())
+    bp = Blueprint('dashboard', __name__)
+
+    @bp.route('/empresa/<int:empresa_id>/stream')
+    @require_permissions(['view_dashboard'])
+    def stream_empresa_dashboard(empresa_id):
+        return jsonify({"user": g.current_user.user_id})
+
+    app.register_blueprint(bp, url_prefix='/api/dashboard')
+    client = app.test_client()
+    service = AuthService(None, SECRET, token_cache=TokenCache(maxsize=0))
+    principal = UserPermissions.from_claims(jwt.decode(_token(), SECRET, algorithms=['HS256']))
+    ticket = service.issue_stream_ticket(principal, 4)
+
+    assert client.get(f'/api/dashboard/empresa/4/stream?ticket={ticket}').get_json() == {"user": 1}
+    assert client.get(f'/api/dashboard/empresa/5/stream?ticket={ticket}').status_code == 401
+    assert client.get(f'/api/dashboard/empresa/4/stream?access_token={_token()}').status_code == 401
+    # A ticket is not a session token
+    assert client.get('/api/dashboard', headers={'Authorization': f'Bearer {ticket}'}).status_code == 401
+    expired = service.issue_stream_ticket(principal, 4, ttl_seconds=-1)
+    assert client.get(f'/api/dashboard/empresa/4/stream?ticket={expired}').status_code == 401
@@ -0,0 +1,90 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock
+from flask import Flask
+from sqlalchemy.dialects import postgresql
+from src.domain.model import Signal, Controlador
+from src.services.columnar import signal_rows_to_columns, signal_rows_to_dicts
+from src.services.controller_monitoring_service import ControllerMonitoringService
+from src.entrypoints.formats import wants_columnar, COLUMNAR_MIMETYPE
+from src.queries.queries import SignalQueries
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+def _row(i, controller_id=1, **values):
+    return SimpleNamespace(id=i, controlador_id=controller_id, tstamp=T0 + timedelta(minutes=i),
+                           values=values, latitude=40.0, longitude=-3.0)
+
+def test_row_format_matches_signal_to_dict():
+    row = _row(7, sensor1=True, sensor3=1)
+    signal = Signal(tstamp=row.tstamp, values=row.values, latitude=40.0, longitude=-3.0)
+    signal.id = 7
+    signal._controlador = Controlador("c", "600000000", {})
+
+    assert signal_rows_to_dicts([row], "600000000") == [signal.to_dict()]
+
+def test_columns_use_epoch_seconds_and_sensor_masks():
+    columns = signal_rows_to_columns([_row(0, sensor1=True), _row(1, sensor2=True, sensor6=True)])
+
+    assert columns["tstamp"] == [int(T0.timestamp()), int(T0.timestamp()) + 60]
+    assert columns["sensors"] == [0b1, 0b100010]
+    assert columns["id"] == [0, 1]
+
+def test_columnar_dashboard_is_smaller_and_uses_one_query():
+    controllers = [SimpleNamespace(id=i, name=f"c{i}", config={}, phone_number=f"60000000{i}") for i in (1, 2)]
+    repo = Mock()
+    repo.get_by_empresa.return_value = controllers
+    queries = Mock()
+    queries.get_latest_rows.return_value = [_row(i, controller_id=1 + i % 2, sensor1=True) for i in range(20)]
+    service = ControllerMonitoringService(repo, queries)
+
+    rows = service.get_empresa_dashboard("1", ['view_dashboard'])
+    columns = service.get_empresa_dashboard("1", ['view_dashboard'], columnar=True)
+
+    assert queries.get_latest_rows.call_count == 2
+    assert len(rows[0]["signals"]) == len(columns[0]["signals"]["tstamp"]) == 10
+    assert len(json.dumps(columns)) < len(json.dumps(rows)) / 2
+
+def test_latest_rows_uses_a_window_function():
+    session = Mock()
+    SignalQueries(session).get_latest_rows([1, 2], 10)
+
+    sql = str(session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "row_number() OVER (PARTITION BY signals.controlador_id ORDER BY signals.tstamp DESC)" in sql
+
+def test_format_negotiation():
+    app = Flask(__name__)
+    with app.test_request_context('/?format=columnar'):
+        assert wants_columnar()
+    with app.test_request_context('/', headers={'Accept': COLUMNAR_MIMETYPE}):
+        assert wants_columnar()
+    with app.test_request_context('/', headers={'Accept': 'application/json, */*'}):
+        assert not wants_columnar()
+    with app.test_request_context('/'):
+        assert not wants_columnar()
+
+def test_signals_route_checks_empresa_access():
+    from unittest.mock import patch
+    from flask import g
+    from src.entrypoints.routes.signals import signals_bp
+    from src.services.auth import UserPermissions
+
+    app = Flask(__name__)
+    app.register_blueprint(signals_bp, url_prefix='/api/signals')
+
+    @app.before_request
+    def _principal():
+        g.current_user = UserPermissions(user_id=1, role='EMPRESA_USER', permissions={'view_signals'}, empresa_id=1)
+
+    url = '/api/signals/5?start_time=2024-01-01T00:00:00&end_time=2024-01-02T00:00:00'
+    with patch('src.entrypoints.routes.signals.EmpresaRepository') as repo, \
+            patch('src.entrypoints.routes.signals.SignalQueries') as queries:
+        queries.return_value.get_signal_rows.return_value = []
+        repo.return_value.get_controlador.return_value = SimpleNamespace(id=5, empresa_id=2, phone_number='6')
+        assert app.test_client().get(url).status_code == 403
+        queries.assert_not_called()
+
+        repo.return_value.get_controlador.return_value = SimpleNamespace(id=5, empresa_id=1, phone_number='6')
+        assert app.test_client().get(url).status_code == 200
@@ -0,0 +1,88 @@
+import gzip
+import json
+from flask import Flask, Response, jsonify
+from src.entrypoints.compression import ResponseCompressor
+from src.entrypoints.formats import stream_json_array
+
+ITEMS = [{"id": i, "tstamp": "2024-01-01T12:00:00", "value_sensor1": i % 2 == 0} for i in range(2000)]
+
+
+def _app(produced=None, **settings):
+    app = Flask(__name__)
+    ResponseCompressor(**settings).init_app(app)
+
+    @app.route('/big')
+    def big():
+        return jsonify(ITEMS)
+
+    @app.route('/small')
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            for item in ITEMS:
+                if produced is not None:
+                    produced.append(item["id"])
+                yield json.dumps(item) + '\n'
+        return Response(generate(), mimetype='text/plain')
+
+    @app.route('/array')
+    def array():
+        return stream_json_array(iter(ITEMS), chunk_size=300)
+
+    @app.route('/tagged')
+    def tagged():
+        response = jsonify(ITEMS)
+        response.set_etag('abc')
+        return response
+
+    return app
+
+def test_large_json_is_gzipped_when_accepted():
+    client = _app().test_client()
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert json.loads(gzip.decompress(response.data)) == ITEMS
+
+def test_not_compressed_without_accept_encoding_or_below_threshold():
+    client = _app().test_client()
+    assert 'Content-Encoding' not in client.get('/big').headers
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    assert small.json == {"ok": True}
+
+def test_streamed_response_is_compressed_incrementally():
+    produced = []
+    client = _app(produced).test_client()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    body = iter(response.response)
+    first = next(body)
+    # Only the read-ahead for the size threshold has been produced so far
+    assert 0 < len(produced) < len(ITEMS)
+    data = gzip.decompress(first + b''.join(body))
+    response.close()
+    assert data.decode().splitlines()[-1] == json.dumps(ITEMS[-1])
+
+def test_short_stream_is_sent_uncompressed():
+    client = _app(min_size=10 ** 9).test_client()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.data.splitlines()) == len(ITEMS)
+
+def test_streamed_json_array_matches_jsonify():
+    client = _app().test_client()
+    streamed = client.get('/array', headers={'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(streamed.data) == client.get('/big').data
+
+def test_compressed_response_gets_weak_etag():
+    client = _app().test_client()
+    assert client.get('/tagged', headers={'Accept-Encoding': 'gzip'}).headers['ETag'] == 'W/"abc"'
+    assert client.get('/tagged').headers['ETag'] == '"abc"'
@@ -0,0 +1,141 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock
+from flask import Flask, g, jsonify
+from sqlalchemy.dialects import postgresql
+from src.entrypoints.conditional import conditional_get, data_changed
+from src.queries.queries import SignalQueries
+from src.services.data_versions import DataVersions
+from src.services.event_bus import ControllerEvent
+
+LAST_SEEN = datetime(2024, 1, 1, 12, 0)
+
+
+class FakeVersions(DataVersions):
+    def __init__(self, **kwargs):
+        super().__init__(session_factory=None, **kwargs)
+        self.config_hash = 'a'
+        self.last_seen = LAST_SEEN
+        self.loads = 0
+
+    def _load(self, kind, key_id):
+        self.loads += 1
+        return ((key_id, self.config_hash, self.last_seen),), self.last_seen
+
+
+def _app(versions, view_calls, mask=7, bucket=None, user_id=1, allowed=True):
+    app = Flask(__name__)
+    app.extensions['data_versions'] = versions
+
+    @app.before_request
+    def principal():
+        g.current_user = SimpleNamespace(permission_mask=mask, user_id=user_id, empresa_id=1)
+
+    @app.route('/controlador/<string:controlador_id>/config')
+    @conditional_get('controller', 'controlador_id', time_bucket_seconds=bucket)
+    def config(controlador_id):
+        view_calls.append(controlador_id)
+        if not allowed:
+            return jsonify({"error": "Unauthorized access to empresa"}), 403
+        return jsonify({"id": controlador_id})
+
+    @app.route('/controlador/<string:controlador_id>/config', methods=['POST'])
+    def update(controlador_id):
+        versions.config_hash += '+'
+        data_changed(controller_id=controlador_id)
+        return jsonify({})
+
+    return app
+
+def test_matching_etag_returns_304_without_running_the_view():
+    calls = []
+    client = _app(FakeVersions(), calls).test_client()
+
+    first = client.get('/controlador/1/config')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] in ('private, no-cache', 'no-cache, private')
+    etag = first.headers['ETag']
+
+    second = client.get('/controlador/1/config', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+    assert calls == ['1']
+
+def test_if_modified_since_is_honoured_without_if_none_match():
+    calls = []
+    client = _app(FakeVersions(), calls).test_client()
+    last_modified = client.get('/controlador/1/config').headers['Last-Modified']
+
+    assert client.get('/controlador/1/config', headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get('/controlador/1/config', headers={
+        'If-Modified-Since': last_modified, 'If-None-Match': '"stale"'
+    }).status_code == 200
+    # Answered after the view: its access check still runs
+    outsider = _app(FakeVersions(), calls, user_id=2, allowed=False).test_client()
+    assert outsider.get('/controlador/1/config', headers={'If-Modified-Since': last_modified}).status_code == 403
+
+def test_write_in_this_process_changes_the_etag():
+    calls = []
+    client = _app(FakeVersions(ttl_seconds=60), calls).test_client()
+    etag = client.get('/controlador/1/config').headers['ETag']
+
+    client.post('/controlador/1/config')
+    response = client.get('/controlador/1/config', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_database_change_is_seen_after_ttl():
+    versions = FakeVersions(ttl_seconds=0)
+    client = _app(versions, []).test_client()
+    etag = client.get('/controlador/1/config').headers['ETag']
+
+    versions.config_hash = 'b'
+    assert client.get('/controlador/1/config', headers={'If-None-Match': etag}).status_code == 200
+
+def test_versions_are_cached_within_ttl():
+    versions = FakeVersions(ttl_seconds=60)
+    client = _app(versions, []).test_client()
+    for _ in range(5):
+        client.get('/controlador/1/config')
+    assert versions.loads == 1
+
+def test_etag_differs_per_principal_and_query_string():
+    versions = FakeVersions()
+    etag = _app(versions, [], mask=7).test_client().get('/controlador/1/config').headers['ETag']
+    other_mask = _app(versions, [], mask=1).test_client().get('/controlador/1/config').headers['ETag']
+    other_user = _app(versions, [], user_id=2).test_client().get('/controlador/1/config').headers['ETag']
+    other_query = _app(versions, [], mask=7).test_client().get('/controlador/1/config?days=2').headers['ETag']
+    assert len({etag, other_mask, other_user, other_query}) == 4
+
+def test_stamp_is_the_same_in_every_process():
+    busy, fresh = FakeVersions(), FakeVersions()
+    for _ in range(3):
+        busy.bump('controller', 1)
+
+    assert busy.get('controller', 1)[0] == fresh.get('controller', 1)[0]
+
+def test_time_bucketed_responses_have_no_last_modified():
+    response = _app(FakeVersions(), [], bucket=30).test_client().get('/controlador/1/config')
+    assert 'ETag' in response.headers
+    assert 'Last-Modified' not in response.headers
+
+def test_signal_event_bumps_controller_and_empresa():
+    versions = FakeVersions(ttl_seconds=60)
+    controller = versions.get('controller', 1)
+    empresa = versions.get('empresa', 3)
+
+    versions.last_seen = datetime(2024, 1, 1, 12, 5)
+    versions.on_event(ControllerEvent(ControllerEvent.SIGNAL, 1, versions.last_seen, {"empresa_id": 3}))
+
+    assert versions.get('controller', 1)[0] != controller[0]
+    assert versions.get('empresa', 3)[0] != empresa[0]
+
+def test_version_rows_query_is_one_statement():
+    session = Mock()
+    SignalQueries(session).get_version_rows(empresa_id=3)
+
+    stmt = session.execute.call_args[0][0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert 'max(signals.tstamp)' in sql
+    assert 'md5(CAST(controladores.config AS TEXT))' in sql
+    assert 'controladores.empresa_id' in sql
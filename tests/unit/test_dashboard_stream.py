@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from datetime import datetime
+from src.services.event_bus import EventBus, ControllerEvent
+from src.services.dashboard_stream import DashboardStreamBroker, StreamClient
+
+def _signal(controller_id, n):
+    return ControllerEvent(ControllerEvent.SIGNAL, controller_id, datetime.now(), {"signal": {"n": n}})
+
+def test_readings_are_coalesced_per_controller():
+    bus = EventBus()
+    broker = DashboardStreamBroker(bus)
+    client = broker.register([1, 2])
+
+    for n in range(5):
+        bus.publish(_signal(1, n))
+    bus.publish(_signal(2, 0))
+    bus.publish(_signal(3, 0))  # not watched
+
+    batch, dropped = client.next_batch(window=0, heartbeat=0)
+
+    assert batch == [('reading', {"n": 4}), ('reading', {"n": 0})]
+    assert dropped == 0
+
+def test_empresa_client_picks_up_new_controllers():
+    bus = EventBus()
+    broker = DashboardStreamBroker(bus)
+    client = broker.register([1], empresa_id=7)
+    other = broker.register([9], empresa_id=8)
+
+    bus.publish(ControllerEvent(ControllerEvent.SIGNAL, 2, datetime.now(), {"signal": {"n": 0}, "empresa_id": 7}))
+    bus.publish(ControllerEvent(ControllerEvent.OFFLINE, 2, datetime(2024, 1, 1)))
+
+    batch, _ = client.next_batch(window=0, heartbeat=0)
+    assert [event_type for event_type, _ in batch] == ['reading', 'status']
+    assert other.next_batch(window=0, heartbeat=0) is None
+
+    broker.unregister(client)
+    broker.unregister(other)
+    assert broker._by_controller == {} and broker._by_empresa == {}
+
+def test_status_events_and_alerts():
+    bus = EventBus()
+    broker = DashboardStreamBroker(bus)
+    client = broker.register([1])
+
+    bus.publish(ControllerEvent(ControllerEvent.OFFLINE, 1, datetime(2024, 1, 1)))
+    bus.publish(ControllerEvent(ControllerEvent.ALERT, 1, datetime(2024, 1, 1), {"rule": "a"}))
+    bus.publish(ControllerEvent(ControllerEvent.ALERT, 1, datetime(2024, 1, 1), {"rule": "b"}))
+
+    batch, _ = client.next_batch(window=0, heartbeat=0)
+
+    assert [event_type for event_type, _ in batch] == ['status', 'alert', 'alert']
+    assert batch[0][1]["status"] == 'offline'
+
+def test_slow_client_buffer_is_bounded():
+    client = StreamClient([1], max_pending=3)
+    for n in range(5):
+        client.offer('alert', 1, {"n": n})
+
+    batch, dropped = client.next_batch(window=0, heartbeat=0)
+
+    assert [payload["n"] for _, payload in batch] == [2, 3, 4]
+    assert dropped == 2
+
+def test_stream_emits_frames_and_unregisters_on_close():
+    bus = EventBus()
+    broker = DashboardStreamBroker(bus, coalesce_seconds=0, heartbeat_seconds=0)
+    client = broker.register([1])
+    frames = broker.stream(client)
+
+    assert next(frames).startswith("retry:")
+    assert next(frames) == ": keepalive\n\n"
+    bus.publish(_signal(1, 7))
+    assert next(frames) == 'event: reading\ndata: {"n": 7}\n\n'
+
+    frames.close()
+    assert broker.client_count == 0
+    bus.publish(_signal(1, 8))
+
+def test_client_limit():
+    broker = DashboardStreamBroker(EventBus(), max_clients=1)
+    assert broker.register([1]) is not None
+    assert broker.register([1]) is None
+
+def test_async_client_is_woken_from_a_publisher_thread():
+    async def scenario():
+        bus = EventBus()
+        broker = DashboardStreamBroker(bus, coalesce_seconds=0, heartbeat_seconds=5)
+        client = broker.register([1], asynchronous=True)
+        stream = broker.astream(client)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+
+        threading.Timer(0.05, bus.publish, args=(_signal(1, 7),)).start()
+        frame = await asyncio.wait_for(stream.__anext__(), 2)
+        await stream.aclose()
+        return frame, broker.client_count
+
+    frame, remaining = asyncio.run(scenario())
+    assert frame == 'event: reading\ndata: {"n": 7}\n\n'
+    assert remaining == 0
+
+def test_async_client_heartbeat_when_idle():
+    async def scenario():
+        broker = DashboardStreamBroker(EventBus(), coalesce_seconds=0, heartbeat_seconds=0.01)
+        client = broker.register([1], asynchronous=True)
+        return await client.next_batch_async(0, 0.01)
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,59 @@
+import threading
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from src.adapters.engine import create_db_engine, pool_stats, InstrumentedQueuePool
+from src.adapters.async_engine import async_uri
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.2)
+    yield engine
+    engine.dispose()
+
+def test_engine_uses_configured_instrumented_pool(engine):
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        stats = pool_stats(engine)
+
+    assert stats["size"] == 1
+    assert stats["checked_out"] == 1
+    assert stats["waits"] == 0
+
+def test_exhausted_pool_counts_waits_and_timeouts(engine):
+    with engine.connect():
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_ms"] >= 150
+
+def test_wait_that_gets_a_connection_is_timed(engine):
+    conn = engine.connect()
+    threading.Timer(0.05, conn.close).start()
+
+    with engine.connect():
+        pass
+
+    stats = pool_stats(engine)
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["peak_checked_out"] == 1
+
+def test_stats_survive_dispose(engine):
+    with engine.connect():
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+    engine.dispose()
+
+    assert pool_stats(engine)["timeouts"] == 1
+
+def test_async_uri_uses_asyncpg():
+    assert async_uri('postgresql://u:p@h:1/db') == 'postgresql+asyncpg://u:p@h:1/db'
+    assert async_uri('postgresql+psycopg2://u:p@h/db') == 'postgresql+asyncpg://u:p@h/db'
+    assert async_uri('sqlite+aiosqlite:///x.db') == 'sqlite+aiosqlite:///x.db'
@@ -0,0 +1,58 @@
+from src.services.downsampling import downsample_step_indices, connectivity_segments
+
+GAP = 300
+
+def test_short_series_is_untouched():
+    assert downsample_step_indices([0, 60, 120], [1, 1, 1], 10, GAP) == [0, 1, 2]
+
+def test_no_budget_keeps_everything():
+    times = list(range(0, 6000, 60))
+    assert len(downsample_step_indices(times, [0] * len(times), None, GAP)) == len(times)
+
+def test_budget_is_respected_when_transitions_fit():
+    import random
+    rng = random.Random(7)
+    for _ in range(500):
+        n = rng.randint(10, 300)
+        start = 1.7e9 + rng.random() * 1e6
+        times = sorted(start + rng.random() * 3600 for _ in range(n))
+        masks = [0] * n
+        switch = rng.randint(1, n - 1)
+        masks[switch:] = [1] * (n - switch)
+        max_points = rng.randint(4, n - 1)
+
+        result = downsample_step_indices(times, masks, max_points, 3600)
+
+        assert len(result) <= max_points
+        assert {0, switch - 1, switch, n - 1} <= set(result)
+
+def test_transitions_are_always_kept():
+    times = list(range(0, 60 * 1000, 60))
+    masks = [0] * 1000
+    masks[500:510] = [0b100] * 10
+
+    kept = downsample_step_indices(times, masks, 20, GAP)
+
+    assert {499, 500, 509, 510} <= set(kept)
+    assert kept[0] == 0 and kept[-1] == 999
+    assert len(kept) <= 20
+
+def test_gaps_are_always_kept():
+    times = list(range(0, 60 * 100, 60)) + list(range(60 * 200, 60 * 300, 60))
+    masks = [1] * len(times)
+
+    kept = downsample_step_indices(times, masks, 10, GAP)
+
+    assert {99, 100} <= set(kept)
+
+def test_connectivity_segments_merge_and_gap():
+    segments = connectivity_segments([0, 60, 120, 1000], 1100, GAP)
+
+    assert segments == [
+        [0, 420, "connected"],
+        [420, 1000, "disconnected"],
+        [1000, 1100, "connected"],
+    ]
+
+def test_connectivity_segments_empty():
+    assert connectivity_segments([], 1000, GAP) == []
@@ -0,0 +1,96 @@
+import pytest
+from collections import namedtuple
+from datetime import datetime, timedelta
+from src.services.fleet_analytics_service import (
+    compute_controller_metrics,
+    chunk_ids,
+    merge_fleet_report
+)
+from src.domain.model import CONNECTION_WINDOW_SECONDS
+
+Ref = namedtuple('Ref', 'id name empresa_id')
+
+START = datetime(2024, 1, 1, 0, 0)
+END = START + timedelta(hours=1)
+
+def _ts(minutes):
+    return (START + timedelta(minutes=minutes)).timestamp()
+
+def _ts_dt(minutes):
+    return START + timedelta(minutes=minutes)
+
+def test_metrics_for_controller_without_signals():
+    metrics = compute_controller_metrics([], [], START, END)
+
+    assert metrics["signal_count"] == 0
+    assert metrics["uptime_ratio"] == 0.0
+    assert metrics["duty_cycle"]["value_sensor1"] == 0.0
+
+def test_uptime_caps_each_signal_at_window():
+    # Signals every minute for 10 minutes, then a 50 minute silence
+    times = [_ts(i) for i in range(10)]
+    masks = [0b1] * 10
+
+    metrics = compute_controller_metrics(times, masks, START, END)
+
+    assert metrics["uptime_seconds"] == pytest.approx(9 * 60 + CONNECTION_WINDOW_SECONDS)
+    assert metrics["duty_cycle"]["value_sensor1"] == pytest.approx(1.0)
+    assert metrics["duty_cycle"]["value_sensor2"] == 0.0
+
+def test_duty_cycle_is_time_weighted():
+    times = [_ts(0), _ts(1), _ts(4)]
+    masks = [0b10, 0b00, 0b10]
+
+    metrics = compute_controller_metrics(times, masks, START, _ts_dt(5))
+
+    # sensor2 on for 60s + 60s out of 300s covered
+    assert metrics["duty_cycle"]["value_sensor2"] == pytest.approx(120 / 300)
+
+def test_correlation_of_identical_sensors():
+    times = [_ts(i) for i in range(4)]
+    masks = [0b11, 0b00, 0b11, 0b00]
+
+    corr = compute_controller_metrics(times, masks, START, END)["correlation"]
+
+    assert corr["value_sensor1"]["value_sensor2"] == pytest.approx(1.0)
+    assert corr["value_sensor1"]["value_sensor3"] == 0.0
+
+def test_chunk_ids():
+    assert chunk_ids([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+def test_merge_fleet_report_summary():
+    refs = [Ref(1, "A", 10), Ref(2, "B", 10)]
+    results = {
+        1: compute_controller_metrics([_ts(0)], [0b1], START, END),
+        2: compute_controller_metrics([], [], START, END),
+    }
+
+    report = merge_fleet_report(refs, results, START, END)
+
+    assert report["controller_count"] == 2
+    assert report["controllers"]["1"]["name"] == "A"
+    assert report["summary"]["signal_count"] == 1
+    assert report["summary"]["uptime_ratio"] == pytest.approx(CONNECTION_WINDOW_SECONDS / (3600 * 2))
+    assert report["summary"]["duty_cycle"]["value_sensor1"] == pytest.approx(1.0)
+
+def test_route_clamps_requested_workers(monkeypatch):
+    from unittest.mock import patch
+    from flask import Flask, g
+    from src.entrypoints.routes.dashboard import dashboard_bp
+    from src.services.auth import UserPermissions
+
+    monkeypatch.setenv('FLEET_ANALYTICS_MAX_WORKERS', '2')
+    app = Flask(__name__)
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+
+    @app.before_request
+    def _principal():
+        g.current_user = UserPermissions(user_id=1, role='ADMIN', permissions={'manage_empresa'})
+
+    client = app.test_client()
+    with patch('src.entrypoints.routes.dashboard.FleetAnalyticsRunner') as runner, \
+            patch('src.entrypoints.routes.dashboard.os.cpu_count', return_value=8):
+        runner.return_value.run.return_value = {}
+        for requested, expected in (('-3', 1), ('0', 1), ('1000', 2), ('1', 1)):
+            assert client.get(f'/api/dashboard/fleet/analytics?workers={requested}').status_code == 200
+            assert runner.call_args.kwargs['max_workers'] == expected
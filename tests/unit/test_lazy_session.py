@@ -0,0 +1,67 @@
+from unittest.mock import Mock
+import pytest
+from flask import Flask, request, jsonify
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from src.adapters.session import LazySession, ReadOnlySessionError, _refuse_flush
+from src.entrypoints.session import read_only_session
+
+
+def test_session_is_created_on_first_use_only():
+    factory = Mock()
+    session = LazySession(factory)
+    session.close()
+    assert factory.call_count == 0
+
+    session.query('x')
+    session.execute('y')
+    assert factory.call_count == 1
+    session.close()
+    factory.return_value.close.assert_called_once()
+
+def test_read_only_session_autocommits_and_refuses_flush():
+    engine = create_engine('sqlite://')
+    session = LazySession(
+        sessionmaker(bind=engine),
+        sessionmaker(bind=engine.execution_options(isolation_level='AUTOCOMMIT'), autoflush=False)
+    )
+
+    assert session.set_read_only()
+    assert session.execute(text("select 1")).scalar() == 1
+    assert session.autoflush is False
+    assert event.contains(session._session, 'before_flush', _refuse_flush)
+    with pytest.raises(ReadOnlySessionError):
+        _refuse_flush(session._session, None, None)
+
+def test_cannot_switch_a_session_already_in_use():
+    session = LazySession(Mock(), Mock())
+    session.query('x')
+
+    assert not session.set_read_only()
+    assert not session.read_only
+
+def test_requests_that_skip_the_database_never_create_a_session():
+    factory, read_only_factory = Mock(), Mock()
+    app = Flask(__name__)
+
+    @app.before_request
+    def inject_session():
+        request.environ['session'] = LazySession(factory, read_only_factory)
+
+    @app.route('/health')
+    def health():
+        return jsonify({})
+
+    @app.route('/report')
+    @read_only_session
+    def report():
+        request.environ['session'].execute('select 1')
+        return jsonify({})
+
+    client = app.test_client()
+    client.options('/health')
+    client.get('/health')
+    assert factory.call_count == 0 and read_only_factory.call_count == 0
+
+    client.get('/report')
+    assert factory.call_count == 0 and read_only_factory.call_count == 1
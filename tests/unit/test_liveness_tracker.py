@@ -0,0 +1,78 @@
+from datetime import datetime
+from src.services.arrival_stats import ArrivalStats
+from src.services.event_bus import EventBus, ControllerEvent
+from src.services.liveness_tracker import LivenessTracker
+
+def _tracker():
+    bus = EventBus()
+    events = []
+    bus.subscribe(events.append, kinds=[ControllerEvent.OFFLINE, ControllerEvent.ONLINE])
+    return LivenessTracker(ArrivalStats(), bus, wheel_size=64), events
+
+def test_silent_controller_goes_offline_once():
+    tracker, events = _tracker()
+    tracker.refresh(1, 1000.0)
+    deadline = 1000.0 + tracker.arrival_stats.offline_after(1)
+
+    assert tracker.advance(deadline - 1) == []
+    assert tracker.advance(deadline + 1) == [1]
+    assert tracker.advance(deadline + 100) == []
+    assert [(e.kind, e.controller_id) for e in events] == [(ControllerEvent.OFFLINE, 1)]
+    assert tracker.status(1) == 'offline'
+
+def test_refresh_postpones_deadline_and_reports_comeback():
+    tracker, events = _tracker()
+    tracker.refresh(1, 1000.0)
+    tracker.refresh(1, 1200.0)
+
+    assert tracker.advance(1000.0 + tracker.arrival_stats.offline_after(1) + 1) == []
+
+    tracker.advance(5000.0)
+    tracker.refresh(1, 5001.0)
+
+    assert [e.kind for e in events] == [ControllerEvent.OFFLINE, ControllerEvent.ONLINE]
+    assert tracker.status(1) == 'online'
+
+def test_deadlines_beyond_one_wheel_turn_wait_their_round():
+    tracker, _ = _tracker()
+    tracker.arrival_stats.observe(1, 0.0, prior_interval=3600)
+    tracker.refresh(1, 0.0)
+
+    for now in range(0, 5000, 10):
+        assert tracker.advance(float(now)) == []
+    assert tracker.advance(5500.0) == [1]
+
+def test_rebuild_marks_stale_controllers_offline_without_events():
+    tracker, events = _tracker()
+    now = datetime(2024, 1, 1, 12, 0).timestamp()
+
+    tracker.rebuild([
+        (1, datetime(2024, 1, 1, 11, 0)),
+        (2, datetime(2024, 1, 1, 11, 59)),
+    ], now=now)
+
+    assert tracker.status(1) == 'offline'
+    assert tracker.status(2) == 'online'
+    assert events == []
+
+def test_rebuild_uses_configured_report_interval():
+    tracker, events = _tracker()
+    now = datetime(2024, 1, 1, 12, 0).timestamp()
+
+    tracker.rebuild([
+        (1, datetime(2024, 1, 1, 11, 50), {"report_interval": 900}),
+        (2, datetime(2024, 1, 1, 11, 50), {}),
+    ], now=now)
+
+    # Ten minutes of silence is normal for a 15 minute reporter
+    assert tracker.status(1) == 'online'
+    assert tracker.status(2) == 'offline'
+    assert events == []
+
+def test_signal_events_refresh_tracker():
+    tracker, _ = _tracker()
+    tracker.event_bus.subscribe(tracker.on_event, kinds=[ControllerEvent.SIGNAL])
+
+    tracker.event_bus.publish(ControllerEvent(ControllerEvent.SIGNAL, 7, datetime.now()))
+
+    assert tracker.status(7) == 'online'
@@ -0,0 +1,102 @@
+import threading
+from unittest.mock import Mock
+import pytest
+from werkzeug.security import generate_password_hash
+from src.services.password_hasher import PasswordHasher, HasherBusy
+from src.services.auth_service import AuthService
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+def test_hash_and_verify_run_on_the_pool():
+    hasher = PasswordHasher(FAST, max_workers=1)
+    stored = hasher.hash('secret')
+
+    assert hasher.verify(stored, 'secret')
+    assert not hasher.verify(stored, 'wrong')
+    assert hasher.stats()["completed"] == 3
+
+def test_needs_rehash_detects_method_and_cost():
+    hasher = PasswordHasher(FAST)
+
+    assert not hasher.needs_rehash(generate_password_hash('x', FAST))
+    assert hasher.needs_rehash(generate_password_hash('x', 'pbkdf2:sha256:2000'))
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(FAST, max_workers=1, max_pending=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow(*_):
+        started.set()
+        release.wait(5)
+        return True
+
+    worker = threading.Thread(target=hasher._submit, args=(slow,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.verify('x', 'y')
+    release.set()
+    worker.join()
+
+    assert hasher.stats()["rejected"] == 1
+
+def test_timeout_raises_busy_and_keeps_the_slot_until_done():
+    hasher = PasswordHasher(FAST, max_workers=1, max_pending=2, timeout=0.05)
+    release = threading.Event()
+
+    def slow(*_):
+        release.wait(5)
+        return True
+
+    with pytest.raises(HasherBusy):
+        hasher._submit(slow)
+    assert hasher.stats()["timed_out"] == 1
+    assert hasher.stats()["pending"] == 1
+
+    release.set()
+    hasher.shutdown()
+    hasher._executor.shutdown(wait=True)
+    assert hasher.stats()["pending"] == 0
+
+def test_login_returns_503_when_hasher_is_busy():
+    from unittest.mock import patch
+    from flask import Flask, request
+    from src.entrypoints.routes.auth import auth_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(auth_bp)
+
+    @app.before_request
+    def inject_session():
+        request.environ['session'] = Mock()
+
+    with patch.object(AuthService, 'authenticate', side_effect=HasherBusy("timed out")):
+        response = app.test_client().post('/login', json={"email": "a@b.c", "password": "x"})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_login_rehashes_outdated_hash():
+    hasher = PasswordHasher(FAST)
+    user = Mock(id=1, email='a@b.c', permission_mask=1, empresa=None,
+                password_hash=generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    user.role.name = 'ADMIN'
+    session = Mock()
+    session.query().filter_by().first.return_value = user
+
+    token = AuthService(session, 'jwt-secret', hasher=hasher).authenticate('a@b.c', 'secret')
+
+    assert token
+    assert user.password_hash.startswith(FAST + '$')
+    session.commit.assert_called_once()
+
+def test_wrong_password_does_not_rehash():
+    hasher = PasswordHasher(FAST)
+    user = Mock(password_hash=generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    session = Mock()
+    session.query().filter_by().first.return_value = user
+
+    assert AuthService(session, 'jwt-secret', hasher=hasher).authenticate('a@b.c', 'nope') is None
+    session.commit.assert_not_called()
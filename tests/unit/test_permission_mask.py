@@ -0,0 +1,43 @@
+from src.domain.model import (
+    Role, Permission, User, ROLE_MASKS, PERMISSION_BITS,
+    permissions_to_mask, required_mask, mask_to_permissions
+)
+from src.services.auth import UserPermissions
+
+
+def test_every_permission_has_its_own_bit():
+    bits = list(PERMISSION_BITS.values())
+    assert len(set(bits)) == len(Permission)
+    assert all(bit & (bit - 1) == 0 for bit in bits)
+
+def test_mask_round_trips_to_names():
+    names = {'view_dashboard', 'manage_users'}
+    assert mask_to_permissions(permissions_to_mask(names)) == names
+
+def test_role_masks_match_user_permissions():
+    for role in Role:
+        user = User("A", "B", "a@b.c", "pw", role)
+        assert user.permission_mask == ROLE_MASKS[role]
+    assert ROLE_MASKS[Role.ADMIN] & ROLE_MASKS[Role.EMPRESA_USER] == ROLE_MASKS[Role.EMPRESA_USER]
+
+def test_unknown_permission_is_never_granted():
+    admin = UserPermissions(user_id=1, role='ADMIN', permission_mask=ROLE_MASKS[Role.ADMIN])
+
+    assert not admin.has_mask(required_mask(['admin']))
+    assert not admin.has_permission('admin')
+    assert admin.has_permission('manage_users')
+
+def test_unknown_granted_name_does_not_satisfy_unknown_requirement():
+    principal = UserPermissions(user_id=1, role='X', permissions={'view_signals', 'legacy_thing'})
+
+    assert principal.permission_mask == PERMISSION_BITS['view_signals']
+    assert not principal.has_mask(required_mask(['typo_perm']))
+    assert not principal.has_permission('legacy_thing')
+
+def test_principal_accepts_mask_or_legacy_names():
+    from_mask = UserPermissions.from_claims({'user_id': 1, 'role': 'EMPRESA_USER', 'pm': ROLE_MASKS[Role.EMPRESA_USER]})
+    from_names = UserPermissions.from_claims({'user_id': 1, 'role': 'EMPRESA_USER', 'permissions': ['view_signals']})
+
+    assert 'view_empresas' in from_mask.permissions
+    assert 'manage_users' not in from_mask.permissions
+    assert from_names.permission_mask == PERMISSION_BITS['view_signals']
@@ -0,0 +1,85 @@
+import os
+import time
+import pytest
+from flask import Flask, jsonify
+from src.entrypoints.instrumentation import setup_profiler
+from src.services.profiler import Profiler
+
+
+def _busy(ms):
+    end = time.perf_counter() + ms / 1000
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+def _app():
+    app = Flask(__name__)
+    profiler = setup_profiler(app, Profiler(max_seconds=5))
+
+    @app.route('/slow')
+    def slow():
+        return jsonify(_busy(60))
+
+    @app.route('/fast')
+    def fast():
+        return jsonify(1)
+
+    return app, profiler
+
+def _wait(profiler, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while profiler.active is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return profiler.last
+
+def test_sampler_collapses_stacks_of_the_filtered_endpoint():
+    app, profiler = _app()
+    client = app.test_client()
+    run = profiler.start('sample', requests=2, endpoint='slow', interval_ms=2)
+    client.get('/fast')
+    client.get('/slow')
+    client.get('/slow')
+
+    assert _wait(profiler) is run
+    assert run.requests == 2 and run.finished_at is not None
+    lines = run.collapsed().splitlines()
+    assert lines and all(line.startswith('slow;') for line in lines)
+    assert any('test_profiler:_busy' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) >= 1 and stack.split(';')[-1]
+
+def test_cprofile_aggregates_requests_and_only_one_run_at_a_time():
+    app, profiler = _app()
+    client = app.test_client()
+    profiler.start('cprofile', requests=2)
+    with pytest.raises(RuntimeError):
+        profiler.start('sample')
+    client.get('/slow')
+    client.get('/fast')
+
+    run = _wait(profiler)
+    assert run.to_dict()["worker"] == os.getpid()
+    functions = {row["function"].split(' ')[0]: row for row in run.to_dict()["functions"]}
+    assert functions["_busy"]["calls"] == 1
+    assert functions["_busy"]["cumulative_ms"] >= 50
+
+def test_memory_mode_reports_growth():
+    profiler = Profiler(max_seconds=5)
+    profiler.start('memory', seconds=5)
+    kept = [bytearray(1024) for _ in range(2000)]
+    run = profiler.stop()
+
+    assert run.finished_at is not None and kept
+    growth = run.to_dict()["growth"]
+    assert growth[0]["size_diff_kb"] > 1000
+    assert 'test_profiler.py' in growth[0]["location"]
+    assert 'test_profiler.py' in run.collapsed()
+
+def test_invalid_runs_are_rejected():
+    profiler = Profiler()
+    with pytest.raises(ValueError):
+        profiler.start('perf')
+    with pytest.raises(ValueError):
+        profiler.start('sample', seconds=0)
+    assert profiler.active is None
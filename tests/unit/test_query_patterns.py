@@ -0,0 +1,65 @@
+import logging
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from src.adapters.sql_events import StatementEvents
+from src.entrypoints.instrumentation import setup_query_tracking
+from src.services.query_patterns import normalize_sql
+
+
+def test_normalize_sql_collapses_literals_params_and_in_lists():
+    assert normalize_sql("SELECT * FROM signals WHERE id = 42 AND name = 'a''b'") == \
+        "SELECT * FROM signals WHERE id = ? AND name = ?"
+    assert normalize_sql("SELECT x FROM t WHERE id = %(id_1)s") == normalize_sql("SELECT x FROM t WHERE id = 7")
+    assert normalize_sql("SELECT x FROM t WHERE id IN (%s, %s,\n %s)") == "SELECT x FROM t WHERE id IN (?...)"
+    # Identifiers containing digits are kept
+    assert normalize_sql("SELECT t1.value_2 FROM t1") == "SELECT t1.value_2 FROM t1"
+
+def _app(tmp_path, threshold=3):
+    engine = create_engine(f"sqlite:///{tmp_path / 'patterns.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1), (2), (3), (4)"))
+    events = StatementEvents(engine)
+
+    app = Flask(__name__)
+    setup_query_tracking(app, events, threshold)
+
+    @app.route('/per-item')
+    def per_item():
+        with engine.connect() as conn:
+            ids = [row.id for row in conn.execute(text("SELECT id FROM t"))]
+            return jsonify([conn.execute(text("SELECT id FROM t WHERE id = :id"), {"id": i}).scalar() for i in ids])
+
+    @app.route('/batched')
+    def batched():
+        with engine.connect() as conn:
+            return jsonify([row.id for row in conn.execute(text("SELECT id FROM t WHERE id IN (1, 2, 3, 4)"))])
+
+    return app, events
+
+def test_repeated_shapes_are_flagged_with_endpoint(tmp_path, caplog):
+    app, _ = _app(tmp_path)
+    client = app.test_client()
+    with caplog.at_level(logging.WARNING, logger='src.services.query_patterns'):
+        client.get('/per-item')
+        client.get('/batched')
+
+    tracker = app.extensions['query_tracker']
+    assert tracker.flagged == {'per_item': 1}
+    finding = tracker.recent()[0]
+    assert finding['count'] == 4 and finding['total_statements'] == 5
+    assert finding['statement'] == "SELECT id FROM t WHERE id = ?"
+    assert "Repeated query in per_item: 4 x" in caplog.text
+
+def test_query_budget_fixture(tmp_path, query_budget):
+    app, events = _app(tmp_path, threshold=100)
+    client = app.test_client()
+
+    with query_budget(max_statements=1, max_repeats=1, statement_events=events) as log:
+        client.get('/batched')
+    assert log.total == 1
+
+    with pytest.raises(pytest.fail.Exception, match=r"4 x SELECT id FROM t WHERE id = \?"):
+        with query_budget(max_repeats=1, statement_events=events):
+            client.get('/per-item')
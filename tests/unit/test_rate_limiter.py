@@ -0,0 +1,78 @@
+from datetime import datetime
+from flask import Flask
+from src.entrypoints.routes.signals import signals_bp
+from src.services.event_bus import ControllerEvent
+from src.services.rate_limiter import IngestRateLimiter, parse_rate_limit
+
+
+def _signal_event(phone_number, config):
+    return ControllerEvent(ControllerEvent.SIGNAL, 1, datetime.now(), {
+        "config": config,
+        "signal": {"controlador_id": phone_number}
+    })
+
+def test_burst_then_refill_at_rate():
+    limiter = IngestRateLimiter(per_minute=60, burst=3)
+    assert [limiter.acquire('600', now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire('600', now=100.0) == 1.0
+    assert limiter.acquire('600', now=100.5) == 0.5
+    assert limiter.acquire('600', now=101.0) == 0.0
+    # Other controllers have their own bucket
+    assert limiter.acquire('700', now=101.0) == 0.0
+
+    stats = limiter.stats()
+    assert stats["throttled"] == {'600': 2} and stats["accepted"] == 5
+    metrics = limiter.render_prometheus()
+    assert 'iot_ingest_throttled_total 2' in metrics
+    # Phone numbers stay out of the exported metrics
+    assert '600' not in metrics
+
+def test_config_override_learned_from_signal_events():
+    limiter = IngestRateLimiter(per_minute=60, burst=1)
+    limiter.acquire('600', now=0.0)
+    limiter.on_event(_signal_event('600', {"rate_limit": {"per_minute": 600, "burst": 5}}))
+    # Existing bucket keeps its tokens but refills at the new rate
+    assert limiter.acquire('600', now=0.1) == 0.0
+    assert limiter.stats()["overrides"] == {'600': {"per_minute": 600.0, "burst": 5.0}}
+
+    limiter.on_event(_signal_event('600', {}))
+    assert limiter.stats()["overrides"] == {}
+    assert parse_rate_limit({"rate_limit": {"per_minute": -1}}) is None
+    assert parse_rate_limit({"rate_limit": {"burst": 2}}) is None
+
+def test_idle_buckets_are_recycled():
+    limiter = IngestRateLimiter(per_minute=60, burst=2, idle_seconds=10)
+    limiter._next_sweep = 0.0
+    limiter.acquire('600', now=0.0)
+    limiter.acquire('700', now=0.0)
+    limiter.acquire('800', now=100.0)
+    assert limiter.stats()["tracked_controllers"] == 1
+    # Freed slots are reused, with a full bucket
+    limiter.acquire('900', now=100.0)
+    assert len(limiter._tokens) == 2 and limiter.acquire('900', now=100.0) == 0.0
+
+def test_table_is_capped_least_recently_used_first():
+    limiter = IngestRateLimiter(per_minute=60, burst=1, max_controllers=2)
+    limiter.acquire('600', now=0.0)
+    limiter.acquire('600', now=0.0)
+    limiter.acquire('700', now=0.0)
+    # 600 was used more recently than 700
+    limiter.acquire('600', now=0.1)
+    limiter.acquire('random-1', now=0.2)
+
+    stats = limiter.stats()
+    assert stats["tracked_controllers"] == 2 and stats["evicted"] == 1
+    assert stats["throttled"] == {'600': 2}
+    assert len(limiter._tokens) == 2
+
+def test_input_is_rejected_with_retry_after():
+    app = Flask(__name__)
+    app.register_blueprint(signals_bp, url_prefix='/api/signals')
+    limiter = IngestRateLimiter(per_minute=6, burst=1)
+    app.extensions['ingest_limiter'] = limiter
+    limiter.acquire('600')
+
+    response = app.test_client().post('/api/signals/input', json={"controlador_id": "600", "sensor_states": {}})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '10'
+    assert response.get_json()["retry_after"] == 10
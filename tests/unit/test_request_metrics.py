@@ -0,0 +1,87 @@
+import random
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from src.adapters.sql_events import StatementEvents
+from src.entrypoints.instrumentation import setup_request_metrics
+from src.entrypoints.routes.metrics import metrics_bp
+from src.services.request_metrics import HdrHistogram
+
+
+def test_histogram_quantiles_within_relative_error():
+    histogram = HdrHistogram()
+    values = sorted(random.Random(1).randint(1, 5_000_000) for _ in range(10000))
+    for value in values:
+        histogram.record(value)
+
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(histogram.quantile(q) - exact) <= exact / 16
+    assert histogram.count == len(values) and histogram.max == values[-1]
+
+def test_small_values_are_exact_and_cumulative_counts():
+    histogram = HdrHistogram(max_value=1000)
+    for value in (0, 1, 1, 2, 5, 50, 5000):
+        histogram.record(value)
+    assert histogram.cumulative([0, 1, 2, 10, 1000]) == [1, 3, 4, 5, 6]
+    assert histogram.quantile(0.5) == 2
+
+def _app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+
+    app = Flask(__name__)
+    setup_request_metrics(app, StatementEvents(engine))
+    app.register_blueprint(metrics_bp)
+
+    @app.route('/items/<int:n>')
+    def items(n):
+        with engine.connect() as conn:
+            rows = [conn.execute(text("SELECT id FROM t WHERE id <= :n"), {"n": n}).all() for _ in range(n)]
+        return jsonify([[r.id for r in batch] for batch in rows])
+
+    return app
+
+def test_requests_are_recorded_per_endpoint(tmp_path):
+    app = _app(tmp_path)
+    client = app.test_client()
+    client.get('/items/3')
+    client.get('/items/2')
+    client.get('/missing')
+
+    metrics = app.extensions['request_metrics']
+    endpoint = metrics.endpoint('items')
+    assert endpoint.latency_us.count == 2
+    assert endpoint.statements.max == 3
+    assert endpoint.db_us.total > 0
+    assert endpoint.serialize_us.count == 2
+    assert metrics.endpoint('unmatched').status == {404: 1}
+    assert metrics.summary()['items']['count'] == 2
+
+def test_prometheus_text(tmp_path, monkeypatch):
+    monkeypatch.setenv('METRICS_TOKEN', 'scrape')
+    client = _app(tmp_path).test_client()
+    client.get('/items/1')
+    body = client.get('/metrics', headers={'Authorization': 'Bearer scrape'}).get_data(as_text=True)
+
+    lines = body.splitlines()
+    assert '# TYPE iot_request_duration_seconds histogram' in lines
+    assert any(line.startswith('iot_request_sql_statements_bucket{endpoint="items"') and 'le="1"' in line
+               and line.endswith(' 1') for line in lines)
+    assert any(line.startswith('iot_requests_total{endpoint="items",status="200"') for line in lines)
+    assert any(line.startswith('iot_request_duration_seconds_count{endpoint="items"') for line in lines)
+
+def test_metrics_need_a_token_unless_public(tmp_path, monkeypatch):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    monkeypatch.delenv('METRICS_PUBLIC', raising=False)
+    client = _app(tmp_path).test_client()
+    assert client.get('/metrics').status_code == 404
+
+    monkeypatch.setenv('METRICS_TOKEN', 'scrape')
+    assert client.get('/metrics').status_code == 401
+
+    monkeypatch.delenv('METRICS_TOKEN')
+    monkeypatch.setenv('METRICS_PUBLIC', 'true')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'worker="0"' in body
@@ -0,0 +1,73 @@
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from src.adapters.sql_events import StatementEvents, StatementRecord
+from src.services.slow_queries import SlowQueryLog, redact_parameters
+
+
+class SignalLookups:
+    """Stands in for a query class: callers are found by file location"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def by_controller(self, controller_id):
+        return self.conn.execute(text("SELECT id FROM t WHERE id = :id"), {"id": controller_id}).all()
+
+
+def _record(statement, duration, parameters=None, executemany=False):
+    return StatementRecord(statement, parameters or {}, executemany, duration, 1, None)
+
+def test_parameters_are_redacted():
+    redacted = redact_parameters({
+        "controlador_id": 7,
+        "start": datetime(2024, 1, 1),
+        "phone_number": "+34600000000",
+        "password_hash": 12345,
+    })
+    assert redacted == {
+        "controlador_id": 7,
+        "start": "2024-01-01T00:00:00",
+        "phone_number": "<str:12>",
+        "password_hash": "***",
+    }
+    assert redact_parameters([{"a": "x"}, {"a": "y"}]) == {"rows": 2, "first": {"a": "<str:1>"}}
+
+def test_slow_statements_are_recorded_with_caller(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.services.slow_queries._CALLER_PATHS', ('test_slow_queries.py',))
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+    events = StatementEvents(engine)
+    log = SlowQueryLog(engine, threshold_seconds=0.0, max_entries=2)
+    events.subscribe(log.on_statement)
+
+    with engine.connect() as conn:
+        for i in range(3):
+            SignalLookups(conn).by_controller(i)
+
+    assert log.recorded == 3
+    entries = log.recent()
+    assert len(entries) == 2 and entries[0]["id"] == 3
+    assert entries[0]["shape"] == "SELECT id FROM t WHERE id = ?"
+    assert entries[0]["caller"].startswith("SignalLookups.by_controller (test_slow_queries.py:")
+    # No plans outside PostgreSQL
+    assert entries[0]["plan"] is None
+
+def test_explain_is_sampled_once_per_shape(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    log = SlowQueryLog(engine, threshold_seconds=0.1, explain_sample_rate=1.0)
+    log.explain_supported = True
+    plans = []
+    log.explain = lambda statement, parameters: plans.append((statement, parameters)) or [{"Plan": {}}]
+
+    log.on_statement(_record("SELECT * FROM signals WHERE controlador_id = %(id)s", 0.5, {"id": 1}))
+    log.on_statement(_record("SELECT * FROM signals WHERE controlador_id = %(id)s", 0.5, {"id": 2}))
+    log.on_statement(_record("UPDATE signals SET values = %(v)s", 0.5, {"v": "x"}))
+    log.on_statement(_record("SELECT 1", 0.05))
+
+    assert [entry["plan"] for entry in log.recent()] == [None, None, "pending"]
+    assert log.explain_pending() == 1
+    # The real parameters reach EXPLAIN, only the redacted ones are kept
+    assert plans == [("SELECT * FROM signals WHERE controlador_id = %(id)s", {"id": 1})]
+    assert log.recent()[-1]["plan"] == [{"Plan": {}}]
+    assert log.explained == 1
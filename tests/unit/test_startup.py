@@ -0,0 +1,32 @@
+from scripts.profile_startup import STARTUP_BUDGET_MS, parse_importtime, profile_startup
+from src.lazy_imports import lazy_import
+
+
+def test_app_import_within_startup_budget():
+    # Measured in a fresh interpreter, so other tests' imports do not count
+    report = profile_startup('src.entrypoints.flask_app')
+
+    assert report["eager_heavy_modules"] == []
+    assert report["total_ms"] <= STARTUP_BUDGET_MS, (
+        f"startup took {report['total_ms']:.0f} ms, budget {STARTUP_BUDGET_MS:.0f} ms; "
+        f"run `python -m scripts.profile_startup` for the breakdown"
+    )
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     src.domain\n"
+        "import time:      1500 |       1620 |   src.domain.model\n"
+    )
+    assert parse_importtime(stderr) == [
+        {"module": "src.domain", "depth": 2, "self_ms": 0.12, "cumulative_ms": 0.12},
+        {"module": "src.domain.model", "depth": 1, "self_ms": 1.5, "cumulative_ms": 1.62},
+    ]
+
+def test_lazy_module_imports_on_first_use():
+    module = lazy_import('json')
+    assert lazy_import('json') is module
+    assert module.dumps([1]) == '[1]'
+    assert module.loaded
+    # Later lookups come from the cached names, not __getattr__
+    assert 'dumps' in vars(module) and module.loads('[2]') == [2]
@@ -0,0 +1,54 @@
+import time
+from unittest.mock import patch
+import jwt
+from src.services.auth_service import AuthService, TokenCache
+
+SECRET = 'test-secret'
+
+
+def _token(**claims):
+    return jwt.encode({'user_id': 1, 'email': 'a@b.c', **claims}, SECRET, algorithm='HS256')
+
+def test_verified_payload_is_served_from_cache():
+    service = AuthService(None, SECRET, token_cache=TokenCache())
+    token = _token(exp=int(time.time()) + 60)
+
+    with patch('src.services.auth_service.jwt.decode', wraps=jwt.decode) as decode:
+        assert service.verify_token(token)['user_id'] == 1
+        assert service.verify_token(token)['user_id'] == 1
+
+    assert decode.call_count == 1
+    assert service.token_cache.hits == 1
+
+def test_cached_payload_expires_with_token():
+    cache = TokenCache()
+    service = AuthService(None, SECRET, token_cache=cache)
+    token = _token(exp=int(time.time()) + 60)
+    service.verify_token(token)
+
+    with patch('src.services.auth_service.time.time', return_value=time.time() + 120):
+        assert cache.get(TokenCache.key(SECRET, token)) is None
+
+def test_invalid_tokens_are_not_cached():
+    cache = TokenCache()
+    service = AuthService(None, SECRET, token_cache=cache)
+
+    assert service.verify_token(_token(exp=int(time.time()) - 1)) is None
+    assert service.verify_token('not-a-token') is None
+    assert service.verify_token(jwt.encode({'user_id': 1}, 'other', algorithm='HS256')) is None
+    assert len(cache._entries) == 0
+
+def test_cache_is_bounded_and_keyed_by_secret():
+    cache = TokenCache(maxsize=2)
+    for i in range(3):
+        cache.put(TokenCache.key(SECRET, f"t{i}"), {'exp': time.time() + 60})
+
+    assert cache.get(TokenCache.key(SECRET, "t0")) is None
+    assert cache.get(TokenCache.key(SECRET, "t2")) is not None
+    assert cache.get(TokenCache.key('other', "t2")) is None
+
+def test_disabled_cache_stores_nothing():
+    cache = TokenCache(maxsize=0)
+    AuthService(None, SECRET, token_cache=cache).verify_token(_token(exp=int(time.time()) + 60))
+
+    assert len(cache._entries) == 0
@@ -0,0 +1,74 @@
+from unittest.mock import Mock
+from flask import Flask
+from sqlalchemy.orm import clear_mappers
+from src.adapters.orm import mapper_registry, start_mappers
+from src.entrypoints.routes.health import health_bp
+from src.entrypoints.warmup import Readiness, warm_up, track_first_request
+
+
+def _app(tracker=None):
+    app = Flask(__name__)
+    app.extensions['readiness'] = Readiness()
+    if tracker is not None:
+        app.extensions['liveness_tracker'] = tracker
+    app.register_blueprint(health_bp, url_prefix='/health')
+    track_first_request(app)
+
+    @app.route('/work')
+    def work():
+        return 'ok'
+
+    return app
+
+def test_start_mappers_is_idempotent():
+    already_mapped = bool(mapper_registry.mappers)
+    try:
+        start_mappers()
+        count = len(mapper_registry.mappers)
+        start_mappers()
+        assert len(mapper_registry.mappers) == count
+    finally:
+        if not already_mapped:
+            clear_mappers()
+
+def test_not_ready_until_warmed_up():
+    tracker = Mock()
+    app = _app(tracker)
+    client = app.test_client()
+    assert client.get('/health/live').status_code == 200
+    assert client.get('/health/ready').status_code == 503
+
+    session = Mock()
+    session.execute.return_value.all.return_value = [(1, None)]
+    assert warm_up(app, lambda: session)
+
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert set(response.json['steps_ms']) == {'configure_mappers', 'compile_queries', 'load_controllers'}
+    assert response.json['startup_ms'] is not None
+    tracker.rebuild.assert_called_once_with([(1, None)])
+    session.close.assert_called_once()
+
+def test_failed_warm_up_is_retried_by_the_probe():
+    app = _app()
+    session = Mock()
+    session.execute.side_effect = [RuntimeError("database is down")] + [Mock()] * 10
+    assert not warm_up(app, lambda: session)
+
+    readiness = app.extensions['readiness']
+    assert readiness.error == "database is down"
+    readiness._attempted_at -= Readiness.RETRY_SECONDS
+    assert app.test_client().get('/health/ready').status_code == 200
+    assert readiness.error is None
+
+def test_first_request_latency_is_recorded_once():
+    app = _app()
+    readiness = app.extensions['readiness']
+    client = app.test_client()
+    client.get('/work')
+    first = readiness.first_request_ms
+    client.get('/work')
+    assert first is not None and readiness.first_request_ms == first
+
+    readiness.reset()
+    assert readiness.first_request_ms is None and not readiness.ready
@@ -0,0 +1,19 @@
+"""WSGI entry point for production servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With gunicorn.conf.py the app is imported once in the master (preload) and
+every worker warms up and starts its service threads after the fork. Other
+WSGI servers import this module in each worker, which warms up right away.
+"""
+from src.adapters.orm import start_mappers
+
+start_mappers()
+
+from src.entrypoints import flask_app  # noqa: E402  (mappers first)
+from src.config import get_server_settings  # noqa: E402
+
+app = flask_app.app
+
+if not get_server_settings()['preload']:
+    flask_app.start_worker()